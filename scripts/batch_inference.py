@@ -2,6 +2,9 @@
 Batch Inference Script
 
 전체 유저에 대한 배치 추론 실행
+
+유저를 batch_size명씩 묶어 RecommendationService.recommend_batch로 처리합니다.
+(후보 생성 / user feature 조회가 묶음당 1회, 결과는 유저별 recommend()와 동일)
 """
 
 import sys
@@ -16,17 +19,19 @@ project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
 from src.models.serving import RecommendationService
+from src.data.feature_snapshot import resolve_feature_path
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
-def main(sample_size: int = 100):
+def main(sample_size: int = 100, batch_size: int = 1000):
     """
     배치 추론 실행
     
     Args:
         sample_size: 처리할 유저 수
+        batch_size: recommend_batch 1회에 묶는 유저 수
     """
     logger.info("=" * 70)
     logger.info("배치 추론 시작")
@@ -42,9 +47,11 @@ def main(sample_size: int = 100):
     logger.info(f"\n[2/3] 샘플 유저 {sample_size}명 추출 중...")
     con = duckdb.connect(':memory:')
     sample_users = con.execute(f"""
-        SELECT customer_id 
-        FROM read_parquet('data/features/user_features.parquet')
-        ORDER BY abs(hash(customer_id))
+        SELECT d.customer_id
+        FROM read_parquet('{resolve_feature_path("user_features.parquet")}') uf
+        JOIN read_parquet('data/processed/dictionaries/customer_ids.parquet') d
+          USING (customer_idx)
+        ORDER BY abs(hash(d.customer_id))
         LIMIT {sample_size}
     """).fetchall()
     con.close()
@@ -57,20 +64,24 @@ def main(sample_size: int = 100):
     results = []
     failed = []
     
-    for user_row in tqdm(sample_users, desc="추천 생성"):
-        user_id = user_row[0]
+    user_ids = [row[0] for row in sample_users]
+    batch_size = max(int(batch_size), 1)
+    
+    for start in tqdm(range(0, len(user_ids), batch_size), desc="추천 생성"):
+        batch = user_ids[start:start + batch_size]
         
         try:
-            result = service.recommend(user_id, top_k=10)
-            
+            batch_results = service.recommend_batch(batch, top_k=10)
+        except Exception as e:
+            logger.error(f"유저 {len(batch)}명 배치 추천 실패: {str(e)}")
+            failed.extend(batch)
+            continue
+        
+        for user_id, result in zip(batch, batch_results):
             if result['recommendations']:
                 results.append(result)
             else:
                 failed.append(user_id)
-                
-        except Exception as e:
-            logger.error(f"유저 {user_id} 추천 실패: {str(e)}")
-            failed.append(user_id)
     
     # 4. 결과 저장 (간단한 요약)
     elapsed = time.time() - start_time
@@ -102,6 +113,7 @@ if __name__ == "__main__":
     
     parser = argparse.ArgumentParser(description='배치 추론 실행')
     parser.add_argument('--sample-size', type=int, default=100, help='처리할 유저 수')
+    parser.add_argument('--batch-size', type=int, default=1000, help='recommend_batch 1회에 묶는 유저 수')
     args = parser.parse_args()
     
-    main(sample_size=args.sample_size)
+    main(sample_size=args.sample_size, batch_size=args.batch_size)
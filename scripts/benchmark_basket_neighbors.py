@@ -0,0 +1,159 @@
+"""
+Basket Neighbors Benchmark
+
+CF 이웃 테이블(t_item_neighbors)의 co-occurrence 정의별 생성 비용 비교
+
+    window : 같은 고객이 CF window 안에서 산 상품끼리 (기존, cf_cooccurrence="window")
+    basket : 같은 고객이 같은 날 산 상품끼리 (cf_cooccurrence="basket")
+
+각 정의는 별도 프로세스에서 실행하여 피크 RSS가 서로 섞이지 않도록 합니다.
+join 크기는 self-join 입력 (고객 또는 바스켓별 고유 상품 수)^2 의 합입니다.
+유저 샘플로 CF 후보가 있는 유저 비율과 두 정의의 CF top_k 겹침 비율도 출력합니다.
+
+사용법:
+    python scripts/benchmark_basket_neighbors.py [--top-n 200] [--users 200]
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+import time
+from pathlib import Path
+import logging
+
+# 프로젝트 루트를 Python 경로에 추가
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.models.candidate_generation import CandidateGenerator
+
+logging.basicConfig(level=logging.INFO, format='%(message)s', force=True)
+logger = logging.getLogger(__name__)
+
+
+MODES = ['window', 'basket']
+
+
+def peak_rss_mb() -> float:
+    """현재 프로세스 피크 RSS (MB, resource 모듈이 없는 Windows에서는 -1)"""
+    try:
+        import resource
+    except ImportError:
+        return -1.0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux: KB, macOS: bytes
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def run_child(mode: str, top_n: int) -> None:
+    """자식 프로세스: CF window 적재 후 이웃 테이블 1회 생성, 결과를 JSON으로 stdout에 출력"""
+    logging.getLogger().setLevel(logging.WARNING)
+    gen = CandidateGenerator(cf_cache_dir=None, item_neighbors_top_n=None)
+    con = gen.connect()
+    group = 'customer_idx, t_dat' if mode == 'basket' else 'customer_idx'
+    join_rows = con.execute(f"""
+        SELECT SUM(k * k)::BIGINT
+        FROM (
+            SELECT COUNT(DISTINCT article_idx) AS k
+            FROM v_cf_transactions
+            GROUP BY {group}
+        )
+    """).fetchone()[0]
+
+    # 생성자 검증 없이 같은 연결에서 이웃 테이블만 다시 생성
+    gen.item_neighbors_top_n = top_n
+    gen.cf_cooccurrence = mode
+    rss_before = peak_rss_mb()
+    start = time.perf_counter()
+    gen.build_item_neighbors()
+    elapsed = time.perf_counter() - start
+    rows, seeds = con.execute(
+        "SELECT COUNT(*), COUNT(DISTINCT seed_item) FROM t_item_neighbors"
+    ).fetchone()
+    gen.close()
+
+    print(json.dumps({
+        'mode': mode,
+        'seconds': elapsed,
+        'peak_rss_mb': peak_rss_mb(),
+        'rss_before_mb': rss_before,
+        'join_rows': int(join_rows or 0),
+        'neighbor_rows': int(rows),
+        'seed_items': int(seeds),
+    }))
+
+
+def run_mode(mode: str, top_n: int) -> dict:
+    result = subprocess.run(
+        [sys.executable, __file__, '--child', mode, '--top-n', str(top_n)],
+        capture_output=True, text=True, check=True, cwd=str(project_root)
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def compare_signals(n_users: int, top_k: int) -> dict:
+    """유저 샘플의 CF 후보 보유 비율 / window 대비 basket top_k 겹침 비율"""
+    gens = {mode: CandidateGenerator(cf_cache_dir=None, cf_cooccurrence=mode) for mode in MODES}
+    users = [int(r[0]) for r in gens['window'].connect().execute("""
+        SELECT customer_idx
+        FROM (SELECT DISTINCT customer_idx FROM v_cf_transactions)
+        ORDER BY hash(customer_idx)
+        LIMIT ?
+    """, [int(n_users)]).fetchall()]
+    lists = {
+        mode: [[s.item_id for s in items] for items in gen.generate_cf_scored_item2item_batch(users, top_k=top_k)]
+        for mode, gen in gens.items()
+    }
+    for gen in gens.values():
+        gen.close()
+
+    overlaps = [
+        len(set(w) & set(b)) / len(w)
+        for w, b in zip(lists['window'], lists['basket'])
+        if w
+    ]
+    return {
+        'users': len(users),
+        'coverage': {mode: sum(bool(x) for x in lists[mode]) / max(len(users), 1) for mode in MODES},
+        'overlap': sum(overlaps) / len(overlaps) if overlaps else float('nan'),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Basket neighbors benchmark')
+    parser.add_argument('--top-n', type=int, default=200)
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--top-k', type=int, default=300)
+    parser.add_argument('--child', choices=MODES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child, args.top_n)
+        return
+
+    results = {mode: run_mode(mode, args.top_n) for mode in MODES}
+
+    logger.info("=" * 78)
+    logger.info(f"이웃 테이블 co-occurrence 정의별 생성 비용 (top_n={args.top_n})")
+    logger.info("=" * 78)
+    logger.info(f"{'정의':<8} {'생성(s)':>8} {'피크 RSS(MB)':>13} {'생성 전(MB)':>12} "
+                f"{'join 크기':>14} {'이웃 행 수':>11} {'seed 수':>8}")
+    for mode, r in results.items():
+        logger.info(f"{mode:<8} {r['seconds']:>8.2f} {r['peak_rss_mb']:>13.1f} {r['rss_before_mb']:>12.1f} "
+                    f"{r['join_rows']:>14,} {r['neighbor_rows']:>11,} {r['seed_items']:>8,}")
+
+    if args.users > 0:
+        logging.getLogger().setLevel(logging.WARNING)
+        signal = compare_signals(args.users, args.top_k)
+        logging.getLogger().setLevel(logging.INFO)
+        logger.info("-" * 78)
+        logger.info(f"유저 {signal['users']}명, CF top_k={args.top_k}")
+        for mode in MODES:
+            logger.info(f"  {mode:<8} CF 후보가 있는 유저 비율: {signal['coverage'][mode]:.3f}")
+        logger.info(f"  window 후보 중 basket 후보에도 있는 비율 (평균): {signal['overlap']:.3f}")
+    logger.info("=" * 78)
+
+
+if __name__ == "__main__":
+    main()
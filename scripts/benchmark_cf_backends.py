@@ -0,0 +1,132 @@
+"""
+CF Backend Benchmark
+
+CandidateGenerator.generate_cf_scored_item2item의 CF 엔진별 요청당 소요 시간과 결과 일치 여부 비교
+
+비교 대상 (같은 CF window, 같은 유저 샘플 / 파라미터):
+    selfjoin  : DuckDB self-join (seed → 구매자 → 다른 상품, 요청마다 계산)
+    neighbors : DuckDB 사전 계산 이웃 테이블(t_item_neighbors) 조회 + 합산 (기본)
+    sparse    : SciPy CSR 곱(item x user counts @ user x item decay) + argpartition top-k
+
+결과 일치는 selfjoin 결과를 기준으로 상품 순서가 같은 유저 수와
+최대 상대 점수 오차로 확인합니다.
+
+사용법:
+    python scripts/benchmark_cf_backends.py [--users 200] [--repeat 3] [--top-k 300]
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+import logging
+
+import numpy as np
+
+# 프로젝트 루트를 Python 경로에 추가
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.models.candidate_generation import CandidateGenerator, ScoredItem
+
+logging.basicConfig(level=logging.INFO, format='%(message)s', force=True)
+logger = logging.getLogger(__name__)
+
+
+BACKENDS = {
+    'selfjoin': {'cf_backend': 'sql', 'item_neighbors_top_n': None},
+    'neighbors': {'cf_backend': 'sql'},
+    'sparse': {'cf_backend': 'sparse'},
+}
+
+
+def sample_users(gen: CandidateGenerator, n: int) -> List[int]:
+    """CF window에 거래가 있는 유저 중 hash 순으로 n명"""
+    rows = gen.connect().execute("""
+        SELECT customer_idx
+        FROM (SELECT DISTINCT customer_idx FROM v_cf_transactions)
+        ORDER BY hash(customer_idx)
+        LIMIT ?
+    """, [int(n)]).fetchall()
+    return [int(r[0]) for r in rows]
+
+
+def run_backend(gen: CandidateGenerator, users: List[int], repeat: int,
+                top_k: int) -> Dict[str, object]:
+    """첫 패스(워밍업 + 결과 수집) 후 repeat회 요청별 소요 시간(ms) 측정"""
+    start = time.perf_counter()
+    results = [gen.generate_cf_scored_item2item(u, top_k=top_k) for u in users]
+    first_pass = time.perf_counter() - start
+
+    latencies = []
+    for _ in range(repeat):
+        for user_idx in users:
+            start = time.perf_counter()
+            gen.generate_cf_scored_item2item(user_idx, top_k=top_k)
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    latencies = np.asarray(latencies)
+    return {
+        'results': results,
+        'first_pass_s': first_pass,
+        'p50_ms': float(np.percentile(latencies, 50)),
+        'p95_ms': float(np.percentile(latencies, 95)),
+        'mean_ms': float(latencies.mean()),
+    }
+
+
+def compare(base: List[List[ScoredItem]], other: List[List[ScoredItem]]) -> Dict[str, float]:
+    """유저별 상품 순서 불일치 수 / 최대 상대 점수 오차"""
+    mismatches = 0
+    max_rel = 0.0
+    for a, b in zip(base, other):
+        if [x.item_id for x in a] != [x.item_id for x in b]:
+            mismatches += 1
+            continue
+        for x, y in zip(a, b):
+            max_rel = max(max_rel, abs(x.score - y.score) / max(abs(x.score), 1e-12))
+    return {'mismatches': mismatches, 'max_rel_err': max_rel}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='CF backend benchmark')
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--top-k', type=int, default=300)
+    parser.add_argument('--backends', nargs='+', default=list(BACKENDS), choices=list(BACKENDS))
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(logging.WARNING)
+    results = {}
+    users: List[int] = []
+    for name in args.backends:
+        gen = CandidateGenerator(**BACKENDS[name])
+        start = time.perf_counter()
+        gen.connect()
+        connect_s = time.perf_counter() - start
+        if not users:
+            users = sample_users(gen, args.users)
+        results[name] = run_backend(gen, users, args.repeat, args.top_k)
+        results[name]['connect_s'] = connect_s
+        gen.close()
+
+    logging.getLogger().setLevel(logging.INFO)
+    base_name = args.backends[0]
+    logger.info("=" * 78)
+    logger.info(f"CF 백엔드 벤치마크 (유저 {len(users)}명 x {args.repeat}회, top_k={args.top_k}, "
+                f"기준: {base_name})")
+    logger.info("=" * 78)
+    logger.info(f"{'백엔드':<10} {'연결(s)':>8} {'첫 패스(s)':>10} {'p50(ms)':>9} {'p95(ms)':>9} "
+                f"{'평균(ms)':>9} {'순서 불일치':>10} {'최대 오차':>10}")
+    for name, r in results.items():
+        diff = compare(results[base_name]['results'], r['results'])
+        logger.info(f"{name:<10} {r['connect_s']:>8.2f} {r['first_pass_s']:>10.2f} "
+                    f"{r['p50_ms']:>9.2f} {r['p95_ms']:>9.2f} {r['mean_ms']:>9.2f} "
+                    f"{diff['mismatches']:>10d} {diff['max_rel_err']:>10.1e}")
+    logger.info("(sparse 첫 패스에는 CSR 행렬 / 감쇠 행렬 생성 시간이 포함됩니다)")
+    logger.info("=" * 78)
+
+
+if __name__ == "__main__":
+    main()
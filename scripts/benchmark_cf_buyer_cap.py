@@ -0,0 +1,178 @@
+"""
+CF Buyer Cap Benchmark
+
+CandidateGenerator(cf_max_buyers_per_seed=N)의 seed당 구매자 수 상한별 지연 시간 / recall 비교
+
+seed 상품을 구매자 전체로 펼치는 co-purchase join은 인기 상품을 최근에 산 유저에서 가장 비쌉니다.
+유저를 "seed 중 가장 인기 있는 상품의 구매자 수" 기준 10분위로 나누고,
+상한별로 분위별 p50 / p99 지연 시간과 상한 없는 결과 대비 recall을 출력합니다.
+
+    recall = |상한 적용 CF top_k ∩ 상한 없는 CF top_k| / |상한 없는 CF top_k|
+
+백엔드:
+    selfjoin : DuckDB self-join (요청마다 seed → 구매자 → 다른 상품, 기본)
+    sparse   : SciPy CSR 곱 (sparse_cf.py)
+
+사용법:
+    python scripts/benchmark_cf_buyer_cap.py [--users 300] [--caps 0 2000 500 200 100] [--backend selfjoin]
+    (--caps의 0 = 상한 없음, 기준 결과)
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+import logging
+
+import numpy as np
+
+# 프로젝트 루트를 Python 경로에 추가
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.models.candidate_generation import CandidateGenerator
+
+logging.basicConfig(level=logging.INFO, format='%(message)s', force=True)
+logger = logging.getLogger(__name__)
+
+
+BACKENDS = {
+    'selfjoin': {'cf_backend': 'sql', 'item_neighbors_top_n': None},
+    'sparse': {'cf_backend': 'sparse'},
+}
+
+
+def sample_users(gen: CandidateGenerator, n: int, recent_items: int) -> Dict[int, int]:
+    """
+    CF window에 거래가 있는 유저 중 hash 순으로 n명 → {customer_idx: seed 최대 구매자 수}
+
+    seed는 generate_cf_scored_item2item과 같은 기준(최근 recent_items건)입니다.
+    """
+    rows = gen.connect().execute("""
+        WITH
+        users AS (
+            SELECT customer_idx
+            FROM (SELECT DISTINCT customer_idx FROM v_cf_transactions)
+            ORDER BY hash(customer_idx)
+            LIMIT ?
+        ),
+        item_buyers AS (
+            SELECT article_idx, COUNT(DISTINCT customer_idx) AS buyers
+            FROM v_cf_transactions
+            GROUP BY article_idx
+        ),
+        seeds AS (
+            SELECT t.customer_idx, t.article_idx
+            FROM v_cf_transactions t
+            SEMI JOIN users u ON u.customer_idx = t.customer_idx
+            QUALIFY ROW_NUMBER() OVER (
+                PARTITION BY t.customer_idx ORDER BY t.t_dat DESC, t.article_idx ASC
+            ) <= ?
+        )
+        SELECT s.customer_idx, MAX(b.buyers)
+        FROM seeds s
+        JOIN item_buyers b USING (article_idx)
+        GROUP BY s.customer_idx
+    """, [int(n), int(recent_items)]).fetchall()
+    return {int(u): int(b) for u, b in rows}
+
+
+def popularity_deciles(seed_buyers: Dict[int, int], users: List[int]) -> np.ndarray:
+    """seed 최대 구매자 수 순위 기반 10분위 (0 = 가장 비인기, 9 = 가장 인기)"""
+    values = np.array([seed_buyers[u] for u in users])
+    ranks = np.empty(len(values), dtype=np.int64)
+    ranks[np.lexsort((np.arange(len(values)), values))] = np.arange(len(values))
+    return ranks * 10 // max(len(values), 1)
+
+
+def run_cap(cap: Optional[int], backend: str, users: List[int], top_k: int,
+            repeat: int) -> Dict[str, object]:
+    """상한 1개에 대해 유저별 CF 결과와 지연 시간(ms, repeat회 중 최소) 측정"""
+    gen = CandidateGenerator(cf_max_buyers_per_seed=cap, **BACKENDS[backend])
+    gen.connect()
+    # 워밍업 (seed 구매자 테이블 / CSR 행렬 생성)
+    gen.generate_cf_scored_item2item(users[0], top_k=top_k)
+
+    results = []
+    latencies = []
+    for user_idx in users:
+        best = float('inf')
+        items: List[int] = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            scored = gen.generate_cf_scored_item2item(user_idx, top_k=top_k)
+            best = min(best, (time.perf_counter() - start) * 1000)
+            items = [s.item_id for s in scored]
+        results.append(items)
+        latencies.append(best)
+    gen.close()
+    return {'results': results, 'latencies': np.asarray(latencies)}
+
+
+def recall(reference: List[List[int]], results: List[List[int]]) -> np.ndarray:
+    """유저별 recall (기준 결과가 비어 있으면 NaN)"""
+    out = np.full(len(reference), np.nan)
+    for i, (ref, got) in enumerate(zip(reference, results)):
+        if ref:
+            out[i] = len(set(ref) & set(got)) / len(ref)
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description='CF buyer cap benchmark')
+    parser.add_argument('--users', type=int, default=300)
+    parser.add_argument('--caps', type=int, nargs='+', default=[0, 2000, 500, 200, 100])
+    parser.add_argument('--backend', default='selfjoin', choices=list(BACKENDS))
+    parser.add_argument('--top-k', type=int, default=300)
+    parser.add_argument('--recent-items', type=int, default=10)
+    parser.add_argument('--repeat', type=int, default=2)
+    args = parser.parse_args()
+
+    caps: List[Optional[int]] = [None] + [c for c in args.caps if c > 0]
+
+    logging.getLogger().setLevel(logging.WARNING)
+    probe = CandidateGenerator(**BACKENDS[args.backend])
+    seed_buyers = sample_users(probe, args.users, args.recent_items)
+    probe.close()
+    users = sorted(seed_buyers)
+    deciles = popularity_deciles(seed_buyers, users)
+
+    runs = {cap: run_cap(cap, args.backend, users, args.top_k, args.repeat) for cap in caps}
+    reference = runs[None]['results']
+
+    def label(cap: Optional[int]) -> str:
+        return '상한 없음' if cap is None else f'cap={cap}'
+
+    logging.getLogger().setLevel(logging.INFO)
+    logger.info("=" * 78)
+    logger.info(f"seed당 구매자 상한 벤치마크 ({args.backend}, 유저 {len(users)}명, top_k={args.top_k})")
+    logger.info("=" * 78)
+    logger.info(f"{'상한':<12} {'p50(ms)':>9} {'p95(ms)':>9} {'p99(ms)':>9} {'최대(ms)':>9} {'recall':>8}")
+    for cap in caps:
+        lat = runs[cap]['latencies']
+        rec = recall(reference, runs[cap]['results'])
+        logger.info(f"{label(cap):<12} {np.percentile(lat, 50):>9.2f} {np.percentile(lat, 95):>9.2f} "
+                    f"{np.percentile(lat, 99):>9.2f} {lat.max():>9.2f} {np.nanmean(rec):>8.3f}")
+
+    logger.info("-" * 78)
+    logger.info("seed 인기 10분위별 p99(ms) / recall (분위 = seed 최대 구매자 수 순위)")
+    header = f"{'분위':<4} {'구매자 수':>13}" + "".join(f" {label(cap):>16}" for cap in caps)
+    logger.info(header)
+    buyers = np.array([seed_buyers[u] for u in users])
+    for d in range(10):
+        mask = deciles == d
+        if not mask.any():
+            continue
+        row = f"{d + 1:<4} {buyers[mask].min():>6}~{buyers[mask].max():<6}"
+        for cap in caps:
+            lat = runs[cap]['latencies'][mask]
+            rec = recall(reference, runs[cap]['results'])[mask]
+            rec_text = f"{np.nanmean(rec):.2f}" if not np.isnan(rec).all() else "-"
+            row += f" {np.percentile(lat, 99):>9.1f} / {rec_text:>4}"
+        logger.info(row)
+    logger.info("=" * 78)
+
+
+if __name__ == "__main__":
+    main()
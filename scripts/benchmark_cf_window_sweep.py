@@ -0,0 +1,109 @@
+"""
+CF Window Sweep Benchmark
+
+CF window 길이 x time-decay half-life 파라미터 스윕 비용 비교 (sparse 백엔드)
+
+    rematerialize : window 길이마다 CandidateGenerator(cf_window_days=L)를 새로 만들어
+                    window 적재 + CSR 인덱스 생성 후 half-life별 CF 계산 (기존 방식)
+    partials      : 가장 긴 window를 한 번만 적재하고 generate_cf_scored_item2item_batch(window_days=L)로
+                    일별 partial의 prefix(age <= L)에서 계산
+
+같은 유저 샘플 / 파라미터에서 두 방식의 상품 순서가 같은지도 확인합니다.
+
+사용법:
+    python scripts/benchmark_cf_window_sweep.py [--windows 7 14 28] [--half-lives 7 14 28] [--users 300]
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Tuple
+import logging
+
+# 프로젝트 루트를 Python 경로에 추가
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.models.candidate_generation import CandidateGenerator
+
+logging.basicConfig(level=logging.INFO, format='%(message)s', force=True)
+logger = logging.getLogger(__name__)
+
+
+Grid = Dict[Tuple[int, int], List[List[int]]]
+
+
+def sample_users(gen: CandidateGenerator, n: int) -> List[int]:
+    """CF window에 거래가 있는 유저 중 hash 순으로 n명"""
+    rows = gen.connect().execute("""
+        SELECT customer_idx
+        FROM (SELECT DISTINCT customer_idx FROM v_cf_transactions)
+        ORDER BY hash(customer_idx)
+        LIMIT ?
+    """, [int(n)]).fetchall()
+    return [int(r[0]) for r in rows]
+
+
+def run_grid(gen: CandidateGenerator, users: List[int], window: int, half_lives: List[int],
+             top_k: int, window_days=None) -> Grid:
+    """한 window에 대해 half-life별 CF 결과 (상품 ID 목록)"""
+    out: Grid = {}
+    for half_life in half_lives:
+        scored = gen.generate_cf_scored_item2item_batch(
+            users, top_k=top_k, time_decay_half_life_days=half_life, window_days=window_days,
+        )
+        out[(window, half_life)] = [[s.item_id for s in items] for items in scored]
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description='CF window sweep benchmark')
+    parser.add_argument('--windows', type=int, nargs='+', default=[7, 14, 28])
+    parser.add_argument('--half-lives', type=int, nargs='+', default=[7, 14, 28])
+    parser.add_argument('--users', type=int, default=300)
+    parser.add_argument('--top-k', type=int, default=300)
+    args = parser.parse_args()
+
+    windows = sorted(set(args.windows))
+    logging.getLogger().setLevel(logging.WARNING)
+
+    # partials: 가장 긴 window 1회 적재
+    start = time.perf_counter()
+    gen = CandidateGenerator(cf_window_days=windows[-1], cf_backend='sparse', cf_cache_dir=None)
+    gen.connect()
+    users = sample_users(gen, args.users)
+    partials: Grid = {}
+    for window in windows:
+        partials.update(run_grid(gen, users, window, args.half_lives, args.top_k, window_days=window))
+    partials_s = time.perf_counter() - start
+    gen.close()
+
+    # rematerialize: window마다 새로 적재
+    start = time.perf_counter()
+    remat: Grid = {}
+    for window in windows:
+        gen = CandidateGenerator(cf_window_days=window, cf_backend='sparse', cf_cache_dir=None)
+        gen.connect()
+        remat.update(run_grid(gen, users, window, args.half_lives, args.top_k))
+        gen.close()
+    remat_s = time.perf_counter() - start
+
+    logging.getLogger().setLevel(logging.INFO)
+    cells = len(windows) * len(args.half_lives)
+    logger.info("=" * 70)
+    logger.info(f"CF window 스윕 벤치마크 (window {windows} x half-life {args.half_lives}, "
+                f"유저 {len(users)}명, top_k={args.top_k})")
+    logger.info("=" * 70)
+    logger.info(f"rematerialize : {remat_s:>7.2f}s  ({remat_s / cells:.2f}s / 조합)")
+    logger.info(f"partials      : {partials_s:>7.2f}s  ({partials_s / cells:.2f}s / 조합)")
+    logger.info("-" * 70)
+    logger.info(f"{'window':>7} {'half-life':>10} {'순서 불일치':>11}")
+    for key in sorted(remat):
+        mismatches = sum(a != b for a, b in zip(remat[key], partials[key]))
+        logger.info(f"{key[0]:>7} {key[1]:>10} {mismatches:>7} / {len(users)}")
+    logger.info("=" * 70)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Co-occurrence Refresh Benchmark
+
+CF window가 하루씩 이동할 때 상품 이웃 테이블(t_item_neighbors) 갱신 비용 비교
+
+비교 대상 (같은 window 길이 / half-life / top_n):
+    sql         : DuckDB 전체 재계산 (build_item_neighbors, 기존 방식)
+    full        : CooccurrenceStore.rebuild (SciPy A^T B 전체 재계산)
+    incremental : CooccurrenceStore.advance (새 날짜 더하기 + window에서 빠지는 날짜 빼기)
+
+최신 거래일 기준 --days일 전 window로 저장소를 만든 뒤 하루씩 이동하여
+최신 window에 도달한 결과가 전체 재계산(sql)과 같은지(상품 순서 / 최대 상대 점수 오차) 확인합니다.
+
+사용법:
+    python scripts/benchmark_cooccurrence_refresh.py [--days 7] [--window-days 28] [--top-n 200]
+"""
+
+import argparse
+import sys
+import time
+from datetime import timedelta
+from pathlib import Path
+import logging
+
+import duckdb
+import numpy as np
+
+# 프로젝트 루트를 Python 경로에 추가
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.data.transaction_store import TransactionStore
+from src.models.candidate_generation import CandidateGenerator
+from src.models.cooccurrence import CooccurrenceStore
+
+logging.basicConfig(level=logging.INFO, format='%(message)s', force=True)
+logger = logging.getLogger(__name__)
+
+
+def sql_neighbors(window_days: int, half_life: int, top_n: int):
+    """기존 DuckDB 전체 재계산 → (소요 시간 s, 이웃 테이블 numpy dict)"""
+    gen = CandidateGenerator(
+        cf_cache_dir=None, cf_window_days=window_days, item_neighbors_top_n=None,
+        item_neighbors_half_life_days=half_life,
+    )
+    gen.connect()
+    gen.item_neighbors_top_n = top_n
+    start = time.perf_counter()
+    gen.build_item_neighbors()
+    elapsed = time.perf_counter() - start
+    table = gen.con.execute(
+        "SELECT seed_item, cand_item, score FROM t_item_neighbors ORDER BY seed_item, rnk"
+    ).fetchnumpy()
+    gen.close()
+    return elapsed, table
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Co-occurrence refresh benchmark')
+    parser.add_argument('--days', type=int, default=7)
+    parser.add_argument('--window-days', type=int, default=28)
+    parser.add_argument('--half-life', type=int, default=14)
+    parser.add_argument('--top-n', type=int, default=200)
+    parser.add_argument('--transactions', default='data/processed/transactions')
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(logging.WARNING)
+    store = TransactionStore(args.transactions)
+    con = duckdb.connect()
+
+    sql_s, reference = sql_neighbors(args.window_days, args.half_life, args.top_n)
+
+    full = CooccurrenceStore(args.window_days, args.half_life, args.top_n)
+    start = time.perf_counter()
+    full.rebuild(con, store, store.max_date())
+    full_s = time.perf_counter() - start
+
+    cooc = CooccurrenceStore(args.window_days, args.half_life, args.top_n)
+    cooc.rebuild(con, store, store.max_date() - timedelta(days=args.days))
+    steps = []
+    for _ in range(args.days):
+        start = time.perf_counter()
+        changed = cooc.advance(con, store)
+        steps.append((cooc.end_date, time.perf_counter() - start, changed, cooc.pairs.nnz))
+
+    table = cooc.neighbor_table()
+    seeds = table.column('seed_item').to_numpy()
+    cands = table.column('cand_item').to_numpy()
+    scores = table.column('score').to_numpy()
+    same_order = (
+        len(cands) == len(reference['cand_item'])
+        and np.array_equal(seeds, reference['seed_item'])
+        and np.array_equal(cands, reference['cand_item'])
+    )
+    max_rel = (
+        float(np.max(np.abs(scores - reference['score']) / reference['score']))
+        if same_order and len(scores) else float('nan')
+    )
+
+    logging.getLogger().setLevel(logging.INFO)
+    logger.info("=" * 70)
+    logger.info(f"이웃 테이블 갱신 벤치마크 (window {args.window_days}일, half-life {args.half_life}, "
+                f"top_n={args.top_n})")
+    logger.info("=" * 70)
+    logger.info(f"sql 전체 재계산      : {sql_s:>7.2f}s")
+    logger.info(f"full 전체 재계산     : {full_s:>7.2f}s  (상품 쌍 {full.pairs.nnz:,}개)")
+    logger.info("-" * 70)
+    logger.info(f"{'window 끝':<12} {'갱신(s)':>8} {'재정렬 seed':>11} {'상품 쌍':>12}")
+    for end, elapsed, changed, nnz in steps:
+        logger.info(f"{end.isoformat():<12} {elapsed:>8.2f} {changed:>11,} {nnz:>12,}")
+    mean_s = float(np.mean([s[1] for s in steps])) if steps else float('nan')
+    logger.info(f"{'평균':<12} {mean_s:>8.2f}")
+    logger.info("-" * 70)
+    logger.info(f"sql 결과와 상품 순서 일치: {same_order} (이웃 {len(cands):,}행), 최대 상대 오차 {max_rel:.1e}")
+    logger.info("=" * 70)
+
+
+if __name__ == "__main__":
+    main()
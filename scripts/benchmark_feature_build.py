@@ -0,0 +1,150 @@
+"""
+Feature Build Benchmark
+
+기존 2-Generator 경로(UserFeatureGenerator → ItemFeatureGenerator)와
+단일 스캔 FeatureBuilder의 소요 시간 / 피크 메모리 비교
+
+각 경로는 별도 프로세스에서 실행하여 피크 RSS가 서로 섞이지 않도록 합니다.
+
+사용법:
+    python scripts/benchmark_feature_build.py [--repeat 3] [--output-dir /tmp/feature_bench]
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+import time
+from pathlib import Path
+import logging
+
+# 프로젝트 루트를 Python 경로에 추가
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+logging.basicConfig(level=logging.INFO, format='%(message)s')
+logger = logging.getLogger(__name__)
+
+
+def peak_rss_mb() -> float:
+    """현재 프로세스 피크 RSS (MB, resource 모듈이 없는 Windows에서는 -1)"""
+    try:
+        import resource
+    except ImportError:
+        return -1.0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux: KB, macOS: bytes
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def run_child(mode: str, transactions_path: str, output_dir: str) -> None:
+    """자식 프로세스: 한 경로만 실행하고 결과를 JSON으로 stdout에 출력"""
+    logging.getLogger().setLevel(logging.WARNING)
+    out = Path(output_dir) / mode
+    out.mkdir(parents=True, exist_ok=True)
+
+    start = time.perf_counter()
+    if mode == 'generators':
+        from src.data.user_features import UserFeatureGenerator
+        from src.data.item_features import ItemFeatureGenerator
+
+        user_gen = UserFeatureGenerator(':memory:')
+        try:
+            user_gen.create_user_features(transactions_path, str(out / 'user_features.parquet'))
+        finally:
+            user_gen.close()
+        item_gen = ItemFeatureGenerator(':memory:')
+        try:
+            item_gen.create_item_features(transactions_path, output_path=str(out / 'item_features.parquet'))
+        finally:
+            item_gen.close()
+    else:
+        from src.data.feature_builder import FeatureBuilder
+
+        builder = FeatureBuilder(':memory:')
+        try:
+            builder.build_features(transactions_path, str(out))
+        finally:
+            builder.close()
+    elapsed = time.perf_counter() - start
+
+    print(json.dumps({'mode': mode, 'seconds': elapsed, 'peak_rss_mb': peak_rss_mb()}))
+
+
+def run_mode(mode: str, transactions_path: str, output_dir: str) -> dict:
+    result = subprocess.run(
+        [sys.executable, __file__, '--child', mode,
+         '--transactions', transactions_path, '--output-dir', output_dir],
+        capture_output=True, text=True, check=True, cwd=str(project_root)
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def outputs_match(output_dir: str) -> bool:
+    """
+    두 경로의 Feature Parquet가 동일한지 확인
+
+    ROUND(AVG(...), 2) 컬럼은 멀티스레드 합산 순서에 따라 반올림 경계에서
+    0.01 차이가 날 수 있으므로 DOUBLE 컬럼은 0.01 허용 오차로 비교합니다.
+    """
+    import duckdb
+    from src.data.feature_snapshot import resolve_feature_path
+
+    con = duckdb.connect()
+    base = Path(output_dir)
+    ok = True
+    for name, key in [('user_features', 'customer_idx'), ('item_features', 'article_idx')]:
+        a = base / 'generators' / f'{name}.parquet'
+        b = resolve_feature_path(f'{name}.parquet', str(base / 'builder'))
+        schema = con.execute(f"DESCRIBE SELECT * FROM read_parquet('{a}')").fetchall()
+        conditions = [
+            f"ABS(a.{col} - b.{col}) > 0.01 + 1e-9" if dtype == 'DOUBLE'
+            else f"a.{col} IS DISTINCT FROM b.{col}"
+            for col, dtype, *_ in schema
+        ]
+        diff = con.execute(f"""
+            SELECT COUNT(*)
+            FROM read_parquet('{a}') a
+            FULL OUTER JOIN read_parquet('{b}') b USING ({key})
+            WHERE a.{key} IS NULL OR b.{key} IS NULL OR {' OR '.join(conditions)}
+        """).fetchone()[0]
+        if diff:
+            logger.error(f"✗ {name} 불일치: {diff} rows")
+            ok = False
+    con.close()
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Feature build benchmark')
+    parser.add_argument('--transactions', default='data/processed/transactions')
+    parser.add_argument('--output-dir', default='data/benchmark/feature_build')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--child', choices=['generators', 'builder'], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child, args.transactions, args.output_dir)
+        return
+
+    results = {'generators': [], 'builder': []}
+    for _ in range(args.repeat):
+        for mode in results:
+            results[mode].append(run_mode(mode, args.transactions, args.output_dir))
+
+    logger.info("=" * 60)
+    logger.info(f"Feature 생성 벤치마크 (반복 {args.repeat}회, 프로세스 분리)")
+    logger.info("=" * 60)
+    logger.info(f"{'경로':<12} {'최소(s)':>10} {'중앙값(s)':>10} {'피크 RSS(MB)':>14}")
+    for mode, runs in results.items():
+        seconds = sorted(r['seconds'] for r in runs)
+        peak = max(r['peak_rss_mb'] for r in runs)
+        logger.info(f"{mode:<12} {seconds[0]:>10.2f} {seconds[len(seconds) // 2]:>10.2f} {peak:>14.1f}")
+
+    logger.info("-" * 60)
+    logger.info("출력 동일 여부: " + ("✓ 동일" if outputs_match(args.output_dir) else "✗ 불일치"))
+    logger.info("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+"""
+Serving Benchmark
+
+RecommendationService.recommend 요청당 소요 시간 / 메모리를 FeatureStore 조회 방식별로 비교
+
+비교 대상 (같은 유저 샘플, 같은 후보 / 모델):
+    pandas   : DuckDB `WHERE ... IN (...)` → fetch_df() → pl.from_pandas (기존 방식)
+    arrow    : DuckDB `WHERE ... IN (...)` → Arrow export(.pl()), pandas 변환 없음
+    index    : 정렬 key 인덱스로 해당 row group만 읽음 (FeatureStore 기본)
+    resident : 메모리 상주 테이블 gather (FeatureStore(resident=True), 서빙 기본)
+
+메모리는 tracemalloc 기준 요청당 피크 Python 할당량(NumPy / pandas 버퍼 포함)입니다.
+DuckDB / Arrow 내부 할당은 포함되지 않습니다.
+
+사용법:
+    python scripts/benchmark_serving.py [--users 200] [--repeat 3]
+"""
+
+import argparse
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import List, Optional
+import logging
+
+import duckdb
+import numpy as np
+import polars as pl
+
+# 프로젝트 루트를 Python 경로에 추가
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.data.feature_snapshot import resolve_feature_path
+from src.data.feature_store import FeatureStore
+from src.models.serving import RecommendationService
+
+logging.basicConfig(level=logging.INFO, format='%(message)s', force=True)
+logger = logging.getLogger(__name__)
+
+
+class DuckDBLookupFeatureStore(FeatureStore):
+    """ID 목록 조회를 DuckDB 쿼리로 수행하는 비교용 FeatureStore"""
+
+    def __init__(self, export: str, **kwargs):
+        super().__init__(**kwargs)
+        self.export = export
+
+    def _lookup(self, file_name: str, key: str, ids: List[int],
+                columns: Optional[List[str]]) -> pl.DataFrame:
+        con = self.connect()
+        id_list = ', '.join(str(int(i)) for i in ids) or 'NULL'
+        select = ', '.join(columns) if columns is not None else '*'
+        result = con.execute(f"""
+            SELECT {select} FROM read_parquet('{self.features_dir / file_name}')
+            WHERE {key} IN ({id_list})
+        """)
+        if self.export == 'pandas':
+            return pl.from_pandas(result.fetch_df())
+        return result.pl()
+
+    def get_user_features(self, user_ids: Optional[List[int]] = None,
+                          columns: Optional[List[str]] = None, lazy: bool = False):
+        if user_ids is None or lazy:
+            return super().get_user_features(user_ids, columns, lazy)
+        return self._lookup('user_features.parquet', 'customer_idx', user_ids, columns)
+
+    def get_item_features(self, item_ids: Optional[List[int]] = None,
+                          columns: Optional[List[str]] = None, lazy: bool = False):
+        if item_ids is None or lazy:
+            return super().get_item_features(item_ids, columns, lazy)
+        return self._lookup('item_features.parquet', 'article_idx', item_ids, columns)
+
+
+def make_feature_store(mode: str) -> FeatureStore:
+    if mode in ('pandas', 'arrow'):
+        return DuckDBLookupFeatureStore(mode)
+    return FeatureStore(resident=(mode == 'resident'))
+
+
+def sample_users(n: int) -> List[str]:
+    """Feature가 있는 유저 중 hash 순으로 n명 (batch_inference.py와 같은 방식)"""
+    con = duckdb.connect(':memory:')
+    rows = con.execute(f"""
+        SELECT d.customer_id
+        FROM read_parquet('{resolve_feature_path("user_features.parquet")}') uf
+        JOIN read_parquet('data/processed/dictionaries/customer_ids.parquet') d
+          USING (customer_idx)
+        ORDER BY abs(hash(d.customer_id))
+        LIMIT {int(n)}
+    """).fetchall()
+    con.close()
+    return [r[0] for r in rows]
+
+
+def run_mode(service: RecommendationService, users: List[str], repeat: int) -> dict:
+    """요청별 소요 시간(ms) / tracemalloc 피크(KB) 측정 (첫 패스는 워밍업)"""
+    for user_id in users:
+        service.recommend(user_id)
+
+    latencies = []
+    peaks = []
+    tracemalloc.start()
+    for _ in range(repeat):
+        for user_id in users:
+            tracemalloc.reset_peak()
+            base = tracemalloc.get_traced_memory()[0]
+            start = time.perf_counter()
+            service.recommend(user_id)
+            latencies.append((time.perf_counter() - start) * 1000)
+            peaks.append((tracemalloc.get_traced_memory()[1] - base) / 1024)
+    tracemalloc.stop()
+
+    latencies = np.asarray(latencies)
+    return {
+        'p50_ms': float(np.percentile(latencies, 50)),
+        'p95_ms': float(np.percentile(latencies, 95)),
+        'mean_ms': float(latencies.mean()),
+        'peak_kb': float(np.mean(peaks)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serving benchmark')
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--modes', nargs='+', default=['pandas', 'arrow', 'index', 'resident'],
+                        choices=['pandas', 'arrow', 'index', 'resident'])
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(logging.WARNING)
+    service = RecommendationService()
+    users = sample_users(args.users)
+
+    results = {}
+    for mode in args.modes:
+        service.feature_store.close()
+        service.feature_store = make_feature_store(mode)
+        results[mode] = run_mode(service, users, args.repeat)
+    service.close()
+
+    logging.getLogger().setLevel(logging.INFO)
+    logger.info("=" * 70)
+    logger.info(f"recommend() 벤치마크 (유저 {len(users)}명 x {args.repeat}회)")
+    logger.info("=" * 70)
+    logger.info(f"{'모드':<10} {'p50(ms)':>9} {'p95(ms)':>9} {'평균(ms)':>9} "
+                f"{'피크 할당(KB)':>14}")
+    for mode, r in results.items():
+        logger.info(f"{mode:<10} {r['p50_ms']:>9.2f} {r['p95_ms']:>9.2f} {r['mean_ms']:>9.2f} "
+                    f"{r['peak_kb']:>14.1f}")
+    if 'pandas' in results:
+        base = results['pandas']
+        logger.info("-" * 70)
+        for mode, r in results.items():
+            if mode != 'pandas':
+                logger.info(f"{mode:<10} pandas 대비: 평균 {r['mean_ms'] - base['mean_ms']:+.2f} ms, "
+                            f"피크 할당 {r['peak_kb'] - base['peak_kb']:+.1f} KB")
+    logger.info("=" * 70)
+
+
+if __name__ == "__main__":
+    main()
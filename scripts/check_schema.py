@@ -1,15 +1,25 @@
+import sys
+from pathlib import Path
+
 import duckdb
 
+# 프로젝트 루트를 Python 경로에 추가
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.data.feature_snapshot import resolve_feature_path
+
 con = duckdb.connect(':memory:')
+user_features_path = resolve_feature_path('user_features.parquet')
 
 # Check user_features columns
 print("User Features Columns:")
-cols = con.execute("DESCRIBE SELECT * FROM read_parquet('data/features/user_features.parquet')").fetchall()
+cols = con.execute(f"DESCRIBE SELECT * FROM read_parquet('{user_features_path}')").fetchall()
 for col in cols:
     print(f"  {col[0]}: {col[1]}")
 
 print("\nSample data:")
-sample = con.execute("SELECT * FROM read_parquet('data/features/user_features.parquet') LIMIT 3").fetchall()
+sample = con.execute(f"SELECT * FROM read_parquet('{user_features_path}') LIMIT 3").fetchall()
 for row in sample:
     print(f"  {row}")
 
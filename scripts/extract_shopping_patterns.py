@@ -17,6 +17,8 @@ from collections import defaultdict, Counter
 project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
+from src.data.transaction_store import TransactionStore
+
 print("=" * 80)
 print("EXTRACTING REAL SHOPPING PATTERNS FROM H&M DATA")
 print("=" * 80)
@@ -31,33 +33,35 @@ print("-" * 80)
 
 # 데이터 로드
 try:
-    # Transactions
-    con.execute("""
+    # Transactions (전체 기간: 모든 주 파티션)
+    con.execute(f"""
         CREATE VIEW transactions AS
         SELECT 
-            customer_id::VARCHAR AS customer_id,
-            article_id::VARCHAR AS article_id,
-            CAST(t_dat AS DATE) AS t_dat,
-            price::DOUBLE AS price
-        FROM read_csv_auto('data/raw/transactions_train.csv', header=true)
+            customer_idx,
+            article_idx,
+            t_dat,
+            price
+        FROM {TransactionStore('data/processed/transactions').scan_sql()}
     """)
     
     # User features (from customers.csv for age data)
     con.execute("""
         CREATE VIEW users AS
         SELECT 
-            customer_id::VARCHAR AS customer_id,
-            age::INT AS age
-        FROM read_csv_auto('data/raw/customers.csv', header=true)
-        WHERE age IS NOT NULL AND age BETWEEN 18 AND 100
+            d.customer_idx,
+            c.age::INT AS age
+        FROM read_parquet('data/processed/customers.parquet') c
+        JOIN read_parquet('data/processed/dictionaries/customer_ids.parquet') d
+          ON d.customer_id = c.customer_id
+        WHERE c.age IS NOT NULL AND c.age BETWEEN 18 AND 100
     """)
     
     # Item features (from articles.csv for category data)
     con.execute("""
         CREATE VIEW items AS
         SELECT 
-            article_id::VARCHAR AS article_id,
-            product_type_name::VARCHAR AS category,
+            d.article_idx,
+            product_type_name AS category,
             CASE 
                 WHEN product_type_name LIKE '%T-shirt%' OR product_type_name LIKE '%Top%' OR product_type_name LIKE '%Blouse%' THEN 'tops'
                 WHEN product_type_name LIKE '%Trouser%' OR product_type_name LIKE '%Jeans%' OR product_type_name LIKE '%Shorts%' THEN 'bottoms'
@@ -67,7 +71,9 @@ try:
                 WHEN product_type_name LIKE '%Jacket%' OR product_type_name LIKE '%Coat%' OR product_type_name LIKE '%Cardigan%' THEN 'outerwear'
                 ELSE 'other'
             END AS category_group
-        FROM read_csv_auto('data/raw/articles.csv', header=true)
+        FROM read_parquet('data/processed/articles.parquet') a
+        JOIN read_parquet('data/processed/dictionaries/article_ids.parquet') d
+          ON d.article_id = a.article_id
     """)
     
     print("[OK] Data loaded successfully")
@@ -106,7 +112,7 @@ WITH user_purchases AS (
             ELSE 'high'
         END AS price_tier
     FROM transactions t
-    JOIN users u ON t.customer_id = u.customer_id
+    JOIN users u ON t.customer_idx = u.customer_idx
     WHERE t.price IS NOT NULL AND t.price > 0
 )
 SELECT 
@@ -149,8 +155,8 @@ WITH user_purchases AS (
             ELSE '51-65'
         END AS age_group
     FROM transactions t
-    JOIN users u ON t.customer_id = u.customer_id
-    JOIN items i ON t.article_id = i.article_id
+    JOIN users u ON t.customer_idx = u.customer_idx
+    JOIN items i ON t.article_idx = i.article_idx
     WHERE i.category_group != 'other'
 )
 SELECT 
@@ -184,16 +190,16 @@ print("-" * 80)
 frequency_query = """
 WITH user_purchase_counts AS (
     SELECT 
-        customer_id,
+        customer_idx,
         COUNT(*) AS purchase_count,
         DATE_DIFF('day', MIN(t_dat), MAX(t_dat)) AS days_active
     FROM transactions
-    GROUP BY customer_id
+    GROUP BY customer_idx
     HAVING days_active > 0
 ),
 user_frequency AS (
     SELECT 
-        customer_id,
+        customer_idx,
         purchase_count,
         days_active,
         purchase_count::DOUBLE / (days_active / 30.0) AS purchases_per_month,
@@ -229,7 +235,7 @@ print("-" * 80)
 price_freq_query = """
 WITH user_avg_price AS (
     SELECT 
-        customer_id,
+        customer_idx,
         AVG(price) AS avg_price,
         CASE 
             WHEN AVG(price) < 0.02 THEN 'low'
@@ -238,15 +244,15 @@ WITH user_avg_price AS (
         END AS price_tier
     FROM transactions
     WHERE price IS NOT NULL AND price > 0
-    GROUP BY customer_id
+    GROUP BY customer_idx
 ),
 user_frequency AS (
     SELECT 
-        customer_id,
+        customer_idx,
         COUNT(*) AS purchase_count,
         DATE_DIFF('day', MIN(t_dat), MAX(t_dat)) AS days_active
     FROM transactions
-    GROUP BY customer_id
+    GROUP BY customer_idx
     HAVING days_active > 0
 ),
 combined AS (
@@ -258,7 +264,7 @@ combined AS (
             ELSE 'occasionally'
         END AS frequency
     FROM user_avg_price p
-    JOIN user_frequency f ON p.customer_id = f.customer_id
+    JOIN user_frequency f ON p.customer_idx = f.customer_idx
 )
 SELECT 
     price_tier,
@@ -293,7 +299,7 @@ SELECT
     category_group,
     COUNT(*) AS count
 FROM transactions t
-JOIN items i ON t.article_id = i.article_id
+JOIN items i ON t.article_idx = i.article_idx
 WHERE category_group != 'other'
 GROUP BY category_group
 ORDER BY count DESC
@@ -13,9 +13,10 @@ from datetime import datetime
 project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
-from src.data.user_features import UserFeatureGenerator
-from src.data.item_features import ItemFeatureGenerator
+from src.data.ingestion import RawDataIngestor
+from src.data.feature_builder import FeatureBuilder
 from src.data.feature_store import FeatureStore
+from src.utils.db_init import build_serving_database
 
 logging.basicConfig(
     level=logging.INFO,
@@ -25,19 +26,19 @@ logger = logging.getLogger(__name__)
 
 
 def validate_data_files():
-    """원본 데이터 파일 존재 확인"""
+    """원본 데이터 파일 존재 확인 (이미 Parquet로 변환된 파일은 CSV 불필요)"""
     logger.info("데이터 파일 검증 중...")
     
     required_files = [
-        'data/raw/transactions_train.csv',
-        'data/raw/customers.csv',
-        'data/raw/articles.csv'
+        ('data/raw/transactions_train.csv', 'data/processed/transactions/_metadata.json'),
+        ('data/raw/customers.csv', 'data/processed/customers.parquet'),
+        ('data/raw/articles.csv', 'data/processed/articles.parquet')
     ]
     
     missing_files = []
-    for file_path in required_files:
-        if not Path(file_path).exists():
-            missing_files.append(file_path)
+    for csv_path, parquet_path in required_files:
+        if not Path(csv_path).exists() and not Path(parquet_path).exists():
+            missing_files.append(csv_path)
     
     if missing_files:
         logger.error(f"필수 데이터 파일이 없습니다: {missing_files}")
@@ -60,31 +61,42 @@ def main():
     if not validate_data_files():
         sys.exit(1)
     
-    # 2. User Features 생성
-    logger.info("\n[1/2] User Features 생성 중...")
-    user_gen = UserFeatureGenerator()
+    # 2. CSV → Parquet 수집 (최초 1회, 이후에는 최신 상태면 생략)
+    logger.info("\n[1/3] 원본 CSV → Parquet 변환 중...")
+    ingestor = RawDataIngestor()
     try:
-        user_features_path = user_gen.create_user_features()
-        logger.info(f"✓ User Features 저장 완료: {user_features_path}")
+        ingested = ingestor.ingest_all()
+        logger.info(f"✓ Parquet 변환 완료: {list(ingested.values())}")
     except Exception as e:
-        logger.error(f"✗ User Features 생성 실패: {str(e)}")
+        logger.error(f"✗ Parquet 변환 실패: {str(e)}")
         raise
     finally:
-        user_gen.close()
+        ingestor.close()
     
-    # 3. Item Features 생성
-    logger.info("\n[2/2] Item Features 생성 중...")
-    item_gen = ItemFeatureGenerator()
+    # 3. User / Item Features 생성 (트랜잭션 1회 스캔)
+    logger.info("\n[2/3] User / Item Features 생성 중...")
+    # 집계는 메모리 DB에서 수행 (local_helix.db는 서빙 프로세스가 READ_ONLY로 여는 서빙 DB)
+    builder = FeatureBuilder(':memory:')
     try:
-        item_features_path = item_gen.create_item_features()
-        logger.info(f"✓ Item Features 저장 완료: {item_features_path}")
+        feature_paths = builder.build_features()
+        logger.info(f"✓ User Features 저장 완료: {feature_paths['users']}")
+        logger.info(f"✓ Item Features 저장 완료: {feature_paths['items']}")
     except Exception as e:
-        logger.error(f"✗ Item Features 생성 실패: {str(e)}")
+        logger.error(f"✗ Feature 생성 실패: {str(e)}")
         raise
     finally:
-        item_gen.close()
+        builder.close()
     
-    # 4. Feature Store 통계 출력
+    # 4. 서빙 DB 적재 (key 테이블 + ART 인덱스, 파일 교체 방식)
+    logger.info("\n[3/3] 서빙 DB 적재 중...")
+    try:
+        db_path = build_serving_database()
+        logger.info(f"✓ 서빙 DB 적재 완료: {db_path}")
+    except Exception as e:
+        logger.error(f"✗ 서빙 DB 적재 실패: {str(e)}")
+        raise
+    
+    # 5. Feature Store 통계 출력
     logger.info("\n[통계] Feature Store 요약")
     store = FeatureStore()
     try:
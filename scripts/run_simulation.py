@@ -20,6 +20,7 @@ from src.simulation.ollama_client import OllamaClient
 from src.simulation.ab_test import ABTestSimulator
 from src.models.serving import RecommendationService
 from src.models.candidate_generation import CandidateGenerator
+from src.data.feature_snapshot import resolve_feature_path
 import duckdb
 
 logging.basicConfig(level=logging.INFO)
@@ -34,9 +35,11 @@ def sample_users_fast(num_users: int, seed: int = 42) -> List[str]:
     con = duckdb.connect(":memory:")
     try:
         rows = con.execute(f"""
-            SELECT customer_id
-            FROM read_parquet('data/features/user_features.parquet')
-            ORDER BY abs(hash(customer_id || '{seed}'))
+            SELECT d.customer_id
+            FROM read_parquet('{resolve_feature_path("user_features.parquet")}') uf
+            JOIN read_parquet('data/processed/dictionaries/customer_ids.parquet') d
+              USING (customer_idx)
+            ORDER BY abs(hash(d.customer_id || '{seed}'))
             LIMIT {num_users}
         """).fetchall()
         return [r[0] for r in rows]
@@ -14,6 +14,7 @@ project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
 from src.models.candidate_generation import CandidateGenerator
+from src.data.feature_snapshot import resolve_feature_path
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -29,9 +30,9 @@ def test_basic_functionality():
     try:
         # 샘플 유저 3명만 테스트
         con = generator.connect()
-        sample_users = con.execute("""
-            SELECT customer_id 
-            FROM read_parquet('data/features/user_features.parquet')
+        sample_users = con.execute(f"""
+            SELECT customer_idx 
+            FROM read_parquet('{resolve_feature_path("user_features.parquet")}')
             LIMIT 3
         """).fetchall()
         
@@ -64,9 +65,9 @@ def test_performance():
     try:
         # 샘플 유저 1명만 테스트
         con = generator.connect()
-        sample_user = con.execute("""
-            SELECT customer_id 
-            FROM read_parquet('data/features/user_features.parquet')
+        sample_user = con.execute(f"""
+            SELECT customer_idx 
+            FROM read_parquet('{resolve_feature_path("user_features.parquet")}')
             LIMIT 1
         """).fetchone()[0]
         
@@ -108,9 +109,9 @@ def test_quality():
     
     try:
         con = generator.connect()
-        sample_user = con.execute("""
-            SELECT customer_id 
-            FROM read_parquet('data/features/user_features.parquet')
+        sample_user = con.execute(f"""
+            SELECT customer_idx 
+            FROM read_parquet('{resolve_feature_path("user_features.parquet")}')
             LIMIT 1
         """).fetchone()[0]
         
@@ -177,6 +178,7 @@ project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
 from src.models.candidate_generation import CandidateGenerator
+from src.data.feature_snapshot import resolve_feature_path
 import duckdb
 
 logging.basicConfig(level=logging.INFO)
@@ -193,9 +195,9 @@ def test_candidate_count():
     try:
         # 샘플 유저 10명 추출
         con = generator.connect()
-        sample_users = con.execute("""
-            SELECT customer_id 
-            FROM read_parquet('data/features/user_features.parquet')
+        sample_users = con.execute(f"""
+            SELECT customer_idx 
+            FROM read_parquet('{resolve_feature_path("user_features.parquet")}')
             LIMIT 10
         """).fetchall()
         
@@ -234,9 +236,9 @@ def test_performance():
     try:
         # 샘플 유저 추출
         con = generator.connect()
-        sample_user = con.execute("""
-            SELECT customer_id 
-            FROM read_parquet('data/features/user_features.parquet')
+        sample_user = con.execute(f"""
+            SELECT customer_idx 
+            FROM read_parquet('{resolve_feature_path("user_features.parquet")}')
             LIMIT 1
         """).fetchone()[0]
         
@@ -276,15 +278,15 @@ def test_coverage():
     try:
         # 전체 상품 수 조회
         con = generator.connect()
-        total_items = con.execute("""
+        total_items = con.execute(f"""
             SELECT COUNT(*) 
-            FROM read_parquet('data/features/item_features.parquet')
+            FROM read_parquet('{resolve_feature_path("item_features.parquet")}')
         """).fetchone()[0]
         
         # 샘플 유저 100명의 후보군 수집
-        sample_users = con.execute("""
-            SELECT customer_id 
-            FROM read_parquet('data/features/user_features.parquet')
+        sample_users = con.execute(f"""
+            SELECT customer_idx 
+            FROM read_parquet('{resolve_feature_path("user_features.parquet")}')
             LIMIT 100
         """).fetchall()
         
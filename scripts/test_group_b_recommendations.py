@@ -12,6 +12,8 @@ sys.path.insert(0, str(project_root))
 
 from src.models.serving import RecommendationService
 from src.models.candidate_generation import CandidateGenerator
+from src.data.id_mapping import IdMapper
+from src.data.feature_snapshot import resolve_feature_path
 import duckdb
 
 print("=" * 80)
@@ -24,9 +26,11 @@ print("-" * 80)
 
 con = duckdb.connect(':memory:')
 try:
-    sample_user = con.execute("""
-        SELECT customer_id 
-        FROM read_parquet('data/features/user_features.parquet')
+    sample_user = con.execute(f"""
+        SELECT d.customer_id
+        FROM read_parquet('{resolve_feature_path("user_features.parquet")}') uf
+        JOIN read_parquet('data/processed/dictionaries/customer_ids.parquet') d
+          USING (customer_idx)
         LIMIT 1
     """).fetchone()[0]
     print(f"Sample user: {sample_user}")
@@ -98,7 +102,8 @@ try:
     
     # Merged candidates
     print("\nTesting merged candidates...")
-    merged = candidate_gen.merge_candidates(sample_user, total_k=10)
+    sample_user_idx = IdMapper().customers.encode_one(sample_user)
+    merged = candidate_gen.merge_candidates(sample_user_idx, total_k=10)
     print(f"Merged candidates: {len(merged)}")
     if merged:
         print(f"  First 5: {merged[:5]}")
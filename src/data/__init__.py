@@ -1,8 +1,17 @@
 """Data processing utilities for Local-Helix project"""
 
+from .ingestion import RawDataIngestor
+from .id_mapping import IdMapper
+from .transaction_store import TransactionStore
 from .user_features import UserFeatureGenerator
 from .item_features import ItemFeatureGenerator
+from .feature_builder import FeatureBuilder
+from .incremental_features import IncrementalFeatureUpdater
 from .feature_store import FeatureStore
 
-__all__ = ['UserFeatureGenerator', 'ItemFeatureGenerator', 'FeatureStore']
+__all__ = [
+    'RawDataIngestor', 'IdMapper', 'TransactionStore',
+    'UserFeatureGenerator', 'ItemFeatureGenerator', 'FeatureBuilder',
+    'IncrementalFeatureUpdater', 'FeatureStore'
+]
 
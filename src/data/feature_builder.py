@@ -0,0 +1,312 @@
+"""
+Feature Builder Module
+
+유저 Feature / 상품 Feature / 전역 통계를 트랜잭션 1회 스캔으로 생성합니다.
+
+UserFeatureGenerator와 ItemFeatureGenerator를 차례로 실행하면 서로 다른 window로
+트랜잭션 파티션을 두 번 읽습니다. FeatureBuilder는 가장 넓은 window의 파티션만
+한 번 읽어 임시 테이블에 올린 뒤, 각 window별 조건부 집계(FILTER)로
+유저 / 상품 Feature(추가 window 컬럼 포함)를 계산하고, 전역 통계는 그 집계 결과에서 바로 계산합니다.
+
+출력 컬럼과 값은 두 Generator의 결과와 동일합니다.
+"""
+
+import duckdb
+import json
+import pyarrow.feather as feather
+import pyarrow.parquet as pq
+from datetime import date
+from decimal import Decimal
+from pathlib import Path
+from typing import Any, Dict, Optional, Sequence
+import logging
+
+from .feature_index import FEATURE_IPC_SUFFIX, FEATURE_ROW_GROUP_SIZE
+from .feature_snapshot import new_snapshot, publish_snapshot
+from .item_features import item_features_select
+from .transaction_store import TransactionStore
+from .user_features import PURCHASE_HOUR_SQL, user_features_select
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+GLOBAL_STATS_FILE = 'global_stats.json'
+
+
+FEATURE_STATS_QUANTILES = [0.25, 0.5, 0.75]
+
+
+def feature_column_stats(con: duckdb.DuckDBPyConnection, table: str) -> Dict[str, Any]:
+    """
+    Feature 테이블 컬럼별 통계 (FeatureStore.get_feature_stats가 스캔 없이 읽는 sidecar 내용)
+
+    - 공통: count(NULL 제외), null_count, min, max
+    - 숫자 컬럼: sum, avg, 근사 분위수(FEATURE_STATS_QUANTILES)
+    - 날짜 컬럼의 min / max는 ISO 문자열
+
+    Args:
+        con: DuckDB 연결
+        table: 테이블명 (user_features / item_features)
+
+    Returns:
+        {'rows': row 수, 'columns': {컬럼명: 통계}}
+    """
+    schema = con.execute(f"DESCRIBE {table}").fetchall()
+    numeric_types = ('TINYINT', 'SMALLINT', 'INTEGER', 'BIGINT', 'HUGEINT', 'FLOAT', 'DOUBLE', 'DECIMAL')
+
+    exprs = ["COUNT(*)"]
+    layout = []
+    for col, dtype, *_ in schema:
+        numeric = dtype.startswith(numeric_types)
+        exprs += [f'COUNT("{col}")', f'MIN("{col}")', f'MAX("{col}")']
+        if numeric:
+            exprs += [f'SUM("{col}")', f'AVG("{col}")',
+                      f'APPROX_QUANTILE("{col}", {FEATURE_STATS_QUANTILES})']
+        layout.append((col, numeric))
+    row = con.execute(f"SELECT {', '.join(exprs)} FROM {table}").fetchone()
+
+    def _value(v):
+        if isinstance(v, Decimal):
+            v = float(v)
+        if isinstance(v, date):
+            return v.isoformat()
+        if isinstance(v, float):
+            return round(v, 4)
+        return v
+
+    total = int(row[0])
+    columns = {}
+    pos = 1
+    for col, numeric in layout:
+        count, min_v, max_v = row[pos:pos + 3]
+        pos += 3
+        col_stats = {'count': int(count), 'null_count': total - int(count),
+                     'min': _value(min_v), 'max': _value(max_v)}
+        if numeric:
+            sum_v, avg_v, quantiles = row[pos:pos + 3]
+            pos += 3
+            col_stats.update({
+                'sum': _value(sum_v),
+                'avg': _value(avg_v),
+                'quantiles': {str(q): _value(v) for q, v in zip(FEATURE_STATS_QUANTILES, quantiles or [])},
+            })
+        columns[col] = col_stats
+    return {'rows': total, 'columns': columns}
+
+
+def global_feature_stats(con: duckdb.DuckDBPyConnection) -> Dict[str, Any]:
+    """전역 통계 + 컬럼별 통계 (user_features / item_features 집계 테이블에서 계산)"""
+    user_row = con.execute("""
+        SELECT COUNT(*), SUM(purchase_count), AVG(purchase_count), AVG(avg_purchase_hour)
+        FROM user_features
+    """).fetchone()
+    item_row = con.execute("""
+        SELECT COUNT(*), SUM(sales_count), AVG(sales_count), MAX(sales_count)
+        FROM item_features
+    """).fetchone()
+
+    return {
+        'total_users': int(user_row[0]),
+        'user_window_transactions': int(user_row[1] or 0),
+        'avg_purchases': round(user_row[2], 2) if user_row[2] is not None else None,
+        'avg_hour': round(user_row[3], 2) if user_row[3] is not None else None,
+        'total_items': int(item_row[0]),
+        'item_window_transactions': int(item_row[1] or 0),
+        'avg_sales': round(item_row[2], 2) if item_row[2] is not None else None,
+        'max_sales': int(item_row[3]) if item_row[3] is not None else None,
+        'tables': {
+            'users': feature_column_stats(con, 'user_features'),
+            'items': feature_column_stats(con, 'item_features'),
+        },
+    }
+
+
+def write_feature_ipc(parquet_path: str) -> str:
+    """
+    Feature Parquet → Arrow IPC 파일 (같은 이름, .arrow 확장자)
+
+    mmap 후 복사 없이 쓸 수 있도록 비압축 / 단일 record batch로 저장합니다.
+    """
+    ipc_path = str(Path(parquet_path).with_suffix(FEATURE_IPC_SUFFIX))
+    table = pq.read_table(parquet_path).combine_chunks()
+    feather.write_feather(table, ipc_path, compression='uncompressed',
+                          chunksize=max(table.num_rows, 1))
+    return ipc_path
+
+
+def write_feature_outputs(con: duckdb.DuckDBPyConnection,
+                          features_dir: str,
+                          stats: Dict[str, Any]) -> Dict[str, str]:
+    """
+    user_features / item_features 테이블과 전역 통계를 새 스냅샷으로 저장 후 공개
+
+    파일은 features_dir/snapshots/<버전>/에 모두 쓴 뒤 CURRENT 포인터를 원자적으로
+    교체하므로, 읽는 쪽은 이전 스냅샷 또는 완성된 새 스냅샷만 보게 됩니다.
+
+    Parquet와 함께 같은 내용의 Arrow IPC(Feather v2, 비압축, 단일 record batch)
+    파일도 씁니다. 서빙 프로세스들은 이를 mmap으로 열어 OS page cache 한 벌을 공유합니다.
+
+    Args:
+        con: user_features / item_features 테이블이 있는 DuckDB 연결
+        features_dir: Feature 루트 디렉토리
+        stats: 전역 통계 (global_stats.json)
+
+    Returns:
+        {'users': path, 'items': path, 'stats': path}
+    """
+    output_dir = new_snapshot(features_dir)
+    outputs = {
+        'users': str(output_dir / 'user_features.parquet'),
+        'items': str(output_dir / 'item_features.parquet'),
+        'stats': str(output_dir / GLOBAL_STATS_FILE),
+    }
+    # row group을 작게 유지 (FeatureStore point lookup 시 해당 row group만 디코딩)
+    options = f"FORMAT PARQUET, ROW_GROUP_SIZE {FEATURE_ROW_GROUP_SIZE}"
+    con.execute(f"COPY user_features TO '{outputs['users']}' ({options})")
+    con.execute(f"COPY item_features TO '{outputs['items']}' ({options})")
+    for key in ('users', 'items'):
+        write_feature_ipc(outputs[key])
+
+    tmp_stats = output_dir / f'{GLOBAL_STATS_FILE}.tmp'
+    with open(tmp_stats, 'w', encoding='utf-8') as f:
+        json.dump(stats, f, indent=2)
+    tmp_stats.replace(outputs['stats'])
+
+    publish_snapshot(features_dir, output_dir.name)
+    return outputs
+
+
+class FeatureBuilder:
+    """유저 / 상품 Feature 단일 스캔 생성 클래스"""
+
+    def __init__(self, db_path: str = 'local_helix.db'):
+        """
+        초기화
+
+        Args:
+            db_path: DuckDB 데이터베이스 경로
+        """
+        self.db_path = db_path
+        self.con: Optional[duckdb.DuckDBPyConnection] = None
+
+    def connect(self):
+        """DuckDB 연결"""
+        if self.con is None:
+            self.con = duckdb.connect(self.db_path)
+            self.con.execute("SET memory_limit='8GB'")
+            self.con.execute("SET threads TO 4")
+        return self.con
+
+    def _scan_transactions(self, store: TransactionStore, scan_start: date) -> None:
+        """window 파티션을 1회 읽어 임시 테이블(feature_scan)로 적재"""
+        con = self.connect()
+        con.execute(f"""
+            CREATE OR REPLACE TEMP TABLE feature_scan AS
+            SELECT
+                customer_idx,
+                article_idx,
+                t_dat,
+                price,
+                {PURCHASE_HOUR_SQL} as purchase_hour
+            FROM {store.scan_sql(scan_start)}
+        """)
+
+    def _build_user_features(self, max_date: date, starts: Dict[int, date], primary_days: int) -> None:
+        self.con.execute(f"""
+        CREATE OR REPLACE TABLE user_features AS
+        {user_features_select(max_date, starts, primary_days, 'feature_scan')}
+        """)
+
+    def _build_item_features(self, starts: Dict[int, date], primary_days: int) -> None:
+        self.con.execute(f"""
+        CREATE OR REPLACE TABLE item_features AS
+        {item_features_select(starts, primary_days, 'feature_scan')}
+        """)
+
+    def build_features(self,
+                       transactions_path: str = 'data/processed/transactions',
+                       features_dir: str = 'data/features',
+                       user_lookback_days: int = 28,
+                       item_lookback_days: int = 7,
+                       user_windows: Optional[Sequence[int]] = None,
+                       item_windows: Optional[Sequence[int]] = None) -> Dict[str, str]:
+        """
+        유저 / 상품 Feature 및 전역 통계 생성 (트랜잭션 1회 스캔)
+
+        Args:
+            transactions_path: 주 단위 파티션 트랜잭션 저장소
+            features_dir: 출력 디렉토리
+            user_lookback_days: 유저 Feature 계산 기간 (일)
+            item_lookback_days: 상품 Feature 계산 기간 (일)
+            user_windows: 유저 Feature 추가 window 목록 (_{n}d 접미사 컬럼)
+            item_windows: 상품 Feature 추가 window 목록 (_{n}d 접미사 컬럼)
+
+        Returns:
+            {'users': path, 'items': path, 'stats': path}
+        """
+        logger.info("Feature 생성 시작 (단일 스캔)...")
+
+        con = self.connect()
+        store = TransactionStore(transactions_path)
+        max_date = store.max_date()
+        user_starts = {
+            days: store.window_start(days)
+            for days in {int(user_lookback_days), *(int(d) for d in (user_windows or []))}
+        }
+        item_starts = {
+            days: store.window_start(days)
+            for days in {int(item_lookback_days), *(int(d) for d in (item_windows or []))}
+        }
+        user_start = user_starts[int(user_lookback_days)]
+        item_start = item_starts[int(item_lookback_days)]
+
+        self._scan_transactions(store, min(*user_starts.values(), *item_starts.values()))
+
+        self._build_user_features(max_date, user_starts, int(user_lookback_days))
+        self._build_item_features(item_starts, int(item_lookback_days))
+        stats = global_feature_stats(con)
+        stats.update({
+            'max_date': max_date.isoformat(),
+            'user_window_start': user_start.isoformat(),
+            'item_window_start': item_start.isoformat(),
+        })
+        con.execute("DROP TABLE feature_scan")
+
+        # Parquet / JSON 저장
+        outputs = write_feature_outputs(con, features_dir, stats)
+
+        logger.info("=" * 60)
+        logger.info("Feature 생성 완료!")
+        logger.info(f"유저 window: {user_start} ~ {max_date} "
+                    f"({stats['total_users']:,}명, {stats['user_window_transactions']:,}건)")
+        logger.info(f"상품 window: {item_start} ~ {max_date} "
+                    f"({stats['total_items']:,}개, {stats['item_window_transactions']:,}건)")
+        logger.info("=" * 60)
+
+        return outputs
+
+    def close(self):
+        """연결 종료"""
+        if self.con is not None:
+            self.con.close()
+            self.con = None
+
+
+def main():
+    """메인 실행 함수"""
+    builder = FeatureBuilder()
+
+    try:
+        outputs = builder.build_features()
+        for name, path in outputs.items():
+            logger.info(f"✓ {name}: {path}")
+    except Exception as e:
+        logger.error(f"✗ 에러 발생: {str(e)}")
+        raise
+    finally:
+        builder.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,221 @@
+"""
+Feature Index Module
+
+Feature Parquet key 조회용 인덱스 (정렬 key 배열 + 이진 탐색)
+
+요청마다 DuckDB로 `WHERE customer_idx IN (...)`를 실행하면 Parquet 전체를 스캔합니다.
+ParquetKeyIndex는 key 컬럼만 1회 읽어 정렬 배열을 만들고,
+조회 시 np.searchsorted로 row 위치를 찾은 뒤 해당 row group만 memory-map으로 읽습니다.
+
+- key → row 위치: O(log n)
+- row 읽기: 해당 row group(FEATURE_ROW_GROUP_SIZE rows)만 디코딩
+- 파일이 갱신되면(mtime / 크기 변경) 다음 조회 시 인덱스를 다시 만듭니다.
+
+ResidentFeatureTable은 같은 인터페이스로 테이블 전체를 메모리에 올려
+key 위치 배열 gather만으로 조회합니다 (서빙용 상주 모드).
+옆에 Arrow IPC 파일(.arrow)이 있으면 Parquet를 디코딩하지 않고 mmap으로 열어,
+같은 머신의 여러 워커 프로세스가 page cache 한 벌을 공유합니다.
+"""
+
+import os
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple
+import logging
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+# Feature Parquet row group 크기 (point lookup 시 디코딩 단위)
+FEATURE_ROW_GROUP_SIZE = 8192
+
+# Feature Parquet와 같은 내용의 Arrow IPC(Feather v2, 비압축) 파일 확장자
+FEATURE_IPC_SUFFIX = '.arrow'
+
+
+class ParquetKeyIndex:
+    """정렬 key 배열 기반 Parquet point lookup"""
+
+    def __init__(self, path: str, key_column: str):
+        """
+        초기화
+
+        Args:
+            path: Feature Parquet 경로
+            key_column: 정수 key 컬럼명 (customer_idx / article_idx)
+        """
+        self.path = Path(path)
+        self.key_column = key_column
+
+        self._file: Optional[pq.ParquetFile] = None
+        self._signature: Optional[Tuple[int, int]] = None
+        self._sorted_keys: Optional[np.ndarray] = None
+        self._sorted_rows: Optional[np.ndarray] = None
+        self._row_group_starts: Optional[np.ndarray] = None
+
+    def _file_signature(self) -> Tuple[int, int]:
+        st = os.stat(self.path)
+        return st.st_mtime_ns, st.st_size
+
+    def _load(self) -> None:
+        if not self.path.exists():
+            raise FileNotFoundError(f"Feature 파일이 없습니다: {self.path}")
+
+        signature = self._file_signature()
+        if self._signature == signature:
+            return
+
+        pf = pq.ParquetFile(self.path, memory_map=True)
+        keys = pf.read(columns=[self.key_column]).column(0).to_numpy()
+
+        # user_features는 key 순으로 저장되어 있으므로 정렬 생략
+        # (item_features는 popularity_rank 순 → argsort)
+        if len(keys) < 2 or bool(np.all(keys[1:] > keys[:-1])):
+            self._sorted_keys = keys
+            self._sorted_rows = np.arange(len(keys), dtype=np.int64)
+        else:
+            order = np.argsort(keys, kind='stable')
+            self._sorted_keys = keys[order]
+            self._sorted_rows = order.astype(np.int64)
+
+        row_counts = [pf.metadata.row_group(i).num_rows for i in range(pf.metadata.num_row_groups)]
+        self._row_group_starts = np.concatenate([[0], np.cumsum(row_counts)]).astype(np.int64)
+        self._file = pf
+        self._signature = signature
+        logger.info(f"Feature 인덱스 생성: {self.path} ({len(keys):,} rows, {len(row_counts)} row groups)")
+
+    def load(self) -> None:
+        """인덱스 생성 (이미 최신이면 무시)"""
+        self._load()
+
+    def __len__(self) -> int:
+        self._load()
+        return len(self._sorted_keys)
+
+    def rows(self, keys: Sequence[int]) -> np.ndarray:
+        """
+        key → 파일 내 row 위치 (없는 key는 -1)
+
+        Args:
+            keys: 조회할 key 리스트
+
+        Returns:
+            int64 배열 (keys와 같은 순서)
+        """
+        self._load()
+        query = np.asarray(keys, dtype=np.int64)
+        out = np.full(len(query), -1, dtype=np.int64)
+        if len(query) == 0 or len(self._sorted_keys) == 0:
+            return out
+
+        pos = np.searchsorted(self._sorted_keys, query)
+        pos_clipped = np.minimum(pos, len(self._sorted_keys) - 1)
+        found = self._sorted_keys[pos_clipped] == query
+        out[found] = self._sorted_rows[pos_clipped[found]]
+        return out
+
+    def take(self, keys: Sequence[int], columns: Optional[List[str]] = None) -> pa.Table:
+        """
+        key에 해당하는 row만 읽기 (없는 key는 제외, 파일 순서, 중복 제거)
+
+        Args:
+            keys: 조회할 key 리스트
+            columns: 읽을 컬럼 (None이면 전체)
+
+        Returns:
+            pyarrow Table
+        """
+        rows = self.rows(keys)
+        rows = np.unique(rows[rows >= 0])
+        if len(rows) == 0:
+            schema = self._file.schema_arrow
+            if columns is not None:
+                schema = pa.schema([schema.field(c) for c in columns])
+            return schema.empty_table()
+
+        # row 위치 → (row group, group 내 offset)
+        groups = np.searchsorted(self._row_group_starts, rows, side='right') - 1
+        parts = []
+        for group in np.unique(groups):
+            local = rows[groups == group] - self._row_group_starts[group]
+            table = self._file.read_row_group(int(group), columns=columns)
+            parts.append(table.take(pa.array(local)))
+        return pa.concat_tables(parts) if len(parts) > 1 else parts[0]
+
+
+class ResidentFeatureTable(ParquetKeyIndex):
+    """
+    Feature Parquet 전체를 메모리에 상주시킨 key 조회 테이블
+
+    시작 시 1회 전체 컬럼을 연속 Arrow 배열로 읽고, key(int32 surrogate key,
+    0 ~ N-1 범위)를 인덱스로 하는 dense row 위치 배열을 만듭니다.
+    조회는 위치 배열 gather + Arrow take뿐이므로 DuckDB / 파일 I/O가 없습니다.
+
+    Arrow IPC 파일이 있으면 컬럼 버퍼는 mmap된 파일을 그대로 가리키므로(복사 없음)
+    프로세스별 heap에는 key 위치 배열만 남습니다.
+    """
+
+    def __init__(self, path: str, key_column: str):
+        super().__init__(path, key_column)
+        self._table: Optional[pa.Table] = None
+        self._positions: Optional[np.ndarray] = None
+
+    def _load(self) -> None:
+        if not self.path.exists():
+            raise FileNotFoundError(f"Feature 파일이 없습니다: {self.path}")
+
+        signature = self._file_signature()
+        if self._signature == signature:
+            return
+
+        ipc_path = self.path.with_suffix(FEATURE_IPC_SUFFIX)
+        if ipc_path.exists():
+            source = pa.memory_map(str(ipc_path), 'r')
+            table = pa.ipc.open_file(source).read_all()
+            mapped = True
+        else:
+            table = pq.read_table(self.path, memory_map=True)
+            mapped = False
+        if table.column(self.key_column).num_chunks > 1:
+            table = table.combine_chunks()
+        keys = table.column(self.key_column).to_numpy()
+
+        # key → row 위치 (없는 key는 -1)
+        size = int(keys.max()) + 1 if len(keys) else 0
+        positions = np.full(size, -1, dtype=np.int32)
+        positions[keys] = np.arange(len(keys), dtype=np.int32)
+
+        self._table = table
+        self._positions = positions
+        self._signature = signature
+        logger.info(f"Feature 메모리 적재: {ipc_path if mapped else self.path} "
+                    f"({table.num_rows:,} rows, {table.nbytes / 1024 / 1024:.1f} MB"
+                    f"{', mmap' if mapped else ''})")
+
+    def __len__(self) -> int:
+        self._load()
+        return self._table.num_rows
+
+    @property
+    def table(self) -> pa.Table:
+        """상주 중인 전체 Feature 테이블 (파일 순서)"""
+        self._load()
+        return self._table
+
+    def rows(self, keys: Sequence[int]) -> np.ndarray:
+        self._load()
+        query = np.asarray(keys, dtype=np.int64)
+        out = np.full(len(query), -1, dtype=np.int64)
+        valid = (query >= 0) & (query < len(self._positions))
+        out[valid] = self._positions[query[valid]]
+        return out
+
+    def take(self, keys: Sequence[int], columns: Optional[List[str]] = None) -> pa.Table:
+        rows = self.rows(keys)
+        rows = np.unique(rows[rows >= 0])
+        table = self._table if columns is None else self._table.select(columns)
+        return table.take(pa.array(rows))
@@ -0,0 +1,109 @@
+"""
+Feature Snapshot Module
+
+버전별 Feature 스냅샷 디렉토리와 원자적 CURRENT 포인터 관리
+
+Feature 재생성이 data/features/*.parquet를 제자리에서 덮어쓰면 읽는 쪽이
+쓰다 만 파일을 보거나, 새 데이터를 보려면 재시작해야 합니다.
+새 Feature는 항상 새 스냅샷 디렉토리에 쓰고, 다 쓴 뒤 CURRENT 파일을
+os.replace로 교체해 공개합니다. 읽는 쪽은 CURRENT가 가리키는 스냅샷만 읽습니다.
+
+    data/features/
+    ├── CURRENT                  # 현재 스냅샷 버전 (한 줄)
+    └── snapshots/
+        ├── 20200922T030000000000/
+        │   ├── user_features.parquet
+        │   ├── item_features.parquet
+        │   └── global_stats.json
+        └── ...
+
+CURRENT가 없으면(스냅샷 도입 전 출력) features_dir 바로 아래 파일을 읽습니다.
+"""
+
+import os
+import shutil
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+CURRENT_FILE = 'CURRENT'
+SNAPSHOTS_DIR = 'snapshots'
+
+# 교체 후에도 남겨 두는 이전 스냅샷 수 (교체 직전에 열린 reader가 읽기를 마칠 수 있도록)
+KEEP_SNAPSHOTS = 3
+
+
+def current_version(features_dir: str = 'data/features') -> Optional[str]:
+    """CURRENT가 가리키는 스냅샷 버전 (없으면 None)"""
+    pointer = Path(features_dir) / CURRENT_FILE
+    try:
+        version = pointer.read_text(encoding='utf-8').strip()
+    except FileNotFoundError:
+        return None
+    return version or None
+
+
+def snapshot_dir(features_dir: str = 'data/features', version: Optional[str] = None) -> Path:
+    """
+    스냅샷 디렉토리 경로
+
+    Args:
+        features_dir: Feature 루트 디렉토리
+        version: 스냅샷 버전 (None이면 CURRENT, CURRENT도 없으면 features_dir 자체)
+    """
+    version = version or current_version(features_dir)
+    if version is None:
+        return Path(features_dir)
+    return Path(features_dir) / SNAPSHOTS_DIR / version
+
+
+def resolve_feature_path(file_name: str, features_dir: str = 'data/features') -> str:
+    """현재 스냅샷의 Feature 파일 경로 (예: 'user_features.parquet')"""
+    return str(snapshot_dir(features_dir) / file_name)
+
+
+def new_snapshot(features_dir: str = 'data/features') -> Path:
+    """새 (아직 공개되지 않은) 스냅샷 디렉토리 생성"""
+    version = datetime.now().strftime('%Y%m%dT%H%M%S%f')
+    path = Path(features_dir) / SNAPSHOTS_DIR / version
+    path.mkdir(parents=True, exist_ok=False)
+    return path
+
+
+def publish_snapshot(features_dir: str, version: str, keep: int = KEEP_SNAPSHOTS) -> None:
+    """
+    CURRENT를 새 스냅샷으로 원자적 교체 후 오래된 스냅샷 정리
+
+    Args:
+        features_dir: Feature 루트 디렉토리
+        version: 공개할 스냅샷 버전 (snapshots/ 하위 디렉토리명)
+        keep: 남겨 둘 최근 스냅샷 수 (CURRENT 포함)
+    """
+    root = Path(features_dir)
+    if not (root / SNAPSHOTS_DIR / version).is_dir():
+        raise FileNotFoundError(f"스냅샷이 없습니다: {root / SNAPSHOTS_DIR / version}")
+
+    tmp = root / f'{CURRENT_FILE}.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        f.write(version + '\n')
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, root / CURRENT_FILE)
+    logger.info(f"Feature 스냅샷 공개: {version}")
+
+    for old in list_snapshots(features_dir)[:-keep] if keep > 0 else []:
+        if old != version:
+            shutil.rmtree(root / SNAPSHOTS_DIR / old, ignore_errors=True)
+
+
+def list_snapshots(features_dir: str = 'data/features') -> List[str]:
+    """스냅샷 버전 목록 (오래된 순)"""
+    path = Path(features_dir) / SNAPSHOTS_DIR
+    if not path.exists():
+        return []
+    return sorted(p.name for p in path.iterdir() if p.is_dir())
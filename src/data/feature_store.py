@@ -2,34 +2,138 @@
 Feature Store Module
 
 Feature 관리 및 조회를 위한 중앙화된 저장소
+
+Feature 테이블의 키는 int32 surrogate key(customer_idx / article_idx)입니다.
+문자열 ID 변환은 API 경계에서 IdMapper로 수행합니다 (id_mapping.py 참조).
+
+조회 메서드는 columns= 로 필요한 컬럼만 읽고, lazy=True면 Polars LazyFrame을 반환해
+projection / predicate pushdown이 Parquet reader까지 내려가도록 합니다.
+
+ID 목록 조회는 정렬 key 인덱스(feature_index.py)로 해당 row group만 읽고,
+전체 조회 / 통계는 DuckDB로 처리합니다. DuckDB 결과는 Arrow로 바로 받아
+Polars로 넘기므로(.pl()) pandas 변환 / 복사가 없습니다.
+
+resident=True면 시작 시 Feature 테이블을 메모리에 올려 두고
+조회를 key 위치 배열 gather로 처리합니다 (요청 경로에서 DuckDB 미사용, 서빙용).
+
+serving_db=True면 서빙 DB(local_helix.db, utils/db_init.build_serving_database)의
+PRIMARY KEY(ART 인덱스) Feature 테이블을 READ_ONLY로 ATTACH해 조회합니다.
+서빙 DB 파일이 교체되면 다음 조회 시 다시 ATTACH합니다.
+
+Feature 파일은 CURRENT 포인터가 가리키는 스냅샷 디렉토리에서 읽습니다 (feature_snapshot.py).
+reload()는 새 스냅샷을 먼저 완전히 연 뒤 참조 하나를 교체하므로,
+교체 중에도 조회는 이전 스냅샷 또는 새 스냅샷 중 하나로 일관되게 처리됩니다.
 """
 
 import duckdb
+import json
 import polars as pl
+import pyarrow.parquet as pq
+from dataclasses import dataclass
 from pathlib import Path
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Union
 import logging
 
+from .feature_builder import GLOBAL_STATS_FILE
+from .feature_index import ParquetKeyIndex, ResidentFeatureTable
+from .feature_snapshot import current_version, snapshot_dir
+from ..utils.db_init import attach_serving_db, serving_db_signature
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+@dataclass(frozen=True)
+class FeatureSnapshot:
+    """조회에 사용하는 Feature 스냅샷 (버전 + 디렉토리 + key 인덱스)"""
+    version: Optional[str]  # None이면 스냅샷 도입 전 레이아웃 (features_dir 바로 아래)
+    features_dir: Path
+    user_index: ParquetKeyIndex
+    item_index: ParquetKeyIndex
+
+
 class FeatureStore:
     """Feature Store 클래스"""
     
     def __init__(self, 
                  db_path: str = 'local_helix.db',
-                 features_dir: str = 'data/features'):
+                 features_dir: str = 'data/features',
+                 resident: bool = False,
+                 serving_db: bool = False):
         """
         초기화
         
         Args:
-            db_path: DuckDB 데이터베이스 경로
-            features_dir: Feature 파일 저장 디렉토리
+            db_path: DuckDB 데이터베이스 경로 (서빙 DB)
+            features_dir: Feature 루트 디렉토리 (CURRENT / snapshots/)
+            resident: True면 Feature 테이블을 메모리에 상주시켜 조회 (DuckDB 미사용)
+            serving_db: True면 서빙 DB의 key 테이블에서 조회 (resident보다 우선)
         """
         self.db_path = db_path
-        self.features_dir = Path(features_dir)
+        self.features_root = Path(features_dir)
         self.con: Optional[duckdb.DuckDBPyConnection] = None
+        self.serving_db = serving_db
+        self.resident = resident and not serving_db
+        self._attached_signature = None
+        
+        self._snapshot = self._open_snapshot(current_version(str(self.features_root)))
+    
+    def _open_snapshot(self, version: Optional[str]) -> FeatureSnapshot:
+        """스냅샷 열기 (resident면 테이블 적재까지 마친 뒤 반환)"""
+        features_dir = snapshot_dir(str(self.features_root), version)
+        
+        # ID 목록 조회용 key 인덱스 (첫 조회 시 생성, 파일 갱신 시 재생성)
+        index_cls = ResidentFeatureTable if self.resident else ParquetKeyIndex
+        snapshot = FeatureSnapshot(
+            version=version,
+            features_dir=features_dir,
+            user_index=index_cls(str(features_dir / 'user_features.parquet'), 'customer_idx'),
+            item_index=index_cls(str(features_dir / 'item_features.parquet'), 'article_idx'),
+        )
+        
+        if self.resident:
+            # 1회 적재 (파일이 아직 없으면 첫 조회 시 적재)
+            for index in (snapshot.user_index, snapshot.item_index):
+                if index.path.exists():
+                    index.load()
+        return snapshot
+    
+    @property
+    def features_dir(self) -> Path:
+        """현재 스냅샷 디렉토리"""
+        return self._snapshot.features_dir
+    
+    @property
+    def snapshot_version(self) -> Optional[str]:
+        """현재 스냅샷 버전 (스냅샷 도입 전 레이아웃이면 None)"""
+        return self._snapshot.version
+    
+    @property
+    def user_index(self) -> ParquetKeyIndex:
+        return self._snapshot.user_index
+    
+    @property
+    def item_index(self) -> ParquetKeyIndex:
+        return self._snapshot.item_index
+    
+    def reload(self) -> bool:
+        """
+        CURRENT가 바뀌었으면 새 스냅샷으로 교체
+        
+        새 스냅샷을 모두 연(resident면 적재한) 뒤 참조를 한 번에 바꾸므로
+        다른 스레드의 조회는 중단 없이 이전 / 새 스냅샷 중 하나를 사용합니다.
+        
+        Returns:
+            교체 여부
+        """
+        version = current_version(str(self.features_root))
+        if version is None or version == self._snapshot.version:
+            return False
+        
+        snapshot = self._open_snapshot(version)
+        self._snapshot = snapshot
+        logger.info(f"Feature 스냅샷 교체: {version}")
+        return True
     
     def connect(self):
         """DuckDB 연결 (메모리 데이터베이스 사용)"""
@@ -37,138 +141,239 @@ class FeatureStore:
             # Use in-memory database to avoid file locking
             self.con = duckdb.connect(":memory:")
             # Attach the file database in read-only mode if it exists
-            if self.db_path != ":memory:":
-                try:
-                    self.con.execute(f"ATTACH '{self.db_path}' AS filedb (READ_ONLY)")
-                except Exception:
-                    # If attach fails, continue with in-memory only
-                    pass
+            self._attached_signature = attach_serving_db(self.con, self.db_path)
+        elif self.serving_db and serving_db_signature(self.db_path) != self._attached_signature:
+            # 서빙 DB 파일이 교체됨 → 다시 ATTACH (이 연결을 쓰는 스레드에서 수행)
+            self._attached_signature = attach_serving_db(self.con, self.db_path)
         return self.con
     
-    def get_user_features(self, user_ids: Optional[List[str]] = None) -> pl.DataFrame:
+    def _serving_table(self, table: str) -> str:
+        """서빙 DB Feature 테이블명 (ATTACH 실패 시 에러)"""
+        con = self.connect()
+        if self._attached_signature is None:
+            raise FileNotFoundError(f"서빙 DB가 없습니다: {self.db_path} (build_serving_database 실행 필요)")
+        return f"filedb.{table}"
+    
+    def _get_features(self,
+                      table: str,
+                      path: Path,
+                      index: ParquetKeyIndex,
+                      ids: Optional[List[int]],
+                      columns: Optional[List[str]],
+                      lazy: bool) -> Union[pl.DataFrame, pl.LazyFrame]:
+        """
+        Feature 조회 공통 경로 (컬럼 projection / key 필터)
+
+        lazy=True면 Parquet scan LazyFrame을 반환하므로 이후 select / filter가
+        Parquet reader까지 내려가 필요한 컬럼 / row group만 읽습니다.
+        """
+        select = ", ".join(f'"{c}"' for c in columns) if columns is not None else "*"
+        
+        if self.serving_db and not lazy:
+            # 서빙 DB key 테이블 (PRIMARY KEY, key 순 적재 → key 순 반환)
+            key = index.key_column
+            source = self._serving_table(table)
+            if ids is None:
+                return self.con.execute(f"SELECT {select} FROM {source} ORDER BY {key}").pl()
+            # 긴 IN 리스트 대신 파라미터 리스트 SEMI JOIN (후보 수백 개에서 더 빠름)
+            query = f"""
+                SELECT {select} FROM {source}
+                SEMI JOIN (SELECT unnest(?::INTEGER[]) AS {key}) q USING ({key})
+                ORDER BY {key}
+            """
+            return self.con.execute(query, [[int(i) for i in ids]]).pl()
+        
+        if lazy:
+            if self.resident:
+                frame = pl.from_arrow(index.table).lazy()
+            else:
+                frame = pl.scan_parquet(path)
+            if ids is not None:
+                frame = frame.filter(pl.col(index.key_column).is_in([int(i) for i in ids]))
+            return frame.select(columns) if columns is not None else frame
+
+        if ids is not None:
+            # 특정 key 조회 (상주 테이블 gather 또는 인덱스 이진 탐색 → 해당 row group만 읽음)
+            return pl.from_arrow(index.take([int(i) for i in ids], columns))
+
+        if self.resident:
+            table = index.table
+            return pl.from_arrow(table.select(columns) if columns is not None else table)
+
+        # 전체 조회 (필요한 컬럼만 읽음)
+        query = f"SELECT {select} FROM read_parquet('{path}')"
+        return self.connect().execute(query).pl()
+
+    def get_user_features(self,
+                          user_ids: Optional[List[int]] = None,
+                          columns: Optional[List[str]] = None,
+                          lazy: bool = False) -> Union[pl.DataFrame, pl.LazyFrame]:
         """
         유저 Feature 조회
         
         Args:
-            user_ids: 조회할 유저 ID 리스트 (None이면 전체)
+            user_ids: 조회할 유저 customer_idx 리스트 (None이면 전체)
+            columns: 읽을 컬럼 (None이면 전체)
+            lazy: True면 Polars LazyFrame 반환 (projection / predicate pushdown)
             
         Returns:
-            Polars DataFrame
+            Polars DataFrame (lazy=True면 LazyFrame)
         """
-        con = self.connect()
-        user_features_path = self.features_dir / 'user_features.parquet'
+        snapshot = self._snapshot
+        user_features_path = snapshot.features_dir / 'user_features.parquet'
         
-        if not user_features_path.exists():
+        if not self.serving_db and not user_features_path.exists():
             raise FileNotFoundError(f"User features not found: {user_features_path}")
         
-        if user_ids is None:
-            # 전체 유저 Feature 조회
-            query = f"SELECT * FROM read_parquet('{user_features_path}')"
-            result = con.execute(query).fetch_df()
-        else:
-            # 특정 유저 Feature 조회 (SQL injection 방지)
-            query = f"""
-                SELECT * FROM read_parquet('{user_features_path}')
-                WHERE customer_id IN (SELECT unnest(?))
-            """
-            result = con.execute(query, [user_ids]).fetch_df()
-        
-        return pl.from_pandas(result)
+        return self._get_features('user_features', user_features_path, snapshot.user_index, user_ids, columns, lazy)
     
-    def get_item_features(self, item_ids: Optional[List[str]] = None) -> pl.DataFrame:
+    def get_item_features(self,
+                          item_ids: Optional[List[int]] = None,
+                          columns: Optional[List[str]] = None,
+                          lazy: bool = False) -> Union[pl.DataFrame, pl.LazyFrame]:
         """
         상품 Feature 조회
         
         Args:
-            item_ids: 조회할 상품 ID 리스트 (None이면 전체)
+            item_ids: 조회할 상품 article_idx 리스트 (None이면 전체)
+            columns: 읽을 컬럼 (None이면 전체)
+            lazy: True면 Polars LazyFrame 반환 (projection / predicate pushdown)
             
         Returns:
-            Polars DataFrame
+            Polars DataFrame (lazy=True면 LazyFrame)
         """
-        con = self.connect()
-        item_features_path = self.features_dir / 'item_features.parquet'
+        snapshot = self._snapshot
+        item_features_path = snapshot.features_dir / 'item_features.parquet'
         
-        if not item_features_path.exists():
+        if not self.serving_db and not item_features_path.exists():
             raise FileNotFoundError(f"Item features not found: {item_features_path}")
         
-        if item_ids is None:
-            # 전체 상품 Feature 조회
-            query = f"SELECT * FROM read_parquet('{item_features_path}')"
-            result = con.execute(query).fetch_df()
-        else:
-            # 특정 상품 Feature 조회 (SQL injection 방지)
-            query = f"""
-                SELECT * FROM read_parquet('{item_features_path}')
-                WHERE article_id IN (SELECT unnest(?))
-            """
-            result = con.execute(query, [item_ids]).fetch_df()
-        
-        return pl.from_pandas(result)
+        return self._get_features('item_features', item_features_path, snapshot.item_index, item_ids, columns, lazy)
     
-    def get_top_items(self, top_k: int = 100) -> pl.DataFrame:
+    def get_top_items(self, top_k: int = 100, columns: Optional[List[str]] = None) -> pl.DataFrame:
         """
         인기 상품 Top K 조회
         
         Args:
             top_k: 조회할 상품 수
+            columns: 반환할 컬럼 (None이면 전체)
             
         Returns:
             Polars DataFrame
         """
+        snapshot = self._snapshot
+        if self.resident:
+            # item_features는 popularity_rank 순으로 저장되어 있음
+            items = pl.from_arrow(snapshot.item_index.table)
+            items = items.filter(pl.col('popularity_rank') <= top_k).sort('popularity_rank')
+            return items.select(columns) if columns is not None else items
+        
         con = self.connect()
-        item_features_path = self.features_dir / 'item_features.parquet'
+        item_features_path = snapshot.features_dir / 'item_features.parquet'
+        source = self._serving_table('item_features') if self.serving_db else f"read_parquet('{item_features_path}')"
+        select = ", ".join(f'"{c}"' for c in columns) if columns is not None else "*"
         
         query = f"""
-            SELECT * FROM read_parquet('{item_features_path}')
+            SELECT {select} FROM {source}
             WHERE popularity_rank <= {top_k}
             ORDER BY popularity_rank
         """
         
-        result = con.execute(query).fetch_df()
-        return pl.from_pandas(result)
+        return con.execute(query).pl()
     
-    def refresh_features(self):
+    def refresh_features(self, incremental: bool = False):
         """
         모든 Feature 재생성
+        
+        Args:
+            incremental: True면 저장된 일별 부분 집계 상태로 새 날짜만 반영 (incremental_features.py)
         """
-        from .user_features import UserFeatureGenerator
-        from .item_features import ItemFeatureGenerator
+        from .feature_builder import FeatureBuilder
+        from .incremental_features import IncrementalFeatureUpdater
+        from ..utils.db_init import build_serving_database
         
         logger.info("Feature 재생성 시작...")
         
-        # User Features 생성
-        user_gen = UserFeatureGenerator(self.db_path)
-        try:
-            user_gen.create_user_features(
-                output_path=str(self.features_dir / 'user_features.parquet')
-            )
-        finally:
-            user_gen.close()
-        
-        # Item Features 생성
-        item_gen = ItemFeatureGenerator(self.db_path)
-        try:
-            item_gen.create_item_features(
-                output_path=str(self.features_dir / 'item_features.parquet')
-            )
-        finally:
-            item_gen.close()
+        if incremental:
+            # 새 날짜 delta만 더하고 window에서 빠진 날짜는 빼서 갱신
+            updater = IncrementalFeatureUpdater(':memory:', features_dir=str(self.features_root))
+            try:
+                updater.update()
+            finally:
+                updater.close()
+        else:
+            # User / Item Features 및 전역 통계를 트랜잭션 1회 스캔으로 생성
+            # (집계용 DB는 메모리 사용: db_path는 다른 프로세스가 READ_ONLY로 여는 서빙 DB)
+            builder = FeatureBuilder(':memory:')
+            try:
+                builder.build_features(features_dir=str(self.features_root))
+            finally:
+                builder.close()
         
+        # 서빙 DB를 새 스냅샷으로 다시 적재한 뒤 새 스냅샷으로 교체
+        if self.db_path != ':memory:':
+            build_serving_database(self.db_path, str(self.features_root))
+        self.reload()
         logger.info("✓ 모든 Feature 재생성 완료!")
     
+    def _load_stats_sidecar(self, features_dir: Path) -> Optional[Dict[str, Any]]:
+        """
+        Feature 빌드 시 저장된 통계 sidecar(global_stats.json) 로드
+
+        sidecar의 row 수가 Parquet footer의 row 수와 다르면
+        (Feature 파일만 따로 갱신된 경우) 사용하지 않습니다.
+        """
+        stats_path = features_dir / GLOBAL_STATS_FILE
+        if not stats_path.exists():
+            return None
+        with open(stats_path, 'r', encoding='utf-8') as f:
+            sidecar = json.load(f)
+        
+        tables = sidecar.get('tables', {})
+        for name, file_name in [('users', 'user_features.parquet'), ('items', 'item_features.parquet')]:
+            path = features_dir / file_name
+            if not path.exists():
+                continue
+            if name not in tables or pq.read_metadata(path).num_rows != tables[name]['rows']:
+                return None
+        return sidecar
+    
     def get_feature_stats(self) -> Dict[str, Any]:
         """
         Feature 통계 정보 조회
         
+        통계 sidecar가 있으면 Parquet footer row 수만 확인하고 sidecar 값을 반환합니다
+        (테이블 크기와 무관). sidecar가 없는 이전 빌드 출력은 Parquet를 스캔해 계산합니다.
+        
         Returns:
-            통계 정보 딕셔너리
+            통계 정보 딕셔너리 (sidecar 사용 시 컬럼별 통계 'columns' 포함)
         """
+        features_dir = self.features_dir
+        sidecar = self._load_stats_sidecar(features_dir)
+        if sidecar is not None:
+            stats = {}
+            if (features_dir / 'user_features.parquet').exists():
+                stats['users'] = {
+                    'total': sidecar['total_users'],
+                    'avg_purchases': sidecar['avg_purchases'],
+                    'avg_hour': sidecar['avg_hour'],
+                    'columns': sidecar['tables']['users']['columns'],
+                }
+            if (features_dir / 'item_features.parquet').exists():
+                stats['items'] = {
+                    'total': sidecar['total_items'],
+                    'avg_sales': sidecar['avg_sales'],
+                    'max_sales': sidecar['max_sales'],
+                    'columns': sidecar['tables']['items']['columns'],
+                }
+            return stats
+        
         con = self.connect()
         
         stats = {}
         
         # User Features 통계
-        user_features_path = self.features_dir / 'user_features.parquet'
+        user_features_path = features_dir / 'user_features.parquet'
         if user_features_path.exists():
             user_stats = con.execute(f"""
                 SELECT 
@@ -185,7 +390,7 @@ class FeatureStore:
             }
         
         # Item Features 통계
-        item_features_path = self.features_dir / 'item_features.parquet'
+        item_features_path = features_dir / 'item_features.parquet'
         if item_features_path.exists():
             item_stats = con.execute(f"""
                 SELECT 
@@ -0,0 +1,194 @@
+"""
+ID Mapping Module
+
+customer_id(64자 hex) / article_id(10자리 문자열)를 int32 surrogate key로 매핑하는 사전
+
+- 수집(ingestion) 단계에서 1회 생성: data/processed/dictionaries/{customer,article}_ids.parquet
+- 파이프라인 내부(트랜잭션 파티션, Feature Parquet, CF temp table, ranking dataset)는
+  모두 customer_idx / article_idx(INTEGER)만 사용
+- 문자열 ID 변환은 API 경계(RecommendationService, 시뮬레이션)에서만 수행
+
+최초 생성 시 idx는 문자열 ID 정렬 순서(0부터)로 부여되므로
+idx 정렬 = 문자열 정렬 (tie-break 결과가 문자열 기준과 동일)
+"""
+
+import duckdb
+import numpy as np
+import polars as pl
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+CUSTOMER_DICTIONARY = 'customer_ids.parquet'
+ARTICLE_DICTIONARY = 'article_ids.parquet'
+
+
+class IdDictionary:
+    """문자열 ID ↔ int32 idx 사전 (정렬 배열 + 이진 탐색)"""
+
+    def __init__(self, path: str, id_column: str, idx_column: str):
+        """
+        초기화
+
+        Args:
+            path: 사전 Parquet 경로 (idx_column, id_column)
+            id_column: 문자열 ID 컬럼명 (예: customer_id)
+            idx_column: 정수 idx 컬럼명 (예: customer_idx)
+        """
+        self.path = Path(path)
+        self.id_column = id_column
+        self.idx_column = idx_column
+
+        # idx 순서 ID 배열 (decode) / 정렬 ID 배열 + 대응 idx (encode)
+        self._ids_by_idx: Optional[np.ndarray] = None
+        self._sorted_ids: Optional[np.ndarray] = None
+        self._sorted_idx: Optional[np.ndarray] = None
+
+    def _load(self) -> None:
+        if self._ids_by_idx is not None:
+            return
+        if not self.path.exists():
+            raise FileNotFoundError(
+                f"ID 사전이 없습니다: {self.path} (scripts/process_data.py를 먼저 실행하세요)"
+            )
+
+        df = pl.read_parquet(self.path, columns=[self.idx_column, self.id_column]).sort(self.idx_column)
+        idx = df[self.idx_column].to_numpy()
+        if len(idx) and not np.array_equal(idx, np.arange(len(idx))):
+            raise ValueError(f"ID 사전의 idx가 0..n-1 연속이 아닙니다: {self.path}")
+
+        # 고정폭 bytes 배열: 1.37M x 64B (object 배열/파이썬 dict 대비 메모리 수 배 절감)
+        ids = np.array(df[self.id_column].to_list(), dtype=np.bytes_)
+        order = np.argsort(ids, kind='stable')
+
+        self._ids_by_idx = ids
+        if np.array_equal(order, np.arange(len(order))):
+            # 최초 생성 사전: idx 순서 = 정렬 순서 (배열 공유)
+            self._sorted_ids = ids
+            self._sorted_idx = order.astype(np.int32)
+        else:
+            # 증분 추가된 ID가 있는 경우 별도 정렬 배열 유지
+            self._sorted_ids = ids[order]
+            self._sorted_idx = order.astype(np.int32)
+
+        logger.info(f"ID 사전 로드 완료: {self.path} ({len(ids):,}개)")
+
+    def __len__(self) -> int:
+        self._load()
+        return len(self._ids_by_idx)
+
+    def encode(self, ids: Sequence[str]) -> np.ndarray:
+        """
+        문자열 ID → idx (없는 ID는 -1)
+
+        Args:
+            ids: 문자열 ID 리스트
+
+        Returns:
+            int32 배열
+        """
+        self._load()
+        out = np.full(len(ids), -1, dtype=np.int32)
+        if len(ids) == 0 or len(self._sorted_ids) == 0:
+            return out
+
+        width = self._sorted_ids.dtype.itemsize
+        raw = [str(i).encode() for i in ids]
+        # 사전 폭보다 긴 ID는 잘려서 오탐될 수 있으므로 제외
+        valid = np.array([len(r) <= width for r in raw], dtype=bool)
+        keys = np.array(raw, dtype=self._sorted_ids.dtype)
+
+        pos = np.searchsorted(self._sorted_ids, keys)
+        pos_clipped = np.minimum(pos, len(self._sorted_ids) - 1)
+        found = valid & (pos < len(self._sorted_ids)) & (self._sorted_ids[pos_clipped] == keys)
+        out[found] = self._sorted_idx[pos_clipped[found]]
+        return out
+
+    def encode_one(self, id_: str) -> Optional[int]:
+        """문자열 ID 1개 → idx (없으면 None)"""
+        idx = int(self.encode([id_])[0])
+        return idx if idx >= 0 else None
+
+    def decode(self, idxs: Sequence[int]) -> List[str]:
+        """
+        idx → 문자열 ID
+
+        Args:
+            idxs: idx 리스트
+
+        Returns:
+            문자열 ID 리스트
+        """
+        self._load()
+        if len(idxs) == 0:
+            return []
+        arr = np.asarray(idxs, dtype=np.int64)
+        if arr.min() < 0 or arr.max() >= len(self._ids_by_idx):
+            raise KeyError(f"사전 범위를 벗어난 idx가 있습니다: {self.path}")
+        return [b.decode() for b in self._ids_by_idx[arr]]
+
+
+class IdMapper:
+    """customer / article 사전 묶음 (API 경계에서 사용)"""
+
+    def __init__(self, dictionary_dir: str = 'data/processed/dictionaries'):
+        """
+        초기화
+
+        Args:
+            dictionary_dir: 사전 Parquet 디렉토리
+        """
+        self.dictionary_dir = Path(dictionary_dir)
+        self.customers = IdDictionary(
+            str(self.dictionary_dir / CUSTOMER_DICTIONARY), 'customer_id', 'customer_idx'
+        )
+        self.articles = IdDictionary(
+            str(self.dictionary_dir / ARTICLE_DICTIONARY), 'article_id', 'article_idx'
+        )
+
+
+def build_id_dictionaries(con: duckdb.DuckDBPyConnection,
+                          dictionary_dir: Path,
+                          customer_sources: List[str],
+                          article_sources: List[str]) -> Dict[str, int]:
+    """
+    ID 사전 생성 (idx = 문자열 ID 정렬 순서)
+
+    Args:
+        con: DuckDB 연결
+        dictionary_dir: 출력 디렉토리
+        customer_sources: customer_id 컬럼을 가진 SQL 소스 목록 (FROM 절)
+        article_sources: article_id 컬럼을 가진 SQL 소스 목록 (FROM 절)
+
+    Returns:
+        {'customers': 개수, 'articles': 개수}
+    """
+    dictionary_dir.mkdir(parents=True, exist_ok=True)
+    counts = {}
+
+    for name, id_column, idx_column, sources, file_name in [
+        ('customers', 'customer_id', 'customer_idx', customer_sources, CUSTOMER_DICTIONARY),
+        ('articles', 'article_id', 'article_idx', article_sources, ARTICLE_DICTIONARY),
+    ]:
+        union = "\nUNION\n".join(f"SELECT {id_column} FROM {src}" for src in sources)
+        target = dictionary_dir / file_name
+        tmp_target = dictionary_dir / f'{file_name}.tmp'
+        con.execute(f"""
+            COPY (
+                SELECT
+                    (ROW_NUMBER() OVER (ORDER BY {id_column}) - 1)::INTEGER AS {idx_column},
+                    {id_column}
+                FROM ({union})
+                WHERE {id_column} IS NOT NULL
+                ORDER BY {idx_column}
+            ) TO '{tmp_target}' (FORMAT PARQUET, COMPRESSION ZSTD)
+        """)
+        tmp_target.replace(target)
+        counts[name] = con.execute(f"SELECT COUNT(*) FROM read_parquet('{target}')").fetchone()[0]
+        logger.info(f"✓ {target} 저장 완료 ({counts[name]:,}개)")
+
+    return counts
@@ -0,0 +1,583 @@
+"""
+Incremental Feature Update Module
+
+유저 / 상품 Feature를 전체 재계산 없이 일(day) 단위 delta로 갱신합니다.
+
+일별 부분 집계(additive partial aggregate)와 window 상태를 함께 유지합니다:
+
+    data/features/incremental/
+    ├── daily/t_dat=YYYY-MM-DD/*.parquet   # 일별 부분 집계 (customer, article, hour) → cnt, sum_price
+    └── state/
+        ├── _state.json                    # 기준일, window 길이, 반영한 파티션 row 수
+        ├── user_state.parquet             # 유저 window 합계 (count, price/hour 합, unique 수, 구매일 목록)
+        ├── item_state.parquet             # 상품 window 합계 (count, price 합, unique 수, 마지막 판매일)
+        ├── item_hours.parquet             # 상품 시간대 히스토그램 (peak_hour)
+        └── pairs.parquet                  # (유저, 상품) window별 구매 수 (unique 수 증감 판단)
+
+갱신 시에는 새로 추가된 날짜의 파티션만 읽어 일별 부분 집계를 만들고(+),
+window에서 빠지는 날짜는 저장해 둔 일별 부분 집계로 빼서(-) 상태에 반영합니다.
+따라서 트랜잭션 읽기량은 전체 이력이나 window 크기가 아니라 delta에 비례합니다.
+
+출력 컬럼은 FeatureBuilder / 두 Generator와 동일합니다.
+(peak_hour 동률은 가장 이른 시간대를 선택, avg_* 는 부동소수 합산 순서 차이만 있음)
+"""
+
+import duckdb
+import json
+import shutil
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+import logging
+
+from .feature_builder import GLOBAL_STATS_FILE, global_feature_stats, write_feature_outputs
+from .feature_snapshot import snapshot_dir
+from .item_features import item_feature_columns
+from .transaction_store import TransactionStore
+from .user_features import PURCHASE_HOUR_SQL, user_feature_columns
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+INCREMENTAL_DIR = 'incremental'
+STATE_FILE = '_state.json'
+
+# 상태 테이블 스키마 (최초 빌드 시 빈 테이블로 생성)
+STATE_TABLES: Dict[str, str] = {
+    'user_state': """
+        customer_idx INTEGER, purchase_count BIGINT, sum_price DOUBLE,
+        sum_hour BIGINT, unique_items BIGINT, purchase_days DATE[]
+    """,
+    'item_state': """
+        article_idx INTEGER, sales_count BIGINT, sum_price DOUBLE,
+        unique_customers BIGINT, last_sold_date DATE
+    """,
+    'item_hours': "article_idx INTEGER, purchase_hour BIGINT, cnt BIGINT",
+    'pairs': "customer_idx INTEGER, article_idx INTEGER, user_cnt BIGINT, item_cnt BIGINT",
+}
+
+
+class IncrementalFeatureUpdater:
+    """일 단위 delta 기반 Feature 증분 갱신 클래스"""
+
+    def __init__(self,
+                 db_path: str = 'local_helix.db',
+                 transactions_path: str = 'data/processed/transactions',
+                 features_dir: str = 'data/features',
+                 user_lookback_days: int = 28,
+                 item_lookback_days: int = 7):
+        """
+        초기화
+
+        Args:
+            db_path: DuckDB 데이터베이스 경로
+            transactions_path: 주 단위 파티션 트랜잭션 저장소
+            features_dir: Feature 출력 디렉토리 (상태는 하위 incremental/에 저장)
+            user_lookback_days: 유저 Feature 계산 기간 (일)
+            item_lookback_days: 상품 Feature 계산 기간 (일)
+        """
+        self.db_path = db_path
+        self.transactions_path = transactions_path
+        self.features_dir = Path(features_dir)
+        self.user_lookback_days = int(user_lookback_days)
+        self.item_lookback_days = int(item_lookback_days)
+        self.incremental_dir = self.features_dir / INCREMENTAL_DIR
+        self.daily_dir = self.incremental_dir / 'daily'
+        self.state_dir = self.incremental_dir / 'state'
+        self.con: Optional[duckdb.DuckDBPyConnection] = None
+
+    def connect(self):
+        """DuckDB 연결"""
+        if self.con is None:
+            self.con = duckdb.connect(self.db_path)
+            self.con.execute("SET memory_limit='8GB'")
+            self.con.execute("SET threads TO 4")
+        return self.con
+
+    # ------------------------------------------------------------------
+    # 상태 로드 / 검증
+    # ------------------------------------------------------------------
+
+    def _load_state(self, store: TransactionStore) -> Optional[Dict[str, Any]]:
+        """
+        저장된 상태 로드 (재사용할 수 없으면 None → 전체 빌드)
+
+        window 길이가 바뀌었거나, 이미 반영한 파티션의 row 수가 달라졌으면
+        (재수집 등) 상태를 버리고 처음부터 다시 만듭니다.
+        """
+        state_path = self.state_dir / STATE_FILE
+        if not state_path.exists():
+            return None
+
+        with open(state_path, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+
+        if (state['user_lookback_days'] != self.user_lookback_days
+                or state['item_lookback_days'] != self.item_lookback_days):
+            logger.info("window 길이가 변경되어 증분 상태를 다시 만듭니다.")
+            return None
+
+        if store.max_date() < date.fromisoformat(state['max_date']):
+            logger.info("트랜잭션 저장소의 최대 날짜가 상태보다 이전입니다. 증분 상태를 다시 만듭니다.")
+            return None
+
+        # 마지막 주(이후 날짜가 추가될 수 있음)를 제외한 반영 파티션은 row 수가 같아야 함
+        current = store.metadata()['partitions']
+        applied = state['partitions']
+        last_week = max(applied) if applied else None
+        for week, rows in applied.items():
+            if week == last_week:
+                changed = current.get(week, 0) < rows
+            else:
+                changed = current.get(week) != rows
+            if changed:
+                logger.info(f"이미 반영한 파티션이 변경되었습니다 (week={week}). 증분 상태를 다시 만듭니다.")
+                return None
+
+        return state
+
+    def _create_state_tables(self, state: Optional[Dict[str, Any]]) -> None:
+        """상태 Parquet → TEMP 테이블 (상태가 없으면 빈 테이블)"""
+        con = self.connect()
+        for name, schema in STATE_TABLES.items():
+            path = self.state_dir / f'{name}.parquet'
+            if state is not None and path.exists():
+                con.execute(f"CREATE OR REPLACE TEMP TABLE {name} AS SELECT * FROM read_parquet('{path}')")
+            else:
+                con.execute(f"CREATE OR REPLACE TEMP TABLE {name} ({schema})")
+
+    # ------------------------------------------------------------------
+    # 일별 부분 집계
+    # ------------------------------------------------------------------
+
+    def _daily_partitions(self) -> Dict[date, Path]:
+        """저장된 일별 부분 집계 디렉토리 {날짜: 경로}"""
+        if not self.daily_dir.exists():
+            return {}
+        return {
+            date.fromisoformat(d.name.split('=', 1)[1]): d
+            for d in self.daily_dir.iterdir()
+            if d.is_dir() and d.name.startswith('t_dat=')
+        }
+
+    def _build_new_daily(self, store: TransactionStore, scan_start: date) -> int:
+        """scan_start 이후 새 날짜의 트랜잭션만 읽어 일별 부분 집계 생성 및 저장"""
+        con = self.connect()
+        con.execute(f"""
+            CREATE OR REPLACE TEMP TABLE new_daily AS
+            SELECT
+                t_dat,
+                customer_idx,
+                article_idx,
+                {PURCHASE_HOUR_SQL} as purchase_hour,
+                COUNT(*) as cnt,
+                SUM(price) as sum_price
+            FROM {store.scan_sql(scan_start)}
+            GROUP BY ALL
+        """)
+
+        # 이전 실행이 중간에 실패해 남은 같은 날짜 디렉토리 제거 후 저장
+        for day, path in self._daily_partitions().items():
+            if day >= scan_start:
+                shutil.rmtree(path)
+        self.daily_dir.mkdir(parents=True, exist_ok=True)
+        con.execute(f"""
+            COPY new_daily TO '{self.daily_dir}'
+            (FORMAT PARQUET, PARTITION_BY (t_dat), OVERWRITE_OR_IGNORE true)
+        """)
+        return con.execute("SELECT COALESCE(SUM(cnt), 0) FROM new_daily").fetchone()[0]
+
+    def _expired_daily_sql(self, start: date, end: date) -> Optional[str]:
+        """[start, end] 구간의 저장된 일별 부분 집계 SQL (없으면 None)"""
+        files = [
+            str(path / '*.parquet')
+            for day, path in sorted(self._daily_partitions().items())
+            if start <= day <= end
+        ]
+        if not files:
+            return None
+        file_list = ", ".join(f"'{f}'" for f in files)
+        return f"""
+            SELECT t_dat::DATE as t_dat, customer_idx, article_idx, purchase_hour, cnt, sum_price
+            FROM read_parquet([{file_list}], hive_partitioning=true)
+        """
+
+    # ------------------------------------------------------------------
+    # 상태 병합
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _membership_sql(start: date, end: Optional[date]) -> str:
+        """t_dat이 [start, end] window에 속하면 1, 아니면 0"""
+        if end is None:
+            return "0"
+        return f"(t_dat BETWEEN DATE '{start.isoformat()}' AND DATE '{end.isoformat()}')::INTEGER"
+
+    def _replace_table(self, name: str, query: str) -> None:
+        """query 결과로 TEMP 테이블 교체 (자기 자신을 참조하는 병합용)"""
+        con = self.connect()
+        con.execute(f"CREATE OR REPLACE TEMP TABLE {name}_next AS {query}")
+        con.execute(f"DROP TABLE {name}")
+        con.execute(f"ALTER TABLE {name}_next RENAME TO {name}")
+
+    def _merge_delta(self, user_start: date) -> None:
+        """
+        feature_delta(부호 포함 일별 부분 집계)를 상태 테이블에 병합
+
+        변경된 key만 UPDATE / INSERT / DELETE 하므로 병합 비용은 delta 크기에 비례합니다.
+        unique_items / unique_customers는 (유저, 상품) 구매 수가 0 ↔ 양수로 바뀐 쌍의 수로 갱신합니다.
+        """
+        con = self.connect()
+
+        # (유저, 상품) 쌍: 변경 전/후 구매 수
+        con.execute("""
+            CREATE OR REPLACE TEMP TABLE pair_changes AS
+            SELECT
+                d.customer_idx,
+                d.article_idx,
+                COALESCE(s.user_cnt, 0) as old_user,
+                COALESCE(s.user_cnt, 0) + d.d_user as new_user,
+                COALESCE(s.item_cnt, 0) as old_item,
+                COALESCE(s.item_cnt, 0) + d.d_item as new_item
+            FROM (
+                SELECT
+                    customer_idx,
+                    article_idx,
+                    SUM(user_sign * cnt) as d_user,
+                    SUM(item_sign * cnt) as d_item
+                FROM feature_delta
+                GROUP BY customer_idx, article_idx
+            ) d
+            LEFT JOIN pairs s
+              ON s.customer_idx = d.customer_idx AND s.article_idx = d.article_idx
+        """)
+        con.execute("""
+            DELETE FROM pairs
+            USING pair_changes c
+            WHERE pairs.customer_idx = c.customer_idx AND pairs.article_idx = c.article_idx
+        """)
+        con.execute("""
+            INSERT INTO pairs
+            SELECT customer_idx, article_idx, new_user, new_item
+            FROM pair_changes
+            WHERE new_user > 0 OR new_item > 0
+        """)
+
+        # 유저 window 합계
+        con.execute(f"""
+            CREATE OR REPLACE TEMP TABLE user_delta AS
+            WITH d AS (
+                SELECT
+                    customer_idx,
+                    SUM(user_sign * cnt) as d_count,
+                    SUM(user_sign * sum_price) as d_price,
+                    SUM(user_sign * cnt * purchase_hour) as d_hour,
+                    LIST(DISTINCT t_dat) FILTER (WHERE user_sign > 0) as d_days
+                FROM feature_delta
+                WHERE user_sign <> 0
+                GROUP BY customer_idx
+            ),
+            u AS (
+                SELECT
+                    customer_idx,
+                    SUM((new_user > 0)::INTEGER - (old_user > 0)::INTEGER) as d_unique
+                FROM pair_changes
+                GROUP BY customer_idx
+            )
+            SELECT d.*, COALESCE(u.d_unique, 0) as d_unique
+            FROM d
+            LEFT JOIN u ON d.customer_idx = u.customer_idx
+        """)
+        con.execute(f"""
+            UPDATE user_state
+            SET purchase_count = purchase_count + d.d_count,
+                sum_price = sum_price + d.d_price,
+                sum_hour = sum_hour + d.d_hour,
+                unique_items = unique_items + d.d_unique,
+                purchase_days = list_sort(list_distinct(list_concat(
+                    list_filter(purchase_days, x -> x >= DATE '{user_start.isoformat()}'),
+                    COALESCE(d.d_days, []::DATE[])
+                )))
+            FROM user_delta d
+            WHERE user_state.customer_idx = d.customer_idx
+        """)
+        con.execute("""
+            INSERT INTO user_state
+            SELECT d.customer_idx, d.d_count, d.d_price, d.d_hour, d.d_unique, list_sort(d.d_days)
+            FROM user_delta d
+            ANTI JOIN user_state s ON s.customer_idx = d.customer_idx
+        """)
+        con.execute("DELETE FROM user_state WHERE purchase_count <= 0")
+
+        # 상품 window 합계
+        # (남은 거래일은 모두 만료일 이후이므로 마지막 판매일은 추가분으로만 갱신됨)
+        con.execute("""
+            CREATE OR REPLACE TEMP TABLE item_delta AS
+            WITH d AS (
+                SELECT
+                    article_idx,
+                    SUM(item_sign * cnt) as d_count,
+                    SUM(item_sign * sum_price) as d_price,
+                    MAX(t_dat) FILTER (WHERE item_sign > 0) as d_last
+                FROM feature_delta
+                WHERE item_sign <> 0
+                GROUP BY article_idx
+            ),
+            u AS (
+                SELECT
+                    article_idx,
+                    SUM((new_item > 0)::INTEGER - (old_item > 0)::INTEGER) as d_unique
+                FROM pair_changes
+                GROUP BY article_idx
+            )
+            SELECT d.*, COALESCE(u.d_unique, 0) as d_unique
+            FROM d
+            LEFT JOIN u ON d.article_idx = u.article_idx
+        """)
+        con.execute("""
+            UPDATE item_state
+            SET sales_count = sales_count + d.d_count,
+                sum_price = sum_price + d.d_price,
+                unique_customers = unique_customers + d.d_unique,
+                last_sold_date = GREATEST(last_sold_date, d.d_last)
+            FROM item_delta d
+            WHERE item_state.article_idx = d.article_idx
+        """)
+        con.execute("""
+            INSERT INTO item_state
+            SELECT d.article_idx, d.d_count, d.d_price, d.d_unique, d.d_last
+            FROM item_delta d
+            ANTI JOIN item_state s ON s.article_idx = d.article_idx
+        """)
+        con.execute("DELETE FROM item_state WHERE sales_count <= 0")
+
+        # 상품 시간대 히스토그램 (상품 수 x 24 이하의 작은 테이블이므로 교체)
+        self._replace_table('item_hours', """
+            WITH d AS (
+                SELECT article_idx, purchase_hour, SUM(item_sign * cnt) as d_count
+                FROM feature_delta
+                WHERE item_sign <> 0
+                GROUP BY article_idx, purchase_hour
+            )
+            SELECT * FROM (
+                SELECT
+                    COALESCE(s.article_idx, d.article_idx) as article_idx,
+                    COALESCE(s.purchase_hour, d.purchase_hour) as purchase_hour,
+                    (COALESCE(s.cnt, 0) + COALESCE(d.d_count, 0))::BIGINT as cnt
+                FROM item_hours s
+                FULL OUTER JOIN d
+                  ON s.article_idx = d.article_idx AND s.purchase_hour = d.purchase_hour
+            )
+            WHERE cnt > 0
+        """)
+
+        for name in ('pair_changes', 'user_delta', 'item_delta'):
+            con.execute(f"DROP TABLE {name}")
+
+    def _build_feature_tables(self, max_date: date) -> None:
+        """상태 테이블 → user_features / item_features (Generator와 같은 최종 컬럼)"""
+        con = self.connect()
+        user_columns = ",\n            ".join(["customer_idx"] + user_feature_columns(max_date))
+        con.execute(f"""
+        CREATE OR REPLACE TABLE user_features AS
+        WITH user_stats AS (
+            SELECT
+                customer_idx,
+                sum_hour / purchase_count as avg_purchase_hour,
+                purchase_count,
+                unique_items,
+                sum_price / purchase_count as avg_price,
+                purchase_days[-1] as last_purchase_date,
+                purchase_days[1] as first_purchase_date
+            FROM user_state
+        )
+        SELECT
+            {user_columns}
+        FROM user_stats
+        ORDER BY customer_idx
+        """)
+
+        item_columns = ",\n            ".join(["article_idx"] + item_feature_columns())
+        con.execute(f"""
+        CREATE OR REPLACE TABLE item_features AS
+        WITH peak AS (
+            SELECT article_idx, purchase_hour as peak_hour
+            FROM item_hours
+            QUALIFY ROW_NUMBER() OVER (
+                PARTITION BY article_idx ORDER BY cnt DESC, purchase_hour ASC
+            ) = 1
+        ),
+        item_stats AS (
+            SELECT
+                s.article_idx,
+                s.sales_count,
+                s.unique_customers,
+                s.sum_price / s.sales_count as avg_price,
+                pk.peak_hour,
+                s.last_sold_date
+            FROM item_state s
+            LEFT JOIN peak pk ON s.article_idx = pk.article_idx
+        )
+        SELECT
+            {item_columns}
+        FROM item_stats
+        ORDER BY popularity_rank
+        """)
+
+    def _save_state(self, store: TransactionStore, max_date: date,
+                    user_start: date, item_start: date) -> None:
+        """상태 테이블 + _state.json 저장 (임시 디렉토리에 쓴 뒤 교체)"""
+        con = self.connect()
+        tmp_dir = self.incremental_dir / 'state.tmp'
+        if tmp_dir.exists():
+            shutil.rmtree(tmp_dir)
+        tmp_dir.mkdir(parents=True)
+
+        for name in STATE_TABLES:
+            con.execute(f"COPY {name} TO '{tmp_dir / f'{name}.parquet'}' (FORMAT PARQUET)")
+
+        state = {
+            'max_date': max_date.isoformat(),
+            'user_lookback_days': self.user_lookback_days,
+            'item_lookback_days': self.item_lookback_days,
+            'user_window_start': user_start.isoformat(),
+            'item_window_start': item_start.isoformat(),
+            'partitions': {
+                week: rows
+                for week, rows in store.metadata()['partitions'].items()
+                if date.fromisoformat(week) <= max_date
+            },
+        }
+        with open(tmp_dir / STATE_FILE, 'w', encoding='utf-8') as f:
+            json.dump(state, f, indent=2)
+
+        if self.state_dir.exists():
+            shutil.rmtree(self.state_dir)
+        tmp_dir.rename(self.state_dir)
+
+        # window 밖으로 나간 일별 부분 집계 정리
+        keep_from = min(user_start, item_start)
+        for day, path in self._daily_partitions().items():
+            if day < keep_from:
+                shutil.rmtree(path)
+
+    # ------------------------------------------------------------------
+    # 갱신
+    # ------------------------------------------------------------------
+
+    def update(self, force_rebuild: bool = False) -> Dict[str, str]:
+        """
+        Feature 증분 갱신 (상태가 없거나 재사용할 수 없으면 전체 빌드)
+
+        Args:
+            force_rebuild: True면 저장된 상태를 무시하고 처음부터 빌드
+
+        Returns:
+            {'users': path, 'items': path, 'stats': path}
+        """
+        con = self.connect()
+        store = TransactionStore(self.transactions_path)
+        max_date = store.max_date()
+        user_start = max_date - timedelta(days=self.user_lookback_days)
+        item_start = max_date - timedelta(days=self.item_lookback_days)
+
+        state = None if force_rebuild else self._load_state(store)
+        if state is not None:
+            old_max: Optional[date] = date.fromisoformat(state['max_date'])
+            old_user_start = date.fromisoformat(state['user_window_start'])
+            old_item_start = date.fromisoformat(state['item_window_start'])
+            current_dir = snapshot_dir(str(self.features_dir))
+            if old_max == max_date and (current_dir / 'user_features.parquet').exists():
+                logger.info(f"✓ Feature 최신 상태 (기준일 {max_date}, 갱신 생략)")
+                return {
+                    'users': str(current_dir / 'user_features.parquet'),
+                    'items': str(current_dir / 'item_features.parquet'),
+                    'stats': str(current_dir / GLOBAL_STATS_FILE),
+                }
+            logger.info(f"Feature 증분 갱신 시작: {old_max} → {max_date}")
+        else:
+            old_max = None
+            old_user_start = old_item_start = user_start
+            logger.info(f"Feature 증분 상태 초기 빌드 시작 (기준일 {max_date})")
+
+        self._create_state_tables(state)
+
+        # (+) 새 날짜: 이전 기준일 이후 파티션만 스캔
+        window_start = min(user_start, item_start)
+        scan_start = window_start if old_max is None else max(old_max + timedelta(days=1), window_start)
+        sources: List[str] = []
+        added_rows = 0
+        if scan_start <= max_date:
+            added_rows = self._build_new_daily(store, scan_start)
+            sources.append("SELECT * FROM new_daily")
+
+        # (-) window에서 빠지는 날짜: 저장된 일별 부분 집계에서 읽음
+        if old_max is not None:
+            expired_sql = self._expired_daily_sql(
+                min(old_user_start, old_item_start),
+                min(old_max, max(user_start, item_start) - timedelta(days=1)),
+            )
+            if expired_sql is not None:
+                sources.append(expired_sql)
+
+        if sources:
+            union = "\nUNION ALL\n".join(f"({s})" for s in sources)
+            con.execute(f"""
+                CREATE OR REPLACE TEMP TABLE feature_delta AS
+                SELECT * FROM (
+                    SELECT
+                        *,
+                        {self._membership_sql(user_start, max_date)}
+                            - {self._membership_sql(old_user_start, old_max)} as user_sign,
+                        {self._membership_sql(item_start, max_date)}
+                            - {self._membership_sql(old_item_start, old_max)} as item_sign
+                    FROM ({union})
+                )
+                WHERE user_sign <> 0 OR item_sign <> 0
+            """)
+            delta_rows = con.execute("SELECT COUNT(*) FROM feature_delta").fetchone()[0]
+            logger.info(f"delta 반영: 새 트랜잭션 {added_rows:,}건, 부분 집계 {delta_rows:,} rows")
+            self._merge_delta(user_start)
+            con.execute("DROP TABLE feature_delta")
+
+        self._build_feature_tables(max_date)
+        stats = global_feature_stats(con)
+        stats.update({
+            'max_date': max_date.isoformat(),
+            'user_window_start': user_start.isoformat(),
+            'item_window_start': item_start.isoformat(),
+        })
+        outputs = write_feature_outputs(con, str(self.features_dir), stats)
+        self._save_state(store, max_date, user_start, item_start)
+
+        logger.info("=" * 60)
+        logger.info("Feature 증분 갱신 완료!")
+        logger.info(f"총 유저 수: {stats['total_users']:,} / 총 상품 수: {stats['total_items']:,}")
+        logger.info("=" * 60)
+        return outputs
+
+    def close(self):
+        """연결 종료"""
+        if self.con is not None:
+            self.con.close()
+            self.con = None
+
+
+def main():
+    """메인 실행 함수"""
+    updater = IncrementalFeatureUpdater()
+
+    try:
+        outputs = updater.update()
+        for name, path in outputs.items():
+            logger.info(f"✓ {name}: {path}")
+    except Exception as e:
+        logger.error(f"✗ 에러 발생: {str(e)}")
+        raise
+    finally:
+        updater.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,314 @@
+"""
+Raw Data Ingestion Module
+
+H&M 원본 CSV(transactions / customers / articles)를 타입이 고정된
+ZSTD 압축 Parquet로 1회 변환합니다.
+이후 모든 모듈은 CSV 대신 Parquet를 읽으므로 CSV 스니핑/파싱이 반복되지 않습니다.
+
+트랜잭션은 주(week) 단위 Hive 파티션으로 저장하며, customer_id / article_id 대신
+int32 surrogate key(customer_idx / article_idx)를 저장합니다 (id_mapping.py 참조).
+"""
+
+import duckdb
+import shutil
+from pathlib import Path
+from typing import Dict, Optional
+import logging
+
+from .id_mapping import (
+    ARTICLE_DICTIONARY,
+    CUSTOMER_DICTIONARY,
+    build_id_dictionaries,
+)
+from .transaction_store import METADATA_FILE, PARTITION_COLUMN, write_metadata
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+# 명시적 스키마 (read_csv_auto 스니핑 대신 사용)
+# article_id / product_code는 선행 0이 있으므로 반드시 VARCHAR
+TRANSACTIONS_SCHEMA: Dict[str, str] = {
+    't_dat': 'DATE',
+    'customer_id': 'VARCHAR',
+    'article_id': 'VARCHAR',
+    'price': 'DOUBLE',
+    'sales_channel_id': 'TINYINT',
+}
+
+CUSTOMERS_SCHEMA: Dict[str, str] = {
+    'customer_id': 'VARCHAR',
+    'FN': 'DOUBLE',
+    'Active': 'DOUBLE',
+    'club_member_status': 'VARCHAR',
+    'fashion_news_frequency': 'VARCHAR',
+    'age': 'SMALLINT',
+    'postal_code': 'VARCHAR',
+}
+
+ARTICLES_SCHEMA: Dict[str, str] = {
+    'article_id': 'VARCHAR',
+    'product_code': 'VARCHAR',
+    'prod_name': 'VARCHAR',
+    'product_type_no': 'INTEGER',
+    'product_type_name': 'VARCHAR',
+    'product_group_name': 'VARCHAR',
+    'graphical_appearance_no': 'INTEGER',
+    'graphical_appearance_name': 'VARCHAR',
+    'colour_group_code': 'INTEGER',
+    'colour_group_name': 'VARCHAR',
+    'perceived_colour_value_id': 'INTEGER',
+    'perceived_colour_value_name': 'VARCHAR',
+    'perceived_colour_master_id': 'INTEGER',
+    'perceived_colour_master_name': 'VARCHAR',
+    'department_no': 'INTEGER',
+    'department_name': 'VARCHAR',
+    'index_code': 'VARCHAR',
+    'index_name': 'VARCHAR',
+    'index_group_no': 'INTEGER',
+    'index_group_name': 'VARCHAR',
+    'section_no': 'INTEGER',
+    'section_name': 'VARCHAR',
+    'garment_group_no': 'INTEGER',
+    'garment_group_name': 'VARCHAR',
+    'detail_desc': 'VARCHAR',
+}
+
+
+class RawDataIngestor:
+    """원본 CSV → Parquet 변환 클래스"""
+
+    def __init__(self,
+                 raw_dir: str = 'data/raw',
+                 processed_dir: str = 'data/processed',
+                 db_path: str = ':memory:'):
+        """
+        초기화
+
+        Args:
+            raw_dir: 원본 CSV 디렉토리
+            processed_dir: 변환된 Parquet 저장 디렉토리
+            db_path: DuckDB 데이터베이스 경로
+        """
+        self.raw_dir = Path(raw_dir)
+        self.processed_dir = Path(processed_dir)
+        self.dictionary_dir = self.processed_dir / 'dictionaries'
+        self.db_path = db_path
+        self.con: Optional[duckdb.DuckDBPyConnection] = None
+
+    def connect(self):
+        """DuckDB 연결"""
+        if self.con is None:
+            self.con = duckdb.connect(self.db_path)
+            self.con.execute("SET memory_limit='8GB'")
+            self.con.execute("SET threads TO 4")
+            self.con.execute("SET preserve_insertion_order=false")
+        return self.con
+
+    @staticmethod
+    def _columns_sql(schema: Dict[str, str]) -> str:
+        """read_csv columns 인자 문자열 생성"""
+        items = ", ".join(f"'{name}': '{dtype}'" for name, dtype in schema.items())
+        return "{" + items + "}"
+
+    @staticmethod
+    def _is_up_to_date(source: Path, target: Path) -> bool:
+        """target이 존재하고 source보다 최신이면 True (원본 CSV가 삭제된 경우 포함)"""
+        if not target.exists():
+            return False
+        return not source.exists() or target.stat().st_mtime >= source.stat().st_mtime
+
+    def _convert(self,
+                 name: str,
+                 schema: Dict[str, str],
+                 force: bool = False) -> str:
+        """
+        CSV 1개를 Parquet로 변환
+
+        Args:
+            name: 파일 이름 (확장자 제외)
+            schema: 컬럼 스키마
+            force: True면 기존 Parquet가 있어도 다시 변환
+
+        Returns:
+            출력 Parquet 경로
+        """
+        source = self.raw_dir / f'{name}.csv'
+        target = self.processed_dir / f'{name}.parquet'
+
+        if not force and self._is_up_to_date(source, target):
+            logger.info(f"✓ {target} 최신 상태 (변환 생략)")
+            return str(target)
+
+        if not source.exists():
+            raise FileNotFoundError(f"원본 CSV가 없습니다: {source}")
+
+        logger.info(f"{source} → {target} 변환 중...")
+        target.parent.mkdir(parents=True, exist_ok=True)
+
+        con = self.connect()
+        tmp_target = target.with_suffix('.parquet.tmp')
+        con.execute(f"""
+            COPY (
+                SELECT *
+                FROM read_csv('{source}',
+                              header=true,
+                              auto_detect=false,
+                              quote='"',
+                              escape='"',
+                              columns={self._columns_sql(schema)})
+            ) TO '{tmp_target}' (FORMAT PARQUET, COMPRESSION ZSTD)
+        """)
+        tmp_target.replace(target)
+
+        row_count = con.execute(
+            f"SELECT COUNT(*) FROM read_parquet('{target}')"
+        ).fetchone()[0]
+        logger.info(f"✓ {target} 저장 완료 ({row_count:,} rows)")
+        return str(target)
+
+    def _dictionaries_exist(self) -> bool:
+        return all(
+            (self.dictionary_dir / name).exists()
+            for name in (CUSTOMER_DICTIONARY, ARTICLE_DICTIONARY)
+        )
+
+    def ingest_transactions(self, force: bool = False) -> str:
+        """
+        transactions_train.csv → transactions/week=YYYY-MM-DD/*.parquet
+
+        주 단위 파티션과 전역 min/max 날짜 메타데이터(_metadata.json)를 함께 작성합니다.
+        customer/article ID 사전을 먼저 생성하고, 파티션에는 int32 idx만 저장합니다.
+        (customers / articles Parquet가 있으면 해당 ID도 사전에 포함)
+
+        Args:
+            force: True면 기존 파티션이 있어도 다시 변환
+
+        Returns:
+            파티션 루트 디렉토리 경로
+        """
+        source = self.raw_dir / 'transactions_train.csv'
+        target = self.processed_dir / 'transactions'
+
+        if (not force
+                and self._dictionaries_exist()
+                and self._is_up_to_date(source, target / METADATA_FILE)):
+            logger.info(f"✓ {target} 최신 상태 (변환 생략)")
+            return str(target)
+
+        if not source.exists():
+            raise FileNotFoundError(f"원본 CSV가 없습니다: {source}")
+
+        logger.info(f"{source} → {target} (주 단위 파티션) 변환 중...")
+        tmp_target = self.processed_dir / 'transactions.tmp'
+        if tmp_target.exists():
+            shutil.rmtree(tmp_target)
+        tmp_target.parent.mkdir(parents=True, exist_ok=True)
+
+        con = self.connect()
+
+        # CSV는 1회만 파싱 (사전 생성 + 파티션 쓰기에 재사용)
+        con.execute(f"""
+            CREATE OR REPLACE TEMP TABLE raw_transactions AS
+            SELECT *
+            FROM read_csv('{source}',
+                          header=true,
+                          auto_detect=false,
+                          quote='"',
+                          escape='"',
+                          columns={self._columns_sql(TRANSACTIONS_SCHEMA)})
+        """)
+
+        # ID 사전 생성 (customers / articles 메타데이터 + 트랜잭션에 등장한 ID)
+        customer_sources = ['raw_transactions']
+        article_sources = ['raw_transactions']
+        customers_path = self.processed_dir / 'customers.parquet'
+        articles_path = self.processed_dir / 'articles.parquet'
+        if customers_path.exists():
+            customer_sources.append(f"read_parquet('{customers_path}')")
+        if articles_path.exists():
+            article_sources.append(f"read_parquet('{articles_path}')")
+        build_id_dictionaries(con, self.dictionary_dir, customer_sources, article_sources)
+
+        con.execute(f"""
+            COPY (
+                SELECT
+                    t.t_dat,
+                    c.customer_idx,
+                    a.article_idx,
+                    t.price,
+                    t.sales_channel_id,
+                    DATE_TRUNC('week', t.t_dat)::DATE AS {PARTITION_COLUMN}
+                FROM raw_transactions t
+                JOIN read_parquet('{self.dictionary_dir / CUSTOMER_DICTIONARY}') c
+                  ON c.customer_id = t.customer_id
+                JOIN read_parquet('{self.dictionary_dir / ARTICLE_DICTIONARY}') a
+                  ON a.article_id = t.article_id
+            ) TO '{tmp_target}' (FORMAT PARQUET, COMPRESSION ZSTD, PARTITION_BY ({PARTITION_COLUMN}))
+        """)
+        con.execute("DROP TABLE raw_transactions")
+        metadata = write_metadata(con, tmp_target)
+
+        if target.exists():
+            shutil.rmtree(target)
+        tmp_target.rename(target)
+
+        logger.info(
+            f"✓ {target} 저장 완료 ({metadata['row_count']:,} rows, "
+            f"{len(metadata['partitions'])} partitions, "
+            f"{metadata['min_date']} ~ {metadata['max_date']})"
+        )
+        return str(target)
+
+    def ingest_customers(self, force: bool = False) -> str:
+        """customers.csv → customers.parquet"""
+        return self._convert('customers', CUSTOMERS_SCHEMA, force)
+
+    def ingest_articles(self, force: bool = False) -> str:
+        """articles.csv → articles.parquet"""
+        return self._convert('articles', ARTICLES_SCHEMA, force)
+
+    def ingest_all(self, force: bool = False) -> Dict[str, str]:
+        """
+        3개 원본 파일 모두 변환
+        (ID 사전에 메타데이터 ID를 포함하기 위해 customers / articles를 먼저 변환)
+
+        Args:
+            force: True면 기존 Parquet가 있어도 다시 변환
+
+        Returns:
+            {'transactions': path, 'customers': path, 'articles': path}
+        """
+        customers = self.ingest_customers(force)
+        articles = self.ingest_articles(force)
+        transactions = self.ingest_transactions(force)
+        return {
+            'transactions': transactions,
+            'customers': customers,
+            'articles': articles,
+        }
+
+    def close(self):
+        """연결 종료"""
+        if self.con is not None:
+            self.con.close()
+            self.con = None
+
+
+def main():
+    """메인 실행 함수"""
+    ingestor = RawDataIngestor()
+
+    try:
+        outputs = ingestor.ingest_all()
+        for name, path in outputs.items():
+            logger.info(f"✓ {name}: {path}")
+    except Exception as e:
+        logger.error(f"✗ 에러 발생: {str(e)}")
+        raise
+    finally:
+        ingestor.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -5,14 +5,176 @@ Item Feature Generation Module
 """
 
 import duckdb
+from datetime import date
 from pathlib import Path
-from typing import Optional
+from typing import Dict, List, Optional, Sequence
 import logging
 
+from .feature_index import FEATURE_ROW_GROUP_SIZE
+from .transaction_store import TransactionStore
+from .user_features import PURCHASE_HOUR_SQL, window_band_sql, window_suffix
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+def item_window_aggregates(lookback_days: int, suffix: str = '') -> List[str]:
+    """
+    상품 단위 집계식 (band 부분 집계를 window에 포함되는 band만 합치는 FILTER 조건부 집계)
+
+    item_bands(상품 x band 부분 집계)를 입력으로 하며,
+    window마다 suffix를 달리해 같은 GROUP BY에서 계산합니다.
+
+    Args:
+        lookback_days: window 일수 (band <= lookback_days)
+        suffix: 컬럼명 접미사 (예: '_28d')
+    """
+    cond = f"FILTER (WHERE band <= {int(lookback_days)})"
+    return [
+        f"COALESCE(SUM(cnt) {cond}, 0)::BIGINT as sales_count{suffix}",
+        f"SUM(sum_price) {cond} / SUM(cnt) {cond} as avg_price{suffix}",
+        f"MAX(last_date) {cond} as last_sold_date{suffix}",
+    ]
+
+
+def item_unique_aggregates(lookback_days: int, suffix: str = '') -> List[str]:
+    """상품별 window 내 고유 구매 유저 수 (item_customer_bands 입력)"""
+    return [f"COUNT(*) FILTER (WHERE band <= {int(lookback_days)}) as unique_customers{suffix}"]
+
+
+def item_hour_aggregates(lookback_days: int, suffix: str = '') -> List[str]:
+    """(상품, 시간대)별 window 내 판매 수 (item_hour_bands 입력)"""
+    return [f"SUM(cnt) FILTER (WHERE band <= {int(lookback_days)})::BIGINT as hour_count{suffix}"]
+
+
+def item_peak_aggregates(suffix: str = '') -> List[str]:
+    """상품별 최다 판매 시간대 (동률이면 이른 시간대, item_hour_counts 입력)"""
+    return [
+        f"ARG_MAX(purchase_hour, hour_count{suffix} * 100 - purchase_hour) "
+        f"FILTER (WHERE hour_count{suffix} > 0) as peak_hour{suffix}"
+    ]
+
+
+def item_feature_columns(suffix: str = '') -> List[str]:
+    """상품 집계 결과 → 최종 상품 Feature 컬럼 (popularity_rank 포함, article_idx 제외)"""
+    return [
+        f"ROW_NUMBER() OVER (ORDER BY sales_count{suffix} DESC, article_idx ASC) as popularity_rank{suffix}",
+        f"sales_count{suffix}",
+        f"unique_customers{suffix}",
+        f"ROUND(avg_price{suffix}, 2) as avg_price{suffix}",
+        f"peak_hour{suffix}",
+        f"last_sold_date{suffix}",
+    ]
+
+
+def item_features_select(starts: Dict[int, date], primary_days: int, source: str) -> str:
+    """
+    여러 window의 상품 Feature를 1회 스캔으로 계산하는 SELECT 문
+
+    거래를 band(가장 짧은 포함 window)별로 한 번만 부분 집계한 뒤 window별 FILTER 집계로 합칩니다.
+    popularity_rank는 가장 넓은 window에 판매가 있는 상품 전체에서 매기므로
+    (판매 0인 상품은 뒤로 밀림) 각 window를 따로 계산한 순위와 같습니다.
+
+    상품(row) 범위는 기본 window에 판매가 있는 상품이며(기존 출력과 동일),
+    추가 window는 _{n}d 접미사 컬럼으로 뒤에 붙습니다.
+
+    Args:
+        starts: {window 일수: window 시작일} (primary_days 포함)
+        primary_days: 기본 window 일수 (접미사 없는 컬럼)
+        source: customer_idx, article_idx, t_dat, price, purchase_hour 컬럼을 가진 FROM 절
+    """
+    ordered = [primary_days] + sorted(d for d in starts if d != primary_days)
+    suffixes = [window_suffix(days, primary_days) for days in ordered]
+
+    def joined(aggregates: List[str]) -> str:
+        return ",\n                ".join(aggregates)
+
+    aggregates = joined([
+        agg for days, sfx in zip(ordered, suffixes) for agg in item_window_aggregates(days, sfx)
+    ])
+    unique_aggregates = joined([
+        agg for days, sfx in zip(ordered, suffixes) for agg in item_unique_aggregates(days, sfx)
+    ])
+    hour_aggregates = joined([
+        agg for days, sfx in zip(ordered, suffixes) for agg in item_hour_aggregates(days, sfx)
+    ])
+    peak_aggregates = joined([agg for sfx in suffixes for agg in item_peak_aggregates(sfx)])
+    columns = joined(["article_idx"] + [col for sfx in suffixes for col in item_feature_columns(sfx)])
+    return f"""
+        WITH banded AS (
+            SELECT 
+                article_idx,
+                customer_idx,
+                t_dat,
+                price,
+                purchase_hour,
+                {window_band_sql(starts)} as band
+            FROM {source}
+            WHERE t_dat >= DATE '{min(starts.values()).isoformat()}'
+        ),
+        item_bands AS (
+            SELECT 
+                article_idx,
+                band,
+                COUNT(*) as cnt,
+                SUM(price) as sum_price,
+                MAX(t_dat) as last_date
+            FROM banded
+            GROUP BY article_idx, band
+        ),
+        item_customer_bands AS (
+            SELECT article_idx, customer_idx, MIN(band) as band
+            FROM banded
+            GROUP BY article_idx, customer_idx
+        ),
+        item_hour_bands AS (
+            SELECT article_idx, purchase_hour, band, COUNT(*) as cnt
+            FROM banded
+            GROUP BY article_idx, purchase_hour, band
+        ),
+        item_hour_counts AS (
+            SELECT 
+                article_idx,
+                purchase_hour,
+                {hour_aggregates}
+            FROM item_hour_bands
+            GROUP BY article_idx, purchase_hour
+        ),
+        item_stats AS (
+            SELECT 
+                article_idx,
+                {aggregates}
+            FROM item_bands
+            GROUP BY article_idx
+        ),
+        item_unique AS (
+            SELECT 
+                article_idx,
+                {unique_aggregates}
+            FROM item_customer_bands
+            GROUP BY article_idx
+        ),
+        item_peak AS (
+            SELECT 
+                article_idx,
+                {peak_aggregates}
+            FROM item_hour_counts
+            GROUP BY article_idx
+        ),
+        ranked AS (
+            SELECT 
+                {columns}
+            FROM item_stats
+            JOIN item_unique USING (article_idx)
+            JOIN item_peak USING (article_idx)
+        )
+        SELECT *
+        FROM ranked
+        WHERE sales_count > 0
+        ORDER BY popularity_rank
+    """
+
+
 class ItemFeatureGenerator:
     """상품 Feature 생성 클래스"""
     
@@ -35,65 +197,42 @@ class ItemFeatureGenerator:
         return self.con
     
     def create_item_features(self,
-                            transactions_path: str = 'data/raw/transactions_train.csv',
-                            articles_path: str = 'data/raw/articles.csv',
+                            transactions_path: str = 'data/processed/transactions',
+                            articles_path: str = 'data/processed/articles.parquet',
                             output_path: str = 'data/features/item_features.parquet',
-                            lookback_days: int = 7):
+                            lookback_days: int = 7,
+                            windows: Optional[Sequence[int]] = None):
         """
         상품별 Feature 생성
         
         Args:
-            transactions_path: 트랜잭션 CSV 파일 경로
-            articles_path: 상품 정보 CSV 파일 경로
+            transactions_path: 주 단위 파티션 트랜잭션 저장소 (scripts/process_data.py 수집 단계 출력)
+            articles_path: 상품 정보 Parquet 파일 경로
             output_path: 출력 Parquet 파일 경로
-            lookback_days: Feature 계산 기간 (일)
+            lookback_days: Feature 계산 기간 (일, 접미사 없는 기본 컬럼)
+            windows: 추가로 계산할 window 목록 (예: [14, 28] → sales_count_28d, popularity_rank_28d 등).
+                     모든 window를 가장 넓은 window 1회 스캔에서 FILTER 집계로 계산합니다.
         """
         logger.info("상품 Feature 생성 시작...")
         
         con = self.connect()
+        store = TransactionStore(transactions_path)
+        days_list = {int(lookback_days), *(int(d) for d in (windows or []))}
+        starts = {days: store.window_start(days) for days in days_list}
         
-        # 상품 Feature 생성
-        query = f"""
-        CREATE OR REPLACE TABLE item_features AS
-        WITH recent_transactions AS (
+        # 상품 Feature 생성 (가장 넓은 window 파티션만 스캔)
+        recent_transactions = f"""(
             SELECT 
-                article_id,
+                article_idx,
                 t_dat,
                 price,
-                EXTRACT(HOUR FROM CAST(t_dat AS TIMESTAMP)) as purchase_hour,
-                customer_id
-            FROM read_csv_auto('{transactions_path}')
-            WHERE t_dat >= (SELECT MAX(t_dat) - INTERVAL '{lookback_days} days' FROM read_csv_auto('{transactions_path}'))
-        ),
-        item_stats AS (
-            SELECT 
-                article_id,
-                COUNT(*) as sales_count,
-                COUNT(DISTINCT customer_id) as unique_customers,
-                AVG(price) as avg_price,
-                MODE(purchase_hour) as peak_hour,
-                MAX(t_dat) as last_sold_date
-            FROM recent_transactions
-            GROUP BY article_id
-        ),
-        item_popularity AS (
-            SELECT 
-                article_id,
-                sales_count,
-                ROW_NUMBER() OVER (ORDER BY sales_count DESC) as popularity_rank
-            FROM item_stats
-        )
-        SELECT 
-            ist.article_id,
-            ip.popularity_rank,
-            ist.sales_count,
-            ist.unique_customers,
-            ROUND(ist.avg_price, 2) as avg_price,
-            ist.peak_hour,
-            ist.last_sold_date
-        FROM item_stats ist
-        JOIN item_popularity ip ON ist.article_id = ip.article_id
-        ORDER BY ip.popularity_rank
+                {PURCHASE_HOUR_SQL} as purchase_hour,
+                customer_idx
+            FROM {store.scan_sql(min(starts.values()))}
+        )"""
+        query = f"""
+        CREATE OR REPLACE TABLE item_features AS
+        {item_features_select(starts, int(lookback_days), recent_transactions)}
         """
         
         logger.info("SQL 쿼리 실행 중...")
@@ -104,7 +243,7 @@ class ItemFeatureGenerator:
         Path(output_path).parent.mkdir(parents=True, exist_ok=True)
         
         con.execute(f"""
-            COPY item_features TO '{output_path}' (FORMAT PARQUET)
+            COPY item_features TO '{output_path}' (FORMAT PARQUET, ROW_GROUP_SIZE {FEATURE_ROW_GROUP_SIZE})
         """)
         
         # 통계 출력
@@ -0,0 +1,214 @@
+"""
+Transaction Store Module
+
+주(week) 단위 Hive 파티션 Parquet 트랜잭션 저장소
+
+레이아웃:
+    data/processed/transactions/
+    ├── _metadata.json            # 전역 min/max 날짜, 파티션별 row 수
+    ├── week=2020-09-14/data_0.parquet
+    └── week=2020-09-21/data_0.parquet
+
+lookback window 쿼리는 필요한 파티션 파일만 읽고,
+MAX(t_dat)는 메타데이터 파일에서 읽으므로 별도 전체 스캔이 없습니다.
+"""
+
+import hashlib
+import json
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+METADATA_FILE = '_metadata.json'
+PARTITION_COLUMN = 'week'
+
+
+def week_start(d: date) -> date:
+    """해당 날짜가 속한 주의 월요일 (DuckDB DATE_TRUNC('week')와 동일)"""
+    return d - timedelta(days=d.weekday())
+
+
+class TransactionStore:
+    """주 단위 파티션 트랜잭션 저장소 (읽기 전용 뷰)"""
+
+    def __init__(self, root: str = 'data/processed/transactions'):
+        """
+        초기화
+
+        Args:
+            root: 파티션 루트 디렉토리
+        """
+        self.root = Path(root)
+        self._metadata: Optional[Dict[str, Any]] = None
+
+    @property
+    def metadata_path(self) -> Path:
+        return self.root / METADATA_FILE
+
+    def exists(self) -> bool:
+        """저장소(메타데이터 포함)가 존재하는지 여부"""
+        return self.metadata_path.exists()
+
+    def metadata(self) -> Dict[str, Any]:
+        """메타데이터 로드 (1회 캐시)"""
+        if self._metadata is None:
+            if not self.exists():
+                raise FileNotFoundError(
+                    f"트랜잭션 저장소가 없습니다: {self.metadata_path} "
+                    f"(scripts/process_data.py를 먼저 실행하세요)"
+                )
+            with open(self.metadata_path, 'r', encoding='utf-8') as f:
+                self._metadata = json.load(f)
+        return self._metadata
+
+    def refresh(self) -> None:
+        """메타데이터 캐시 무효화 (저장소가 갱신된 경우)"""
+        self._metadata = None
+
+    def max_date(self) -> date:
+        """전역 최대 거래일"""
+        return date.fromisoformat(self.metadata()['max_date'])
+
+    def min_date(self) -> date:
+        """전역 최소 거래일"""
+        return date.fromisoformat(self.metadata()['min_date'])
+
+    def window_start(self, lookback_days: int) -> date:
+        """lookback window 시작일 (t_dat >= MAX(t_dat) - INTERVAL n days 와 동일)"""
+        return self.max_date() - timedelta(days=int(lookback_days))
+
+    def partition_weeks(self) -> List[date]:
+        """저장된 파티션(주 시작일) 목록 (오름차순)"""
+        return sorted(date.fromisoformat(w) for w in self.metadata()['partitions'])
+
+    def partition_files(self, start: Optional[date] = None) -> List[str]:
+        """
+        start 이후 데이터를 포함하는 파티션 파일 glob 목록
+
+        Args:
+            start: window 시작일 (None이면 전체)
+        """
+        first_week = week_start(start) if start is not None else None
+        return [
+            str(self.root / f'{PARTITION_COLUMN}={w.isoformat()}' / '*.parquet')
+            for w in self.partition_weeks()
+            if first_week is None or w >= first_week
+        ]
+
+    def scan_sql(self, start: Optional[date] = None) -> str:
+        """
+        트랜잭션 스캔용 SQL 서브쿼리 (필요한 파티션만 읽음)
+
+        Args:
+            start: window 시작일 (None이면 전체)
+
+        Returns:
+            FROM 절에 사용할 수 있는 괄호로 감싼 서브쿼리
+        """
+        files = self.partition_files(start)
+        if not files:
+            raise FileNotFoundError(f"읽을 파티션이 없습니다: {self.root} (start={start})")
+
+        file_list = ", ".join(f"'{f}'" for f in files)
+        where = f"WHERE t_dat >= DATE '{start.isoformat()}'" if start is not None else ""
+        return f"""(
+            SELECT * EXCLUDE ({PARTITION_COLUMN})
+            FROM read_parquet([{file_list}], hive_partitioning=true)
+            {where}
+        )"""
+
+    def day_sql(self, day: date) -> str:
+        """
+        하루치 트랜잭션 스캔용 SQL 서브쿼리 (해당 주 파티션 1개만 읽음)
+
+        Args:
+            day: 거래일
+
+        Returns:
+            FROM 절에 사용할 수 있는 괄호로 감싼 서브쿼리 (파티션이 없으면 빈 결과)
+        """
+        path = self.root / f'{PARTITION_COLUMN}={week_start(day).isoformat()}'
+        if not any(path.glob('*.parquet')):
+            return f"""(
+            SELECT NULL::INTEGER AS customer_idx, NULL::INTEGER AS article_idx, NULL::DATE AS t_dat
+            WHERE FALSE
+        )"""
+        return f"""(
+            SELECT * EXCLUDE ({PARTITION_COLUMN})
+            FROM read_parquet('{path / '*.parquet'}', hive_partitioning=true)
+            WHERE t_dat = DATE '{day.isoformat()}'
+        )"""
+
+    def window_sql(self, lookback_days: int) -> str:
+        """최근 lookback_days 일 window 스캔용 SQL 서브쿼리"""
+        return self.scan_sql(self.window_start(lookback_days))
+
+    def max_date_sql(self) -> str:
+        """전역 최대 거래일 SQL 리터럴"""
+        return f"DATE '{self.max_date().isoformat()}'"
+
+    def fingerprint(self, start: Optional[date] = None) -> str:
+        """
+        start 이후 데이터의 식별값 (파생 아티팩트 캐시 key용)
+
+        저장소 경로, 최대 거래일, 해당 파티션 파일의 (이름, 크기, mtime)으로 계산하므로
+        파티션이 다시 쓰이거나 새 주가 추가되면 값이 바뀝니다.
+
+        Args:
+            start: window 시작일 (None이면 전체)
+
+        Returns:
+            16자리 hex 문자열
+        """
+        digest = hashlib.sha1()
+        digest.update(str(self.root.resolve()).encode())
+        digest.update(self.max_date().isoformat().encode())
+        for pattern in self.partition_files(start):
+            partition_dir = Path(pattern).parent
+            for path in sorted(partition_dir.glob('*.parquet')):
+                st = path.stat()
+                digest.update(f'{partition_dir.name}/{path.name}:{st.st_size}:{st.st_mtime_ns}'.encode())
+        return digest.hexdigest()[:16]
+
+
+def write_metadata(con, root: Path) -> Dict[str, Any]:
+    """
+    파티션 디렉토리를 집계하여 _metadata.json 작성
+
+    Args:
+        con: DuckDB 연결
+        root: 파티션 루트 디렉토리
+
+    Returns:
+        작성된 메타데이터
+    """
+    rows = con.execute(f"""
+        SELECT
+            {PARTITION_COLUMN}::DATE AS week,
+            COUNT(*) AS row_count,
+            MIN(t_dat) AS min_date,
+            MAX(t_dat) AS max_date
+        FROM read_parquet('{root}/*/*.parquet', hive_partitioning=true)
+        GROUP BY 1
+        ORDER BY 1
+    """).fetchall()
+    if not rows:
+        raise ValueError(f"파티션이 비어 있습니다: {root}")
+
+    metadata = {
+        'min_date': min(r[2] for r in rows).isoformat(),
+        'max_date': max(r[3] for r in rows).isoformat(),
+        'row_count': int(sum(r[1] for r in rows)),
+        'partitions': {r[0].isoformat(): int(r[1]) for r in rows},
+    }
+
+    tmp_path = root / f'{METADATA_FILE}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(metadata, f, indent=2)
+    tmp_path.replace(root / METADATA_FILE)
+    return metadata
@@ -6,14 +6,184 @@ DuckDB를 활용하여 대용량 데이터를 효율적으로 처리합니다.
 """
 
 import duckdb
+from datetime import date
 from pathlib import Path
-from typing import Optional
+from typing import Dict, List, Optional, Sequence
 import logging
 
+from .feature_index import FEATURE_ROW_GROUP_SIZE
+from .transaction_store import TransactionStore
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+# t_dat(DATE) 기준 구매 시간대
+PURCHASE_HOUR_SQL = "EXTRACT(HOUR FROM CAST(t_dat AS TIMESTAMP))"
+
+
+def window_suffix(lookback_days: int, primary_days: int) -> str:
+    """window별 컬럼 접미사 (기본 window는 접미사 없음, 나머지는 _{n}d)"""
+    return '' if int(lookback_days) == int(primary_days) else f'_{int(lookback_days)}d'
+
+
+def window_band_sql(starts: Dict[int, date]) -> str:
+    """
+    거래일 → band (해당 거래를 포함하는 가장 짧은 window의 일수)
+
+    모든 window는 같은 기준일(max_date)에서 끝나므로
+    t_dat가 n일 window에 포함됨 ⇔ band <= n 입니다.
+
+    Args:
+        starts: {window 일수: window 시작일}
+    """
+    cases = " ".join(
+        f"WHEN t_dat >= DATE '{starts[days].isoformat()}' THEN {days}"
+        for days in sorted(starts)
+    )
+    return f"CASE {cases} END"
+
+
+def user_window_aggregates(lookback_days: int, suffix: str = '') -> List[str]:
+    """
+    유저 단위 집계식 (band 부분 집계를 window에 포함되는 band만 합치는 FILTER 조건부 집계)
+
+    user_bands(유저 x band 부분 집계) / user_item_bands(유저 x 상품 최초 band)를
+    입력으로 하며, window마다 suffix를 달리해 같은 GROUP BY에서 계산합니다.
+
+    Args:
+        lookback_days: window 일수 (band <= lookback_days)
+        suffix: 컬럼명 접미사 (예: '_90d')
+    """
+    cond = f"FILTER (WHERE band <= {int(lookback_days)})"
+    return [
+        f"SUM(sum_hour) {cond} / SUM(cnt) {cond} as avg_purchase_hour{suffix}",
+        f"COALESCE(SUM(cnt) {cond}, 0)::BIGINT as purchase_count{suffix}",
+        f"SUM(sum_price) {cond} / SUM(cnt) {cond} as avg_price{suffix}",
+        f"MAX(last_date) {cond} as last_purchase_date{suffix}",
+        f"MIN(first_date) {cond} as first_purchase_date{suffix}",
+    ]
+
+
+def user_unique_aggregates(lookback_days: int, suffix: str = '') -> List[str]:
+    """유저별 window 내 고유 상품 수 (user_item_bands 입력)"""
+    return [f"COUNT(*) FILTER (WHERE band <= {int(lookback_days)}) as unique_items{suffix}"]
+
+
+def user_feature_columns(max_date: date, suffix: str = '') -> List[str]:
+    """
+    user_window_aggregates / user_unique_aggregates 결과 → 최종 유저 Feature 컬럼 (customer_idx 제외)
+
+    Args:
+        max_date: 전역 최대 거래일 (recency 기준)
+        suffix: 컬럼명 접미사 (집계식과 동일)
+    """
+    return [
+        f"ROUND(avg_purchase_hour{suffix}, 2) as avg_purchase_hour{suffix}",
+        f"purchase_count{suffix}",
+        f"unique_items{suffix}",
+        f"ROUND(avg_price{suffix}, 2) as avg_price{suffix}",
+        f"DATE_DIFF('day', last_purchase_date{suffix}, DATE '{max_date.isoformat()}') as recency{suffix}",
+        f"""CASE 
+                WHEN purchase_count{suffix} >= 10 THEN 'high'
+                WHEN purchase_count{suffix} >= 5 THEN 'medium'
+                ELSE 'low'
+            END as purchase_frequency{suffix}""",
+        f"last_purchase_date{suffix}",
+        f"first_purchase_date{suffix}",
+    ]
+
+
+def user_features_select(max_date: date,
+                         starts: Dict[int, date],
+                         primary_days: int,
+                         source: str) -> str:
+    """
+    여러 window의 유저 Feature를 1회 스캔으로 계산하는 SELECT 문
+
+    거래를 band(가장 짧은 포함 window)별로 한 번만 부분 집계한 뒤
+    window별 FILTER 집계로 합치므로, window 수가 늘어도 거래 스캔 / 해시 집계는 1회입니다.
+    (window별 COUNT(DISTINCT) 대신 (유저, 상품) 최초 band로 고유 상품 수 계산)
+
+    유저(row) 범위는 기본 window에 거래가 있는 유저이며(기존 출력과 동일),
+    추가 window는 _{n}d 접미사 컬럼으로 뒤에 붙습니다.
+
+    Args:
+        max_date: 전역 최대 거래일
+        starts: {window 일수: window 시작일} (primary_days 포함)
+        primary_days: 기본 window 일수 (접미사 없는 컬럼)
+        source: customer_idx, article_idx, t_dat, price, purchase_hour 컬럼을 가진 FROM 절
+    """
+    ordered = [primary_days] + sorted(d for d in starts if d != primary_days)
+    aggregates = ",\n                ".join(
+        agg
+        for days in ordered
+        for agg in user_window_aggregates(days, window_suffix(days, primary_days))
+    )
+    unique_aggregates = ",\n                ".join(
+        agg
+        for days in ordered
+        for agg in user_unique_aggregates(days, window_suffix(days, primary_days))
+    )
+    columns = ",\n            ".join(
+        ["customer_idx"] + [
+            col
+            for days in ordered
+            for col in user_feature_columns(max_date, window_suffix(days, primary_days))
+        ]
+    )
+    return f"""
+        WITH banded AS (
+            SELECT 
+                customer_idx,
+                article_idx,
+                t_dat,
+                price,
+                purchase_hour,
+                {window_band_sql(starts)} as band
+            FROM {source}
+            WHERE t_dat >= DATE '{min(starts.values()).isoformat()}'
+        ),
+        user_bands AS (
+            SELECT 
+                customer_idx,
+                band,
+                COUNT(*) as cnt,
+                SUM(price) as sum_price,
+                SUM(purchase_hour) as sum_hour,
+                MIN(t_dat) as first_date,
+                MAX(t_dat) as last_date
+            FROM banded
+            GROUP BY customer_idx, band
+        ),
+        user_item_bands AS (
+            SELECT customer_idx, article_idx, MIN(band) as band
+            FROM banded
+            GROUP BY customer_idx, article_idx
+        ),
+        user_stats AS (
+            SELECT 
+                customer_idx,
+                {aggregates}
+            FROM user_bands
+            GROUP BY customer_idx
+        ),
+        user_unique AS (
+            SELECT 
+                customer_idx,
+                {unique_aggregates}
+            FROM user_item_bands
+            GROUP BY customer_idx
+        )
+        SELECT 
+            {columns}
+        FROM user_stats
+        JOIN user_unique USING (customer_idx)
+        WHERE purchase_count > 0
+        ORDER BY customer_idx
+    """
+
+
 class UserFeatureGenerator:
     """유저 Feature 생성 클래스"""
     
@@ -37,65 +207,40 @@ class UserFeatureGenerator:
         return self.con
     
     def create_user_features(self, 
-                            transactions_path: str = 'data/raw/transactions_train.csv',
+                            transactions_path: str = 'data/processed/transactions',
                             output_path: str = 'data/features/user_features.parquet',
-                            lookback_days: int = 28):
+                            lookback_days: int = 28,
+                            windows: Optional[Sequence[int]] = None):
         """
         유저별 Feature 생성
         
         Args:
-            transactions_path: 트랜잭션 CSV 파일 경로
+            transactions_path: 주 단위 파티션 트랜잭션 저장소 (scripts/process_data.py 수집 단계 출력)
             output_path: 출력 Parquet 파일 경로
-            lookback_days: Feature 계산 기간 (일)
+            lookback_days: Feature 계산 기간 (일, 접미사 없는 기본 컬럼)
+            windows: 추가로 계산할 window 목록 (예: [7, 14, 90] → purchase_count_7d 등).
+                     모든 window를 가장 넓은 window 1회 스캔에서 FILTER 집계로 계산합니다.
         """
         logger.info("유저 Feature 생성 시작...")
         
         con = self.connect()
+        store = TransactionStore(transactions_path)
+        days_list = {int(lookback_days), *(int(d) for d in (windows or []))}
+        starts = {days: store.window_start(days) for days in days_list}
         
-        # 트랜잭션 데이터 로드 및 Feature 생성
-        query = f"""
-        CREATE OR REPLACE TABLE user_features AS
-        WITH recent_transactions AS (
+        # 트랜잭션 데이터 로드 및 Feature 생성 (가장 넓은 window 파티션만 스캔)
+        recent_transactions = f"""(
             SELECT 
-                customer_id,
+                customer_idx,
                 t_dat,
-                article_id,
+                article_idx,
                 price,
-                EXTRACT(HOUR FROM CAST(t_dat AS TIMESTAMP)) as purchase_hour
-            FROM read_csv_auto('{transactions_path}')
-            WHERE t_dat >= (SELECT MAX(t_dat) - INTERVAL '{lookback_days} days' FROM read_csv_auto('{transactions_path}'))
-        ),
-        user_stats AS (
-            SELECT 
-                customer_id,
-                AVG(purchase_hour) as avg_purchase_hour,
-                COUNT(*) as purchase_count,
-                COUNT(DISTINCT article_id) as unique_items,
-                AVG(price) as avg_price,
-                MAX(t_dat) as last_purchase_date,
-                MIN(t_dat) as first_purchase_date
-            FROM recent_transactions
-            GROUP BY customer_id
-        ),
-        max_date AS (
-            SELECT MAX(t_dat) as max_date FROM recent_transactions
-        )
-        SELECT 
-            us.customer_id,
-            ROUND(us.avg_purchase_hour, 2) as avg_purchase_hour,
-            us.purchase_count,
-            us.unique_items,
-            ROUND(us.avg_price, 2) as avg_price,
-            DATE_DIFF('day', us.last_purchase_date, md.max_date) as recency,
-            CASE 
-                WHEN us.purchase_count >= 10 THEN 'high'
-                WHEN us.purchase_count >= 5 THEN 'medium'
-                ELSE 'low'
-            END as purchase_frequency,
-            us.last_purchase_date,
-            us.first_purchase_date
-        FROM user_stats us
-        CROSS JOIN max_date md
+                {PURCHASE_HOUR_SQL} as purchase_hour
+            FROM {store.scan_sql(min(starts.values()))}
+        )"""
+        query = f"""
+        CREATE OR REPLACE TABLE user_features AS
+        {user_features_select(store.max_date(), starts, int(lookback_days), recent_transactions)}
         """
         
         logger.info("SQL 쿼리 실행 중...")
@@ -106,7 +251,7 @@ class UserFeatureGenerator:
         Path(output_path).parent.mkdir(parents=True, exist_ok=True)
         
         con.execute(f"""
-            COPY user_features TO '{output_path}' (FORMAT PARQUET)
+            COPY user_features TO '{output_path}' (FORMAT PARQUET, ROW_GROUP_SIZE {FEATURE_ROW_GROUP_SIZE})
         """)
         
         # 통계 출력
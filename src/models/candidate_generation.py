@@ -5,9 +5,31 @@ Candidate Generation Module (Improved v2)
 - Item-to-item co-purchase CF candidates (time decay + user-recent weighting + popularity penalty)
 - Score-based deterministic merge (robust normalization, clear tie-break)
 - DuckDB: transactions scanned ONCE (TEMP TABLE materialization)
+- All keys are int32 surrogate keys (customer_idx / article_idx, see src/data/id_mapping.py);
+  string IDs are translated only at the API edge (RecommendationService, simulation)
 
 Key fixes vs v1:
-1) Avoid CSV re-scan by materializing CF window into TEMP TABLE
+1) Avoid transactions re-scan by materializing CF window into TEMP TABLE
+   (reads the typed Parquet produced by scripts/process_data.py, never the raw CSV);
+   the sorted window is persisted under cf_cache_dir keyed by the source partitions,
+   so a restart reloads it instead of re-scanning + re-sorting
+   ... and the per-seed co-purchase neighbors are precomputed once per window
+   (t_item_neighbors), so online CF is a lookup + sum instead of a self-join;
+   cf_backend="sparse" scores the same CF in-process with SciPy CSR products (sparse_cf.py)
+   merge_candidates_batch runs CF for many users in one set-based query / one sparse pass
+6) Popularity lists (and their normalized scores) are built once per item features view,
+   i.e. per feature snapshot, and sliced per call
+7) The CF window carries day_offset and decay_hl{n} columns (0.5^(day_offset/n) for
+   CF_DECAY_HALF_LIVES), so per-request time decay is a column read, not POW per joined row
+8) Seeds expand to buyers through t_seed_buyers (distinct buyers per item, recency-ranked);
+   cf_max_buyers_per_seed caps that expansion to the most recent buyers for bestseller seeds
+9) item_neighbors_incremental=True keeps the neighbor pairs in a sliding-window
+   CooccurrenceStore (cooccurrence.py): a new day is added / the leaving day subtracted
+   instead of recomputing the whole window
+10) cf_backend="sparse" keeps the window as per-day partials, so CF requests can pass any
+   window_days <= cf_window_days (and any half-life) without re-materializing transactions
+11) cf_cooccurrence="basket" pairs only items bought by the same customer on the same day
+   (precomputed t_item_neighbors), a smaller join and a same-basket signal
 2) Switch CF to item-to-item co-occurrence (more stable + faster than similar-users overlap)
 3) Apply user recent-item weights + time decay
 4) Optional popularity penalty (rank-based, but isolated & tunable)
@@ -17,18 +39,43 @@ Key fixes vs v1:
 from __future__ import annotations
 
 import duckdb
+import numpy as np
+import os
 from dataclasses import dataclass
-from typing import Dict, List, Optional, Tuple
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
 import logging
 import math
 
+from ..data.feature_snapshot import current_version, resolve_feature_path, snapshot_dir
+from ..data.transaction_store import TransactionStore
+from ..utils.db_init import attach_serving_db, serving_db_signature
+from .cooccurrence import CooccurrenceStore
+from .sparse_cf import NEIGHBOR_SCORE_DECIMALS, SparseCFIndex
+from .user_history import UserHistoryIndex
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+# half-lives whose time-decay weights are precomputed as CF window columns (decay_hl{n});
+# other half-lives fall back to POW over day_offset. Each entry adds a DOUBLE column to the
+# window, so only the half-life the scorers use by default is listed.
+CF_DECAY_HALF_LIVES = (14,)
+
+
+def cf_decay_sql(half_life: int, alias: str = "") -> str:
+    """0.5^(day_offset/half_life) of a CF window row (precomputed column when available)"""
+    prefix = f"{alias}." if alias else ""
+    half_life = max(int(half_life), 1)
+    if half_life in CF_DECAY_HALF_LIVES:
+        return f"{prefix}decay_hl{half_life}"
+    return f"POW(0.5, {prefix}day_offset::DOUBLE / {half_life}.0)"
+
+
 @dataclass(frozen=True)
 class ScoredItem:
-    item_id: str
+    item_id: int  # article_idx
     score: float
     source: str  # "pop" or "cf"
 
@@ -37,169 +84,588 @@ class CandidateGenerator:
     def __init__(
         self,
         db_path: str = "local_helix.db",
-        transactions_path: str = "data/raw/transactions_train.csv",
-        item_features_path: str = "data/features/item_features.parquet",
+        transactions_path: str = "data/processed/transactions",
+        item_features_path: Optional[str] = None,
+        features_dir: str = "data/features",
         memory_limit: str = "8GB",
         threads: int = 4,
         cf_window_days: int = 28,
         materialize_transactions: bool = True,
+        use_serving_db: bool = False,
+        cf_cache_dir: Optional[str] = "data/processed/cf_window",
+        item_neighbors_top_n: Optional[int] = 200,
+        item_neighbors_half_life_days: int = 14,
+        cf_backend: str = "sql",
+        cf_max_buyers_per_seed: Optional[int] = None,
+        item_neighbors_incremental: bool = False,
+        cf_cooccurrence: str = "window",
     ):
+        if cf_backend not in ("sql", "sparse"):
+            raise ValueError(f"Unknown cf_backend: {cf_backend} (expected 'sql' or 'sparse')")
+        if item_neighbors_incremental and cf_max_buyers_per_seed is not None:
+            # buyer recency ranks change with every window move, so capped pairs are not additive
+            raise ValueError("item_neighbors_incremental does not support cf_max_buyers_per_seed")
+        if cf_cooccurrence not in ("window", "basket"):
+            raise ValueError(f"Unknown cf_cooccurrence: {cf_cooccurrence} (expected 'window' or 'basket')")
+        if cf_cooccurrence == "basket" and (
+            cf_backend != "sql"
+            or item_neighbors_top_n is None
+            or item_neighbors_incremental
+            or cf_max_buyers_per_seed is not None
+        ):
+            # basket pairs exist only as the precomputed neighbor table (no self-join / sparse path)
+            raise ValueError(
+                "cf_cooccurrence='basket' needs cf_backend='sql' and item_neighbors_top_n, "
+                "without item_neighbors_incremental / cf_max_buyers_per_seed"
+            )
         self.db_path = db_path
         self.transactions_path = transactions_path
+        # None: follow the CURRENT feature snapshot under features_dir (see reload_features)
         self.item_features_path = item_features_path
+        self.features_dir = features_dir
+        self.snapshot_version: Optional[str] = None
         self.memory_limit = memory_limit
         self.threads = threads
         self.cf_window_days = cf_window_days
         self.materialize_transactions = materialize_transactions
+        # True: read item features from the keyed table in the serving DB (db_path, read-only)
+        self.use_serving_db = use_serving_db
+        # persisted sorted CF window (None: always rebuild from the partitions)
+        self.cf_cache_dir = cf_cache_dir
+        # precomputed top-N co-purchase neighbors per seed item (None: online self-join only);
+        # used when the request's half-life matches and cooc_top_per_seed <= top_n
+        self.item_neighbors_top_n = item_neighbors_top_n
+        self.item_neighbors_half_life_days = item_neighbors_half_life_days
+        self._item_neighbors_ready = False
+        # "sql": DuckDB (neighbor table / self-join), "sparse": SciPy CSR over the same window
+        self.cf_backend = cf_backend
+        self._sparse_cf: Optional[SparseCFIndex] = None
+        # per-user window rows (seeds / purchased items) for both backends
+        self._user_history: Optional[UserHistoryIndex] = None
+        # popularity order / scores / dense ranks, rebuilt when v_item_features is replaced
+        self._popularity_rank: Optional[np.ndarray] = None
+        self._popularity_list: Optional[Tuple[np.ndarray, np.ndarray]] = None
+        self._popularity_norm_cache: Dict[int, Dict[int, float]] = {}
+        # co-purchase uses only the N most recent buyers of each seed item (None: all buyers);
+        # bounds the per-seed join size for bestsellers, applied in every backend
+        self.cf_max_buyers_per_seed = (
+            int(cf_max_buyers_per_seed) if cf_max_buyers_per_seed is not None else None
+        )
+        self._seed_buyers_ready = False
+        # True: t_item_neighbors comes from a CooccurrenceStore kept under cf_cache_dir and moved
+        # forward day by day (add the new day, subtract the day leaving the window)
+        self.item_neighbors_incremental = item_neighbors_incremental
+        # "window": items bought by the same customer anywhere in the CF window co-occur;
+        # "basket": only items bought by the same customer on the same day (t_item_neighbors only)
+        self.cf_cooccurrence = cf_cooccurrence
 
         self.con: Optional[duckdb.DuckDBPyConnection] = None
         self._cache_ready = False
+        self._attached_signature = None
 
     def connect(self) -> duckdb.DuckDBPyConnection:
         if self.con is None:
             # Use in-memory database to avoid file locking
             self.con = duckdb.connect(":memory:")
             # Attach the file database in read-only mode for data access
-            if self.db_path != ":memory:":
-                try:
-                    self.con.execute(f"ATTACH '{self.db_path}' AS filedb (READ_ONLY)")
-                except Exception:
-                    # If attach fails, continue with in-memory only
-                    pass
+            self._attached_signature = attach_serving_db(self.con, self.db_path)
             self.con.execute(f"SET memory_limit='{self.memory_limit}'")
             self.con.execute(f"SET threads TO {int(self.threads)}")
         if not self._cache_ready:
             self._prepare_cache()
         return self.con
 
-    def _prepare_cache(self) -> None:
+    def _create_item_features_view(self, version: Optional[str] = None) -> None:
         con = self.con
         assert con is not None
 
-        # item features view
-        con.execute("DROP VIEW IF EXISTS v_item_features")
+        if self.use_serving_db:
+            if self._attached_signature is None:
+                raise FileNotFoundError(f"Serving DB not found: {self.db_path} (run build_serving_database)")
+            row = con.execute(
+                "SELECT value FROM filedb.serving_meta WHERE key = 'feature_snapshot'"
+            ).fetchone()
+            self.snapshot_version = row[0] if row and row[0] else None
+            source = "filedb.item_features"
+        elif self.item_features_path is not None:
+            source = f"read_parquet('{self.item_features_path}')"
+        else:
+            self.snapshot_version = version or current_version(self.features_dir)
+            path = snapshot_dir(self.features_dir, self.snapshot_version) / "item_features.parquet"
+            source = f"read_parquet('{path}')"
+
+        # popularity lists / ranks are derived from the view -> rebuild on next use
+        self._reset_popularity()
+
+        # item features view (CREATE OR REPLACE: queries see either the old or the new file)
         con.execute(
             f"""
-            CREATE VIEW v_item_features AS
+            CREATE OR REPLACE VIEW v_item_features AS
             SELECT
-                article_id::VARCHAR AS article_id,
+                article_idx,
                 popularity_rank
-            FROM read_parquet('{self.item_features_path}')
+            FROM {source}
             """
         )
 
-        # raw transactions view (will be materialized into temp table for CF window)
-        con.execute("DROP VIEW IF EXISTS v_transactions_all")
+    def reload_features(self, version: Optional[str] = None) -> bool:
+        """
+        Point v_item_features at another feature snapshot if it changed.
+        The CF window (transactions) is independent of the feature snapshot and is kept.
+
+        Args:
+            version: snapshot version to switch to (None: the CURRENT pointer);
+                with use_serving_db the serving DB is re-attached if its file was replaced
+
+        Returns:
+            True if the view was switched
+        """
+        if self.con is None or not self._cache_ready:
+            return False
+        if self.use_serving_db:
+            # serving DB file replaced -> re-attach; the view resolves filedb.item_features by name
+            if serving_db_signature(self.db_path) == self._attached_signature:
+                return False
+            self._attached_signature = attach_serving_db(self.con, self.db_path)
+            self._create_item_features_view()
+            logger.info("Serving DB re-attached (snapshot %s)", self.snapshot_version)
+            return True
+        if self.item_features_path is not None:
+            return False
+        version = version or current_version(self.features_dir)
+        if version is None or version == self.snapshot_version:
+            return False
+        self._create_item_features_view(version)
+        logger.info("Item features switched to snapshot %s", self.snapshot_version)
+        return True
+
+    def _cf_window_artifact(
+        self, store: TransactionStore, prefix: str = "cf_window", tag: str = ""
+    ) -> Optional[Path]:
+        """Artifact path for the current CF window: keyed by window length (+ layout tag) + source fingerprint."""
+        if self.cf_cache_dir is None:
+            return None
+        days = int(self.cf_window_days)
+        key = store.fingerprint(store.window_start(days))
+        return Path(self.cf_cache_dir) / f"{prefix}_{days}d{tag}_{key}.parquet"
+
+    def _persist_artifact(self, table: str, artifact: Path, stale_glob: str) -> None:
+        """COPY a temp table to artifact (tmp + replace) and drop older artifacts matching stale_glob."""
+        con = self.con
+        assert con is not None
+
+        # a failed write only costs the warm start
+        tmp = artifact.with_name(artifact.name + ".tmp")
+        try:
+            artifact.parent.mkdir(parents=True, exist_ok=True)
+            con.execute(f"COPY {table} TO '{tmp}' (FORMAT PARQUET)")
+            os.replace(tmp, artifact)
+        except (OSError, duckdb.Error) as e:
+            logger.warning("Could not persist %s to %s: %s", table, artifact, e)
+            return
+        for old in artifact.parent.glob(stale_glob):
+            if old != artifact:
+                old.unlink(missing_ok=True)
+        logger.info("%s persisted to %s", table, artifact)
+
+    def _materialize_cf_window(self, store: TransactionStore) -> None:
+        con = self.con
+        assert con is not None
+
+        # the decay columns are part of the layout: another half-life set -> another artifact
+        artifact = self._cf_window_artifact(
+            store, tag="_hl" + "-".join(str(h) for h in CF_DECAY_HALF_LIVES)
+        )
+        if artifact is not None and artifact.exists():
+            # warm start: the artifact is already filtered + sorted, just load it
+            con.execute(
+                f"CREATE TEMP TABLE t_cf_transactions AS SELECT * FROM read_parquet('{artifact}')"
+            )
+            logger.info("CF window loaded from %s", artifact)
+            return
+
+        # IMPORTANT: force one-time scan + keep only window
+        # Helpful: order by (article_idx, customer_idx, t_dat) for join locality
         con.execute(
-            f"""
-            CREATE VIEW v_transactions_all AS
-            SELECT
-                customer_id::VARCHAR AS customer_id,
-                article_id::VARCHAR  AS article_id,
-                CAST(t_dat AS DATE)  AS t_dat
-            FROM read_csv_auto('{self.transactions_path}', header=true)
+            """
+            CREATE TEMP TABLE t_cf_transactions AS
+            SELECT *
+            FROM v_transactions_window
+            ORDER BY article_idx, customer_idx, t_dat
             """
         )
+        if artifact is not None:
+            # persist for the next start (tmp + replace so readers never see a partial file)
+            self._persist_artifact(
+                "t_cf_transactions", artifact, f"cf_window_{int(self.cf_window_days)}d_*.parquet"
+            )
 
-        # materialize CF window
-        con.execute("DROP TABLE IF EXISTS t_cf_transactions")
-        con.execute("DROP VIEW IF EXISTS v_cf_transactions")
+    def build_item_neighbors(self, store: Optional[TransactionStore] = None) -> None:
+        """
+        Offline part of item-to-item CF: top-N co-purchase neighbors for every seed item.
 
-        if self.materialize_transactions:
-            # IMPORTANT: force one-time scan + keep only window
+        score(seed, cand) is exactly the per-seed raw score of the online self-join divided by
+        the seed weight: SUM over (seed row t1, cand row t2) of the same customer of
+        0.5^(age(t2)/half_life). It is computed from per-(customer, item) partials
+        (count of seed rows x decayed cand rows), so the join is over distinct pairs, not rows.
+        Rows are kept per seed in (score DESC, cand_item ASC) order, rank 1..top_n.
+
+        With cf_cooccurrence="basket" a (customer, t_dat) basket replaces the customer: only rows
+        bought on the same day pair up, so the join is over baskets instead of whole histories.
+
+        The table depends only on the CF window (and cf_max_buyers_per_seed), so it is
+        loaded from / persisted to cf_cache_dir under the same fingerprint as the window artifact.
+        """
+        con = self.con
+        assert con is not None
+        if self.item_neighbors_top_n is None:
+            return
+        top_n = int(self.item_neighbors_top_n)
+        half_life = max(int(self.item_neighbors_half_life_days), 1)
+        store = store or TransactionStore(self.transactions_path)
+
+        cap = self.cf_max_buyers_per_seed
+        # _r{n}: neighbor ranking rule (scores rounded to n decimals) is part of the layout
+        source = "basket" if self.cf_cooccurrence == "basket" else "item"
+        prefix = f"{source}_neighbors_hl{half_life}_top{top_n}_r{NEIGHBOR_SCORE_DECIMALS}" + (
+            f"_cap{cap}" if cap is not None else ""
+        )
+
+        con.execute("DROP TABLE IF EXISTS t_item_neighbors")
+        artifact = self._cf_window_artifact(store, prefix=prefix)
+        loaded = artifact is not None and artifact.exists()
+        if loaded:
+            con.execute(
+                f"CREATE TEMP TABLE t_item_neighbors AS SELECT * FROM read_parquet('{artifact}')"
+            )
+            logger.info("Item neighbors loaded from %s", artifact)
+        elif self.item_neighbors_incremental:
+            self._build_item_neighbors_incremental(store, half_life, top_n)
+        elif self.cf_cooccurrence == "basket":
             con.execute(
                 f"""
-                CREATE TEMP TABLE t_cf_transactions AS
-                WITH mx AS (SELECT MAX(t_dat) AS dmax FROM v_transactions_all)
-                SELECT *
-                FROM v_transactions_all
-                WHERE t_dat >= (SELECT dmax - INTERVAL '{int(self.cf_window_days)} days' FROM mx)
+                CREATE TEMP TABLE t_item_neighbors AS
+                WITH
+                basket_item AS (
+                    SELECT
+                        customer_idx,
+                        t_dat,
+                        article_idx,
+                        COUNT(*) AS cnt,
+                        SUM({cf_decay_sql(half_life)}) AS decay
+                    FROM v_cf_transactions
+                    GROUP BY customer_idx, t_dat, article_idx
+                ),
+                pairs AS (
+                    SELECT
+                        s.article_idx AS seed_item,
+                        c.article_idx AS cand_item,
+                        SUM(s.cnt * c.decay) AS score
+                    FROM basket_item s
+                    JOIN basket_item c
+                      ON c.customer_idx = s.customer_idx
+                     AND c.t_dat = s.t_dat
+                    WHERE c.article_idx <> s.article_idx
+                    GROUP BY s.article_idx, c.article_idx
+                )
+                SELECT seed_item, cand_item, score, rnk
+                FROM (
+                    SELECT
+                        *,
+                        ROW_NUMBER() OVER (
+                            PARTITION BY seed_item
+                            ORDER BY ROUND(score, {NEIGHBOR_SCORE_DECIMALS}) DESC, cand_item ASC
+                        )::INTEGER AS rnk
+                    FROM pairs
+                )
+                WHERE rnk <= {top_n}
+                ORDER BY seed_item, rnk
                 """
             )
-            # Helpful: order by (article_id, customer_id, t_dat) for join locality
-            con.execute("DROP TABLE IF EXISTS t_cf_sorted")
+        else:
+            self._ensure_seed_buyers()
             con.execute(
+                f"""
+                CREATE TEMP TABLE t_item_neighbors AS
+                WITH
+                seed_side AS (
+                    SELECT customer_idx, article_idx, cnt
+                    FROM t_seed_buyers b
+                    WHERE TRUE{self._buyer_cap_sql("b")}
+                ),
+                user_item AS (
+                    SELECT
+                        customer_idx,
+                        article_idx,
+                        COUNT(*) AS cnt,
+                        SUM({cf_decay_sql(half_life)}) AS decay
+                    FROM v_cf_transactions
+                    GROUP BY customer_idx, article_idx
+                ),
+                pairs AS (
+                    SELECT
+                        s.article_idx AS seed_item,
+                        c.article_idx AS cand_item,
+                        SUM(s.cnt * c.decay) AS score
+                    FROM seed_side s
+                    JOIN user_item c
+                      ON c.customer_idx = s.customer_idx
+                    WHERE c.article_idx <> s.article_idx
+                    GROUP BY s.article_idx, c.article_idx
+                )
+                SELECT seed_item, cand_item, score, rnk
+                FROM (
+                    SELECT
+                        *,
+                        ROW_NUMBER() OVER (
+                            PARTITION BY seed_item
+                            ORDER BY ROUND(score, {NEIGHBOR_SCORE_DECIMALS}) DESC, cand_item ASC
+                        )::INTEGER AS rnk
+                    FROM pairs
+                )
+                WHERE rnk <= {top_n}
+                ORDER BY seed_item, rnk
                 """
-                CREATE TEMP TABLE t_cf_sorted AS
-                SELECT * FROM t_cf_transactions
-                ORDER BY article_id, customer_id, t_dat
-                """
             )
-            con.execute("DROP TABLE IF EXISTS t_cf_transactions")
-            con.execute("ALTER TABLE t_cf_sorted RENAME TO t_cf_transactions")
+        if artifact is not None and not loaded:
+            self._persist_artifact(
+                "t_item_neighbors",
+                artifact,
+                f"{prefix}_{int(self.cf_window_days)}d_*.parquet",
+            )
+        self._item_neighbors_ready = True
 
-            con.execute("CREATE VIEW v_cf_transactions AS SELECT * FROM t_cf_transactions")
-        else:
+    def _build_item_neighbors_incremental(
+        self, store: TransactionStore, half_life: int, top_n: int
+    ) -> None:
+        """
+        t_item_neighbors from the sliding-window CooccurrenceStore (same rows as the SQL build).
+
+        The store is kept next to the window artifacts; when the transaction store moved
+        forward by k days it is advanced k times (new day added, leaving day subtracted)
+        instead of recomputing every pair of the window.
+        """
+        con = self.con
+        assert con is not None
+        days = int(self.cf_window_days)
+        path = (
+            Path(self.cf_cache_dir)
+            / f"cooc_store_{days}d_hl{half_life}_top{top_n}_r{NEIGHBOR_SCORE_DECIMALS}.npz"
+            if self.cf_cache_dir is not None
+            else None
+        )
+        cooc = CooccurrenceStore.load(path, days, half_life, top_n) if path is not None else None
+        if cooc is None:
+            cooc = CooccurrenceStore(days, half_life, top_n)
+        cooc.sync(con, store)
+        if path is not None:
+            try:
+                cooc.save(path)
+            except OSError as e:
+                logger.warning("Could not persist co-occurrence store to %s: %s", path, e)
+
+        con.register("cooc_neighbors", cooc.neighbor_table())
+        try:
             con.execute(
-                f"""
-                CREATE VIEW v_cf_transactions AS
-                WITH mx AS (SELECT MAX(t_dat) AS dmax FROM v_transactions_all)
-                SELECT *
-                FROM v_transactions_all
-                WHERE t_dat >= (SELECT dmax - INTERVAL '{int(self.cf_window_days)} days' FROM mx)
+                """
+                CREATE TEMP TABLE t_item_neighbors AS
+                SELECT seed_item, cand_item, score, rnk
+                FROM cooc_neighbors
+                ORDER BY seed_item, rnk
                 """
             )
+        finally:
+            con.unregister("cooc_neighbors")
 
-        # cache max date for consistent time-decay
-        con.execute("DROP VIEW IF EXISTS v_cf_max_date")
+    def _use_item_neighbors(self, half_life: int, cooc_top_per_seed: int) -> bool:
+        """True if t_item_neighbors answers this request; otherwise prepare the self-join input."""
+        if (
+            self._item_neighbors_ready
+            and self.item_neighbors_top_n is not None
+            and half_life == max(int(self.item_neighbors_half_life_days), 1)
+            and cooc_top_per_seed <= int(self.item_neighbors_top_n)
+        ):
+            return True
+        if self.cf_cooccurrence == "basket":
+            raise ValueError(
+                "cf_cooccurrence='basket' is served from t_item_neighbors only: "
+                f"time_decay_half_life_days must be {self.item_neighbors_half_life_days} and "
+                f"cooc_top_per_seed <= {self.item_neighbors_top_n}"
+            )
+        self._ensure_seed_buyers()
+        return False
+
+    def _ensure_seed_buyers(self) -> None:
+        """
+        t_seed_buyers: distinct buyers of each item in the CF window with their row count (cnt)
+        and buyer_rank (most recent purchase of the item first, customer_idx ASC on ties).
+
+        Expanding a seed through it (x cnt) gives the same co-purchase sums as joining the seed's
+        raw rows, and buyer_rank <= cf_max_buyers_per_seed keeps the most recent buyers only.
+        Sorted by (article_idx, buyer_rank) so a seed lookup touches a contiguous range.
+        """
+        if self._seed_buyers_ready:
+            return
+        con = self.con
+        assert con is not None
         con.execute(
             """
-            CREATE VIEW v_cf_max_date AS
-            SELECT MAX(t_dat) AS dmax
-            FROM v_cf_transactions
+            CREATE OR REPLACE TEMP TABLE t_seed_buyers AS
+            SELECT
+                article_idx,
+                customer_idx,
+                cnt,
+                ROW_NUMBER() OVER (
+                    PARTITION BY article_idx ORDER BY last_offset ASC, customer_idx ASC
+                )::INTEGER AS buyer_rank
+            FROM (
+                SELECT
+                    article_idx,
+                    customer_idx,
+                    COUNT(*) AS cnt,
+                    MIN(day_offset) AS last_offset
+                FROM v_cf_transactions
+                GROUP BY article_idx, customer_idx
+            )
+            ORDER BY article_idx, buyer_rank
+            """
+        )
+        self._seed_buyers_ready = True
+
+    def _buyer_cap_sql(self, alias: str) -> str:
+        """AND-condition limiting seed buyers to cf_max_buyers_per_seed ('' without a cap)"""
+        if self.cf_max_buyers_per_seed is None:
+            return ""
+        return f" AND {alias}.buyer_rank <= {int(self.cf_max_buyers_per_seed)}"
+
+    def _prepare_cache(self) -> None:
+        con = self.con
+        assert con is not None
+
+        self._seed_buyers_ready = False
+        self._create_item_features_view()
+
+        # CF window transactions view: only the week partitions overlapping the window are read,
+        # and the window bound comes from the store metadata (no MAX(t_dat) scan).
+        # day_offset / decay_hl{n} are fixed per window (dmax from metadata) -> computed here once
+        store = TransactionStore(self.transactions_path)
+        decay_columns = ",\n                ".join(
+            f"POW(0.5, day_offset::DOUBLE / {h}.0) AS decay_hl{h}" for h in CF_DECAY_HALF_LIVES
+        )
+        con.execute("DROP VIEW IF EXISTS v_transactions_window")
+        con.execute(
+            f"""
+            CREATE VIEW v_transactions_window AS
+            SELECT
+                customer_idx,
+                article_idx,
+                t_dat,
+                day_offset,
+                {decay_columns}
+            FROM (
+                SELECT
+                    customer_idx,
+                    article_idx,
+                    t_dat,
+                    DATE_DIFF('day', t_dat, {store.max_date_sql()})::INTEGER AS day_offset
+                FROM {store.window_sql(int(self.cf_window_days))}
+            )
             """
         )
 
+        # materialize CF window
+        con.execute("DROP TABLE IF EXISTS t_cf_transactions")
+        con.execute("DROP VIEW IF EXISTS v_cf_transactions")
+
+        if self.materialize_transactions:
+            self._materialize_cf_window(store)
+            con.execute("CREATE VIEW v_cf_transactions AS SELECT * FROM t_cf_transactions")
+        else:
+            con.execute("CREATE VIEW v_cf_transactions AS SELECT * FROM v_transactions_window")
+
+        # cache max date for consistent time-decay (from store metadata)
+        con.execute("DROP VIEW IF EXISTS v_cf_max_date")
+        con.execute(f"CREATE VIEW v_cf_max_date AS SELECT {store.max_date_sql()} AS dmax")
+
+        if self.cf_backend == "sql":
+            self.build_item_neighbors(store)
+
         self._cache_ready = True
         logger.info("Cache ready: CF window materialized=%s", self.materialize_transactions)
 
     # ---------------------------
     # Popularity
     # ---------------------------
-    def generate_popularity_candidates(self, top_k: int = 50) -> List[str]:
-        con = self.connect()
-        q = """
-            SELECT article_id
-            FROM v_item_features
-            ORDER BY popularity_rank ASC NULLS LAST, article_id ASC
-            LIMIT ?
+    def _reset_popularity(self) -> None:
+        self._popularity_rank = None
+        self._popularity_list = None
+        self._popularity_norm_cache = {}
+
+    def _load_popularity(self) -> None:
         """
-        rows = con.execute(q, [int(top_k)]).fetchall()
-        return [r[0] for r in rows]
+        Read v_item_features once: every item ordered by (popularity_rank ASC NULLS LAST,
+        article_idx ASC) with score_pop, plus popularity_rank by article_idx for the sparse backend.
+        """
+        cols = self.connect().execute(
+            "SELECT article_idx, popularity_rank FROM v_item_features"
+        ).fetchnumpy()
+        idx = np.asarray(cols["article_idx"], dtype=np.int64)
+        ranks = np.ma.filled(np.ma.asarray(cols["popularity_rank"]).astype(np.float64), np.nan)
+        missing = np.isnan(ranks)
+
+        order = np.lexsort((idx, np.where(missing, np.inf, ranks)))
+        # score_pop = 1 / (1 + popularity_rank), NULL rank -> 1e12
+        r = np.maximum(np.where(missing, 1e12, ranks), 0.0)
+        self._popularity_list = (idx[order], (1.0 / (1.0 + r))[order])
+
+        dense = np.full(int(idx.max()) + 1 if len(idx) else 0, np.nan)
+        dense[idx] = ranks
+        self._popularity_rank = dense
+
+    def _popularity(self) -> Tuple[np.ndarray, np.ndarray]:
+        self.connect()
+        if self._popularity_list is None:
+            self._load_popularity()
+        assert self._popularity_list is not None
+        return self._popularity_list
+
+    def generate_popularity_candidates(self, top_k: int = 50) -> List[int]:
+        items, _ = self._popularity()
+        return items[: max(int(top_k), 0)].tolist()
 
     def generate_popularity_scored(self, top_k: int = 50) -> List[ScoredItem]:
         """
         score_pop = 1 / (1 + popularity_rank)
         """
-        con = self.connect()
-        q = """
-            SELECT article_id, popularity_rank
-            FROM v_item_features
-            ORDER BY popularity_rank ASC NULLS LAST, article_id ASC
-            LIMIT ?
-        """
-        rows = con.execute(q, [int(top_k)]).fetchall()
-
-        out: List[ScoredItem] = []
-        for item_id, pop_rank in rows:
-            r = float(pop_rank) if pop_rank is not None else 1e12
-            r = max(r, 0.0)
-            score = 1.0 / (1.0 + r)
-            out.append(ScoredItem(item_id=str(item_id), score=float(score), source="pop"))
-        return out
+        items, scores = self._popularity()
+        k = max(int(top_k), 0)
+        return [
+            ScoredItem(item_id=int(i), score=float(s), source="pop")
+            for i, s in zip(items[:k].tolist(), scores[:k].tolist())
+        ]
+
+    def _popularity_norm(self, top_k: int) -> Dict[int, float]:
+        """Normalized popularity scores of the top_k list (cached per snapshot; callers must not modify)"""
+        self._popularity()
+        norm = self._popularity_norm_cache.get(int(top_k))
+        if norm is None:
+            norm = self._normalize_scores(self.generate_popularity_scored(top_k=int(top_k)))
+            self._popularity_norm_cache[int(top_k)] = norm
+        return norm
 
     # ---------------------------
     # CF: item-to-item co-purchase
     # ---------------------------
     def generate_cf_scored_item2item(
         self,
-        user_id: str,
+        user_idx: Optional[int],
         top_k: int = 50,
         recent_items: int = 10,
         cooc_top_per_seed: int = 200,
         time_decay_half_life_days: int = 14,
         popularity_penalty_alpha: float = 0.20,
         exclude_already_purchased: bool = True,
+        window_days: Optional[int] = None,
     ) -> List[ScoredItem]:
         """
         CF score intuition:
@@ -210,125 +676,356 @@ class CandidateGenerator:
             (b) co-purchase count
             (c) time decay on co-purchase transactions
         - Apply popularity penalty optionally
+
+        user_idx is the customer surrogate key; None (unknown user) yields no CF candidates.
+
+        Per-seed co-purchase scores come from t_item_neighbors (lookup + sum) when it was
+        built with the same half-life and at least cooc_top_per_seed neighbors per seed;
+        otherwise they are computed with the online self-join. Both give the same ranking.
+
+        window_days (sparse backend) scores over the last window_days days of the loaded window
+        only, from per-day partials (same list as a generator built with cf_window_days=window_days).
         """
+        window_days = self._cf_window(window_days)
         con = self.connect()
+        if user_idx is None:
+            return []
+        if self.cf_backend == "sparse":
+            return self._generate_cf_scored_sparse(
+                int(user_idx), top_k, recent_items, cooc_top_per_seed,
+                time_decay_half_life_days, popularity_penalty_alpha, exclude_already_purchased,
+                window_days,
+            )
         half_life = max(int(time_decay_half_life_days), 1)
+        use_neighbors = self._use_item_neighbors(half_life, int(cooc_top_per_seed))
 
-        # NOTE:
-        # - DuckDB doesn't have great indexing, but sorting temp table helps.
-        # - Limit cooc candidates per seed to control blow-up.
-        q = f"""
-        WITH
-        dmax AS (SELECT dmax FROM v_cf_max_date),
-        user_recent AS (
-            SELECT
-                article_id AS seed_item,
-                t_dat      AS seed_date,
-                ROW_NUMBER() OVER (ORDER BY t_dat DESC, article_id ASC) AS rnk
-            FROM v_cf_transactions
-            WHERE customer_id = ?
-            QUALIFY rnk <= ?
-        ),
-        seed_weighted AS (
+        if use_neighbors:
+            # precomputed per-seed top-N; raw score = seed weight x neighbor score
+            cooc_sql = """
+        cooc_pruned AS (
             SELECT
-                seed_item,
-                seed_date,
-                -- seed recency weight: 0.5^(age/half_life)
-                POW(
-                    0.5,
-                    DATE_DIFF('day', seed_date, (SELECT dmax FROM dmax))::DOUBLE / {half_life}.0
-                ) AS w_seed
-            FROM user_recent
-        ),
-        user_purchased AS (
-            SELECT DISTINCT article_id
-            FROM v_cf_transactions
-            WHERE customer_id = ?
-        ),
+                n.seed_item,
+                n.cand_item,
+                sw.w_seed * n.score AS raw_score
+            FROM seed_weighted sw
+            JOIN t_item_neighbors n
+              ON n.seed_item = sw.seed_item
+            WHERE n.rnk <= ?
+        ),"""
+        else:
+            cooc_sql = f"""
         -- Co-purchase candidates: users who bought seed_item -> other items they bought
         cooc_raw AS (
             SELECT
                 sw.seed_item,
-                t2.article_id AS cand_item,
-                -- weight each co-purchase event by seed weight and time-decay of t2
-                SUM(
-                    sw.w_seed
-                    * POW(
-                        0.5,
-                        DATE_DIFF('day', t2.t_dat, (SELECT dmax FROM dmax))::DOUBLE / {half_life}.0
-                    )
-                ) AS raw_score
+                sw.w_seed,
+                t2.article_idx AS cand_item,
+                -- weight each co-purchase event by time-decay of t2
+                -- (b.cnt: number of the buyer's seed rows)
+                SUM(b.cnt * {cf_decay_sql(half_life, "t2")}) AS score
             FROM seed_weighted sw
-            JOIN v_cf_transactions t1
-              ON t1.article_id = sw.seed_item
+            JOIN t_seed_buyers b
+              ON b.article_idx = sw.seed_item{self._buyer_cap_sql("b")}
             JOIN v_cf_transactions t2
-              ON t2.customer_id = t1.customer_id
-            WHERE t2.article_id <> sw.seed_item
-            GROUP BY sw.seed_item, t2.article_id
+              ON t2.customer_idx = b.customer_idx
+            WHERE t2.article_idx <> sw.seed_item
+            GROUP BY sw.seed_item, sw.w_seed, t2.article_idx
         ),
-        -- control explosion: take top per seed
+        -- control explosion: take top per seed (same ranking as t_item_neighbors.rnk)
         cooc_pruned AS (
-            SELECT *
-            FROM (
-                SELECT
-                    seed_item,
-                    cand_item,
-                    raw_score,
-                    ROW_NUMBER() OVER (PARTITION BY seed_item ORDER BY raw_score DESC, cand_item ASC) AS rr
-                FROM cooc_raw
-            )
-            WHERE rr <= ?
+            SELECT
+                seed_item,
+                cand_item,
+                w_seed * score AS raw_score
+            FROM cooc_raw
+            QUALIFY ROW_NUMBER() OVER (
+                PARTITION BY seed_item
+                ORDER BY ROUND(score, {NEIGHBOR_SCORE_DECIMALS}) DESC, cand_item ASC
+            ) <= ?
+        ),"""
+
+        # seeds (most recent rows, recency weight 0.5^(age/half_life) summed per item) and
+        # purchased items come from the per-user history: O(history), no scan of the window
+        history = self._history()
+        seeds, seed_weights = history.seeds(int(user_idx), int(recent_items), half_life)
+        if len(seeds) == 0:
+            return []
+
+        # NOTE:
+        # - DuckDB doesn't have great indexing, but sorting temp table helps.
+        # - Limit cooc candidates per seed to control blow-up.
+        q = f"""
+        WITH
+        seed_weighted AS (
+            SELECT
+                UNNEST(?::INTEGER[]) AS seed_item,
+                UNNEST(?::DOUBLE[])  AS w_seed
         ),
+        user_purchased AS (
+            SELECT UNNEST(?::INTEGER[]) AS article_idx
+        ),{cooc_sql}
         -- aggregate across seeds
         cand_agg AS (
             SELECT
-                cand_item AS article_id,
+                cand_item AS article_idx,
                 SUM(raw_score) AS score_sum
             FROM cooc_pruned
             GROUP BY cand_item
         ),
         cand_join AS (
             SELECT
-                ca.article_id,
+                ca.article_idx,
                 ca.score_sum,
                 vf.popularity_rank
             FROM cand_agg ca
             LEFT JOIN v_item_features vf
-              ON vf.article_id = ca.article_id
+              ON vf.article_idx = ca.article_idx
         ),
         cand_filtered AS (
             SELECT
-                article_id,
+                article_idx,
                 CASE
                     WHEN popularity_rank IS NULL THEN score_sum
                     ELSE score_sum / (1.0 + ? * LN(1.0 + CAST(popularity_rank AS DOUBLE)))
                 END AS score_cf
             FROM cand_join
-            {"WHERE article_id NOT IN (SELECT article_id FROM user_purchased)" if exclude_already_purchased else ""}
+            {"WHERE article_idx NOT IN (SELECT article_idx FROM user_purchased)" if exclude_already_purchased else ""}
         )
-        SELECT article_id, score_cf
+        SELECT article_idx, score_cf
         FROM cand_filtered
-        ORDER BY score_cf DESC, article_id ASC
+        ORDER BY score_cf DESC, article_idx ASC
         LIMIT ?
         """
 
         params = [
-            str(user_id),
-            int(recent_items),
-            str(user_id),
+            seeds.tolist(),
+            seed_weights.tolist(),
+            history.purchased(int(user_idx)).tolist() if exclude_already_purchased else [],
             int(cooc_top_per_seed),
             float(popularity_penalty_alpha),
             int(top_k),
         ]
 
         rows = con.execute(q, params).fetchall()
-        return [ScoredItem(item_id=str(i), score=float(s), source="cf") for i, s in rows]
+        return [ScoredItem(item_id=int(i), score=float(s), source="cf") for i, s in rows]
+
+    def generate_cf_scored_item2item_batch(
+        self,
+        user_idxs: Sequence[Optional[int]],
+        top_k: int = 50,
+        recent_items: int = 10,
+        cooc_top_per_seed: int = 200,
+        time_decay_half_life_days: int = 14,
+        popularity_penalty_alpha: float = 0.20,
+        exclude_already_purchased: bool = True,
+        window_days: Optional[int] = None,
+    ) -> List[List[ScoredItem]]:
+        """
+        generate_cf_scored_item2item for many users at once (same lists, input order).
+
+        SQL backend: one query over all users. Per-seed co-purchase neighbors are computed
+        (or looked up in t_item_neighbors) once for the union of the users' seeds, since
+        per-seed pruning ranks by the seed-independent co-purchase score; then each user's
+        seed weights, penalty, exclusion and top_k are applied with PARTITION BY customer_idx.
+        """
+        window_days = self._cf_window(window_days)
+        con = self.connect()
+        known = sorted({int(u) for u in user_idxs if u is not None})
+        if not known:
+            return [[] for _ in user_idxs]
+
+        if self.cf_backend == "sparse":
+            scored = self._sparse_index().score_batch(
+                known,
+                self._popularity_rank_array(),
+                top_k=int(top_k),
+                recent_items=int(recent_items),
+                cooc_top_per_seed=int(cooc_top_per_seed),
+                time_decay_half_life_days=int(time_decay_half_life_days),
+                popularity_penalty_alpha=float(popularity_penalty_alpha),
+                exclude_already_purchased=exclude_already_purchased,
+                max_buyers_per_seed=self.cf_max_buyers_per_seed,
+                window_days=window_days,
+            )
+            by_user = {
+                u: [ScoredItem(item_id=int(i), score=float(s), source="cf") for i, s in zip(items, scores)]
+                for u, (items, scores) in zip(known, scored)
+            }
+            return [list(by_user.get(u, [])) if u is not None else [] for u in user_idxs]
+
+        half_life = max(int(time_decay_half_life_days), 1)
+        use_neighbors = self._use_item_neighbors(half_life, int(cooc_top_per_seed))
+        if use_neighbors:
+            seed_neighbors_sql = """
+        seed_neighbors AS (
+            SELECT n.seed_item, n.cand_item, n.score
+            FROM t_item_neighbors n
+            SEMI JOIN (SELECT DISTINCT seed_item FROM seed_totals) bs
+              ON bs.seed_item = n.seed_item
+            WHERE n.rnk <= ?
+        ),"""
+        else:
+            seed_neighbors_sql = f"""
+        batch_seeds AS (
+            SELECT DISTINCT seed_item FROM seed_totals
+        ),
+        cooc_raw AS (
+            SELECT
+                bs.seed_item,
+                t2.article_idx AS cand_item,
+                SUM(b.cnt * {cf_decay_sql(half_life, "t2")}) AS score
+            FROM batch_seeds bs
+            JOIN t_seed_buyers b
+              ON b.article_idx = bs.seed_item{self._buyer_cap_sql("b")}
+            JOIN v_cf_transactions t2
+              ON t2.customer_idx = b.customer_idx
+            WHERE t2.article_idx <> bs.seed_item
+            GROUP BY bs.seed_item, t2.article_idx
+        ),
+        seed_neighbors AS (
+            SELECT seed_item, cand_item, score
+            FROM cooc_raw
+            QUALIFY ROW_NUMBER() OVER (
+                PARTITION BY seed_item
+                ORDER BY ROUND(score, {NEIGHBOR_SCORE_DECIMALS}) DESC, cand_item ASC
+            ) <= ?
+        ),"""
+
+        q = f"""
+        WITH
+        batch_users AS (
+            SELECT UNNEST(?::INTEGER[]) AS customer_idx
+        ),
+        user_rows AS (
+            SELECT t.*
+            FROM v_cf_transactions t
+            SEMI JOIN batch_users b
+              ON b.customer_idx = t.customer_idx
+        ),
+        user_recent AS (
+            SELECT
+                customer_idx,
+                article_idx AS seed_item,
+                {cf_decay_sql(half_life)} AS w_row,
+                ROW_NUMBER() OVER (
+                    PARTITION BY customer_idx ORDER BY t_dat DESC, article_idx ASC
+                ) AS rnk
+            FROM user_rows
+            QUALIFY rnk <= ?
+        ),
+        seed_totals AS (
+            SELECT
+                customer_idx,
+                seed_item,
+                SUM(w_row) AS w_seed
+            FROM user_recent
+            GROUP BY customer_idx, seed_item
+        ),{seed_neighbors_sql}
+        cand_agg AS (
+            SELECT
+                st.customer_idx,
+                sn.cand_item AS article_idx,
+                SUM(st.w_seed * sn.score) AS score_sum
+            FROM seed_totals st
+            JOIN seed_neighbors sn
+              ON sn.seed_item = st.seed_item
+            GROUP BY st.customer_idx, sn.cand_item
+        ),
+        cand_filtered AS (
+            SELECT
+                ca.customer_idx,
+                ca.article_idx,
+                CASE
+                    WHEN vf.popularity_rank IS NULL THEN ca.score_sum
+                    ELSE ca.score_sum / (1.0 + ? * LN(1.0 + CAST(vf.popularity_rank AS DOUBLE)))
+                END AS score_cf
+            FROM cand_agg ca
+            LEFT JOIN v_item_features vf
+              ON vf.article_idx = ca.article_idx
+            {"ANTI JOIN user_rows ur ON ur.customer_idx = ca.customer_idx AND ur.article_idx = ca.article_idx"
+             if exclude_already_purchased else ""}
+        )
+        SELECT customer_idx, article_idx, score_cf
+        FROM cand_filtered
+        QUALIFY ROW_NUMBER() OVER (
+            PARTITION BY customer_idx ORDER BY score_cf DESC, article_idx ASC
+        ) <= ?
+        ORDER BY customer_idx, score_cf DESC, article_idx ASC
+        """
+
+        params = [
+            known,
+            int(recent_items),
+            int(cooc_top_per_seed),
+            float(popularity_penalty_alpha),
+            int(top_k),
+        ]
+        by_user: Dict[int, List[ScoredItem]] = {}
+        for u, i, s in con.execute(q, params).fetchall():
+            by_user.setdefault(int(u), []).append(ScoredItem(item_id=int(i), score=float(s), source="cf"))
+        return [list(by_user.get(int(u), [])) if u is not None else [] for u in user_idxs]
+
+    def _cf_window(self, window_days: Optional[int]) -> Optional[int]:
+        """
+        Validate a CF request's window_days: None for the loaded window (cf_window_days);
+        shorter windows are cut from the sparse backend's per-day partials.
+        """
+        if window_days is None or int(window_days) == int(self.cf_window_days):
+            return None
+        if not 0 <= int(window_days) <= int(self.cf_window_days):
+            raise ValueError(
+                f"window_days must be in [0, cf_window_days={self.cf_window_days}]: {window_days}"
+            )
+        if self.cf_backend != "sparse":
+            raise ValueError("window_days shorter than cf_window_days needs cf_backend='sparse'")
+        return int(window_days)
+
+    def _history(self) -> UserHistoryIndex:
+        if self._user_history is None:
+            self._user_history = UserHistoryIndex.from_connection(self.connect())
+        return self._user_history
+
+    def _sparse_index(self) -> SparseCFIndex:
+        if self._sparse_cf is None:
+            self._sparse_cf = SparseCFIndex.from_history(self._history())
+        return self._sparse_cf
+
+    def _popularity_rank_array(self) -> np.ndarray:
+        """popularity_rank by article_idx (NaN: no rank) for the sparse backend"""
+        self._popularity()
+        assert self._popularity_rank is not None
+        return self._popularity_rank
+
+    def _generate_cf_scored_sparse(
+        self,
+        user_idx: int,
+        top_k: int,
+        recent_items: int,
+        cooc_top_per_seed: int,
+        time_decay_half_life_days: int,
+        popularity_penalty_alpha: float,
+        exclude_already_purchased: bool,
+        window_days: Optional[int] = None,
+    ) -> List[ScoredItem]:
+        items, scores = self._sparse_index().score(
+            user_idx,
+            self._popularity_rank_array(),
+            top_k=int(top_k),
+            recent_items=int(recent_items),
+            cooc_top_per_seed=int(cooc_top_per_seed),
+            time_decay_half_life_days=int(time_decay_half_life_days),
+            popularity_penalty_alpha=float(popularity_penalty_alpha),
+            exclude_already_purchased=exclude_already_purchased,
+            max_buyers_per_seed=self.cf_max_buyers_per_seed,
+            window_days=window_days,
+        )
+        return [ScoredItem(item_id=int(i), score=float(s), source="cf") for i, s in zip(items, scores)]
 
     # ---------------------------
     # Merge: robust normalization + deterministic ranking
     # ---------------------------
     @staticmethod
-    def _normalize_scores(items: List[ScoredItem]) -> Dict[str, float]:
+    def _normalize_scores(items: List[ScoredItem]) -> Dict[int, float]:
         """
         Robust normalization for merging:
         - apply log1p to reduce heavy-tail
@@ -345,14 +1042,48 @@ class CandidateGenerator:
             # all same -> give 1.0 to all
             return {k: 1.0 for k in raw.keys()}
 
-        out: Dict[str, float] = {}
+        out: Dict[int, float] = {}
         for (k, v), lv in zip(raw.items(), vals):
             out[k] = (lv - vmin) / (vmax - vmin)
         return out
 
+    def _merge_scored(
+        self,
+        pop_norm: Dict[int, float],
+        cf_scored: List[ScoredItem],
+        total_k: int,
+        w_pop: float,
+        w_cf: float,
+        expanded_norm: Callable[[], Dict[int, float]],
+    ) -> List[int]:
+        """Weighted merge of normalized pop / cf scores for one user (pop_norm is not modified)."""
+        pop_norm = dict(pop_norm)
+        cf_norm = self._normalize_scores(cf_scored)
+
+        # union
+        all_ids = set(pop_norm.keys()) | set(cf_norm.keys())
+        if len(all_ids) < total_k:
+            # expand popularity to fill
+            for k, v in expanded_norm().items():
+                if len(all_ids) >= total_k:
+                    break
+                if k not in all_ids:
+                    pop_norm[k] = v
+                    all_ids.add(k)
+
+        # deterministic ranking
+        def key_fn(item_id: int) -> Tuple[float, float, float, int]:
+            ps = float(pop_norm.get(item_id, 0.0))
+            cs = float(cf_norm.get(item_id, 0.0))
+            final = float(w_pop) * ps + float(w_cf) * cs
+            return (final, cs, ps, item_id)
+
+        ranked = sorted(all_ids, key=key_fn, reverse=True)
+        return ranked[:total_k]
+
     def merge_candidates(
         self,
-        user_id: str,
+        user_idx: Optional[int],
         total_k: int = 100,
         pop_top: int = 200,
         cf_top: int = 300,
@@ -363,14 +1094,13 @@ class CandidateGenerator:
         time_decay_half_life_days: int = 14,
         popularity_penalty_alpha: float = 0.20,
         fallback_pop_expand: int = 1000,
-    ) -> List[str]:
+    ) -> List[int]:
         total_k = int(total_k)
         if total_k <= 0:
             return []
 
-        pop_scored = self.generate_popularity_scored(top_k=int(pop_top))
         cf_scored = self.generate_cf_scored_item2item(
-            user_id=user_id,
+            user_idx=user_idx,
             top_k=int(cf_top),
             recent_items=int(recent_items),
             cooc_top_per_seed=int(cooc_top_per_seed),
@@ -378,38 +1108,68 @@ class CandidateGenerator:
             popularity_penalty_alpha=float(popularity_penalty_alpha),
         )
 
-        # normalize within each source
-        pop_norm = self._normalize_scores(pop_scored)
-        cf_norm = self._normalize_scores(cf_scored)
+        # normalize within each source (popularity: cached per snapshot)
+        return self._merge_scored(
+            self._popularity_norm(int(pop_top)),
+            cf_scored,
+            total_k,
+            w_pop,
+            w_cf,
+            lambda: self._popularity_norm(int(fallback_pop_expand)),
+        )
 
-        # union
-        all_ids = set(pop_norm.keys()) | set(cf_norm.keys())
-        if len(all_ids) < total_k:
-            # expand popularity to fill
-            expanded = self.generate_popularity_scored(top_k=int(fallback_pop_expand))
-            exp_norm = self._normalize_scores(expanded)
-            for k, v in exp_norm.items():
-                if len(all_ids) >= total_k:
-                    break
-                if k not in all_ids:
-                    pop_norm[k] = v
-                    all_ids.add(k)
+    def merge_candidates_batch(
+        self,
+        user_idxs: Sequence[Optional[int]],
+        total_k: int = 100,
+        pop_top: int = 200,
+        cf_top: int = 300,
+        w_pop: float = 0.30,
+        w_cf: float = 0.70,
+        recent_items: int = 10,
+        cooc_top_per_seed: int = 200,
+        time_decay_half_life_days: int = 14,
+        popularity_penalty_alpha: float = 0.20,
+        fallback_pop_expand: int = 1000,
+    ) -> List[List[int]]:
+        """
+        merge_candidates for many users: one CF pass for the whole batch
+        (generate_cf_scored_item2item_batch), popularity lists computed once.
 
-        # deterministic ranking
-        def key_fn(item_id: str) -> Tuple[float, float, float, str]:
-            ps = float(pop_norm.get(item_id, 0.0))
-            cs = float(cf_norm.get(item_id, 0.0))
-            final = float(w_pop) * ps + float(w_cf) * cs
-            return (final, cs, ps, item_id)
+        Returns:
+            per-user candidate lists in input order, identical to merge_candidates
+        """
+        total_k = int(total_k)
+        if total_k <= 0:
+            return [[] for _ in user_idxs]
 
-        ranked = sorted(all_ids, key=key_fn, reverse=True)
-        return ranked[:total_k]
+        pop_norm = self._popularity_norm(int(pop_top))
+        cf_batch = self.generate_cf_scored_item2item_batch(
+            user_idxs,
+            top_k=int(cf_top),
+            recent_items=int(recent_items),
+            cooc_top_per_seed=int(cooc_top_per_seed),
+            time_decay_half_life_days=int(time_decay_half_life_days),
+            popularity_penalty_alpha=float(popularity_penalty_alpha),
+        )
+        return [
+            self._merge_scored(
+                pop_norm, cf_scored, total_k, w_pop, w_cf,
+                lambda: self._popularity_norm(int(fallback_pop_expand)),
+            )
+            for cf_scored in cf_batch
+        ]
 
     def close(self) -> None:
         if self.con is not None:
             self.con.close()
             self.con = None
         self._cache_ready = False
+        self._item_neighbors_ready = False
+        self._sparse_cf = None
+        self._user_history = None
+        self._seed_buyers_ready = False
+        self._reset_popularity()
 
 
 def main():
@@ -417,8 +1177,7 @@ def main():
 
     gen = CandidateGenerator(
         db_path="local_helix.db",
-        transactions_path="data/raw/transactions_train.csv",
-        item_features_path="data/features/item_features.parquet",
+        transactions_path="data/processed/transactions",
         cf_window_days=28,
         materialize_transactions=True,
     )
@@ -426,9 +1185,9 @@ def main():
     try:
         con = gen.connect()
         sample_user = con.execute(
-            """
-            SELECT customer_id
-            FROM read_parquet('data/features/user_features.parquet')
+            f"""
+            SELECT customer_idx
+            FROM read_parquet('{resolve_feature_path("user_features.parquet")}')
             LIMIT 1
             """
         ).fetchone()[0]
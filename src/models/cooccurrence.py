@@ -0,0 +1,345 @@
+"""
+Co-occurrence Store Module
+
+Sliding-window item x item co-purchase scores, maintained day by day
+(CandidateGenerator(item_neighbors_incremental=True)).
+
+score(seed, cand) is the t_item_neighbors score: SUM over customers c of
+count(c, seed) x SUM over c's cand rows of 0.5^(age/half_life), i.e. P = A^T B with
+A = user x item counts and B = user x item decayed weights over the CF window.
+
+When the window moves one day, A and B change only in the rows of customers who bought
+on the day that enters (a, b) or the day that leaves, so
+
+    add:    P += a^T (B + b) + A^T b
+    remove: P -= a^T B + A^T b - a^T b      (A, B still include the leaving day)
+
+touch only those customers' histories, and top-N neighbors are re-ranked only for items
+whose pair row changed. A daily refresh costs O(customers of the two days x their history)
+instead of a full window self-join.
+
+Time decay is anchored: B stores 2^((t_dat - anchor)/half_life), so moving the window
+end does not rewrite old weights (all scores scale by one factor, ranks do not change);
+scores are rescaled to 0.5^(age/half_life) when the neighbor table is exported, and the
+anchor is rebased once it falls a window behind to keep magnitudes bounded.
+
+Assumes days already inside the window are not rewritten (append-only partitions);
+a backfill needs a rebuild.
+"""
+
+from __future__ import annotations
+
+import duckdb
+import numpy as np
+import pyarrow as pa
+from datetime import date, timedelta
+from pathlib import Path
+from scipy import sparse
+from typing import Optional, Tuple
+import logging
+
+from ..data.transaction_store import TransactionStore
+from .sparse_cf import NEIGHBOR_SCORE_DECIMALS
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class CooccurrenceStore:
+    """Item x item co-purchase scores of one CF window + top-N neighbors per seed item"""
+
+    def __init__(self, window_days: int = 28, half_life: int = 14, top_n: int = 200):
+        """
+        Args:
+            window_days: CF window length (rows with t_dat >= end - window_days, like cf_window_days)
+            half_life: time-decay half-life in days
+            top_n: neighbors kept per seed item
+        """
+        self.window_days = int(window_days)
+        self.half_life = max(int(half_life), 1)
+        self.top_n = int(top_n)
+
+        self.end_date: Optional[date] = None
+        self.anchor: Optional[date] = None
+        self.counts = sparse.csr_matrix((0, 0))  # A: user x item
+        self.decay = sparse.csr_matrix((0, 0))  # B: user x item, anchored weights
+        self.pairs = sparse.csr_matrix((0, 0))  # P = A^T B: item x item, anchored
+        # top-N neighbors per seed item, flat: seed i -> nb_cand / nb_score[nb_indptr[i]:nb_indptr[i+1]]
+        # in (score DESC, cand ASC) order
+        self.nb_indptr = np.zeros(1, dtype=np.int64)
+        self.nb_cand = np.empty(0, dtype=np.int32)
+        self.nb_score = np.empty(0)
+
+    # ---------------------------
+    # Window bookkeeping
+    # ---------------------------
+    @property
+    def start_date(self) -> Optional[date]:
+        if self.end_date is None:
+            return None
+        return self.end_date - timedelta(days=self.window_days)
+
+    def _weight(self, day: date) -> float:
+        """Anchored decay weight of a row on day: 2^((day - anchor)/half_life)"""
+        return 2.0 ** ((day - self.anchor).days / self.half_life)
+
+    def _grow(self, n_users: int, n_items: int) -> None:
+        """Widen the matrices when new customer / article ids show up"""
+        n_users = max(n_users, self.counts.shape[0])
+        n_items = max(n_items, self.counts.shape[1])
+        if (n_users, n_items) == self.counts.shape:
+            return
+        self.counts.resize((n_users, n_items))
+        self.decay.resize((n_users, n_items))
+        self.pairs.resize((n_items, n_items))
+        grow = n_items + 1 - len(self.nb_indptr)
+        self.nb_indptr = np.append(self.nb_indptr, np.full(grow, self.nb_indptr[-1]))
+
+    def _day_matrices(
+        self, con: duckdb.DuckDBPyConnection, store: TransactionStore, day: date
+    ) -> Tuple[sparse.csr_matrix, sparse.csr_matrix]:
+        """(counts, anchored decay) user x item matrices of one day's rows"""
+        cols = con.execute(
+            f"SELECT customer_idx, article_idx FROM {store.day_sql(day)}"
+        ).fetchnumpy()
+        users = np.asarray(cols["customer_idx"], dtype=np.int32)
+        items = np.asarray(cols["article_idx"], dtype=np.int32)
+        if len(users):
+            self._grow(int(users.max()) + 1, int(items.max()) + 1)
+        ones = np.ones(len(users), dtype=np.float64)
+        a = sparse.csr_matrix((ones, (users, items)), shape=self.counts.shape)
+        return a, a * self._weight(day)
+
+    # ---------------------------
+    # Build / update
+    # ---------------------------
+    def rebuild(self, con: duckdb.DuckDBPyConnection, store: TransactionStore, end: date) -> None:
+        """Full build of the window ending at end (one A^T B product)"""
+        self.end_date = end
+        self.anchor = self.start_date
+        cols = con.execute(
+            f"""
+            SELECT
+                customer_idx,
+                article_idx,
+                DATE_DIFF('day', DATE '{self.anchor.isoformat()}', t_dat)::INTEGER AS day_index
+            FROM {store.scan_sql(self.start_date)}
+            WHERE t_dat <= DATE '{end.isoformat()}'
+            """
+        ).fetchnumpy()
+        users = np.asarray(cols["customer_idx"], dtype=np.int32)
+        items = np.asarray(cols["article_idx"], dtype=np.int32)
+        shape = (
+            int(users.max()) + 1 if len(users) else 0,
+            int(items.max()) + 1 if len(items) else 0,
+        )
+        weights = np.power(2.0, np.asarray(cols["day_index"], dtype=np.float64) / self.half_life)
+        self.counts = sparse.csr_matrix(
+            (np.ones(len(users), dtype=np.float64), (users, items)), shape=shape
+        )
+        self.decay = sparse.csr_matrix((weights, (users, items)), shape=shape)
+        self.pairs = (self.counts.T.tocsr() @ self.decay).tocsr()
+        self.nb_indptr = np.zeros(shape[1] + 1, dtype=np.int64)
+        self.nb_cand = np.empty(0, dtype=np.int32)
+        self.nb_score = np.empty(0)
+        self._refresh_neighbors(np.arange(shape[1]))
+        logger.info(
+            "Co-occurrence store built for %s..%s: %d pairs, %d neighbor rows",
+            self.start_date, end, self.pairs.nnz, len(self.nb_cand),
+        )
+
+    def _apply_day(self, a: sparse.csr_matrix, b: sparse.csr_matrix, sign: int) -> np.ndarray:
+        """Add (sign=1) or remove (sign=-1) one day's rows; returns items whose pair row changed"""
+        users = np.flatnonzero(np.diff(a.indptr))
+        if len(users) == 0:
+            return np.empty(0, dtype=np.int64)
+        a_u, b_u = a[users], b[users]
+        A_u, B_u = self.counts[users], self.decay[users]
+        a_t = a_u.T.tocsr()
+        if sign > 0:
+            delta = a_t @ (B_u + b_u) + A_u.T.tocsr() @ b_u
+        else:
+            delta = a_t @ B_u + A_u.T.tocsr() @ b_u - a_t @ b_u
+        delta = delta.tocsr()
+        self.pairs = (self.pairs + sign * delta).tocsr()
+        self.counts = (self.counts + sign * a).tocsr()
+        self.decay = (self.decay + sign * b).tocsr()
+        return np.flatnonzero(np.diff(delta.indptr))
+
+    def _prune(self) -> None:
+        """
+        Drop float residue left by subtraction: every remaining entry has at least one
+        row in the window, i.e. is >= the weight of the window's first day.
+        """
+        floor = 0.5 * self._weight(self.start_date)
+        for mat in (self.pairs, self.decay):
+            mat.data[np.abs(mat.data) < floor] = 0.0
+            mat.eliminate_zeros()
+        self.counts.data[self.counts.data < 0.5] = 0.0
+        self.counts.eliminate_zeros()
+
+    def _rebase(self) -> None:
+        """Move the decay anchor to the window start (one uniform rescale of B, P and neighbors)"""
+        factor = self._weight(self.start_date)
+        self.decay.data /= factor
+        self.pairs.data /= factor
+        self.nb_score /= factor
+        self.anchor = self.start_date
+
+    def advance(self, con: duckdb.DuckDBPyConnection, store: TransactionStore) -> int:
+        """
+        Move the window one day forward: add end+1, remove the day that falls out.
+
+        Returns:
+            number of seed items whose neighbors were re-ranked
+        """
+        assert self.end_date is not None, "rebuild() first"
+        leaving = self.start_date
+        self.end_date = self.end_date + timedelta(days=1)
+
+        dirty = [self._apply_day(*self._day_matrices(con, store, self.end_date), sign=1)]
+        dirty.append(self._apply_day(*self._day_matrices(con, store, leaving), sign=-1))
+        self._prune()
+        if (self.start_date - self.anchor).days >= self.window_days:
+            self._rebase()
+
+        dirty_items = np.unique(np.concatenate(dirty))
+        self._refresh_neighbors(dirty_items)
+        return len(dirty_items)
+
+    def sync(self, con: duckdb.DuckDBPyConnection, store: TransactionStore) -> int:
+        """
+        Bring the window end to store.max_date(): day-by-day advance when the store moved
+        forward by less than a window, full rebuild otherwise.
+
+        Returns:
+            number of days advanced (-1: rebuilt)
+        """
+        target = store.max_date()
+        if (
+            self.end_date is None
+            or target < self.end_date
+            or (target - self.end_date).days > self.window_days
+        ):
+            self.rebuild(con, store, target)
+            return -1
+        days = (target - self.end_date).days
+        for _ in range(days):
+            changed = self.advance(con, store)
+            logger.info("Co-occurrence window advanced to %s (%d seed items re-ranked)",
+                        self.end_date, changed)
+        return days
+
+    def _refresh_neighbors(self, items: np.ndarray) -> None:
+        """
+        Re-rank the top-N neighbors of the given seed items from their pair rows
+        (one pass over those rows: stable sorts by score DESC, then by seed, keep rank < top_n).
+        Scores are compared as exported (rounded to NEIGHBOR_SCORE_DECIMALS), like the SQL build.
+        """
+        items = np.asarray(items, dtype=np.int64)
+        sub = self.pairs[items]
+        sub.sort_indices()
+        row = np.repeat(np.arange(len(items)), np.diff(sub.indptr))
+        keep = sub.indices != items[row]
+        row, cand, score = row[keep], sub.indices[keep], sub.data[keep]
+
+        # cand ASC within equal scores comes from the sorted indices + stable sorts
+        scale = 0.5 ** ((self.end_date - self.anchor).days / self.half_life)
+        order = np.argsort(-np.round(score * scale, NEIGHBOR_SCORE_DECIMALS), kind="stable")
+        order = order[np.argsort(row[order], kind="stable")]
+        row, cand, score = row[order], cand[order], score[order]
+        row_start = np.searchsorted(row, np.arange(len(items)))
+        rank = np.arange(len(row)) - row_start[row]
+        top = rank < self.top_n
+        row, cand, score, rank = row[top], cand[top], score[top], rank[top]
+
+        # splice: untouched seeds keep their slices, re-ranked seeds get the new ones
+        lengths = np.diff(self.nb_indptr)
+        lengths[items] = np.bincount(row, minlength=len(items))
+        indptr = np.zeros(len(lengths) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=indptr[1:])
+        new_cand = np.empty(indptr[-1], dtype=np.int32)
+        new_score = np.empty(indptr[-1])
+
+        old_seed = np.repeat(np.arange(len(lengths)), np.diff(self.nb_indptr))
+        kept = np.ones(len(lengths), dtype=bool)
+        kept[items] = False
+        kept = kept[old_seed]
+        old_seed = old_seed[kept]
+        dest = indptr[old_seed] + (np.flatnonzero(kept) - self.nb_indptr[old_seed])
+        new_cand[dest] = self.nb_cand[kept]
+        new_score[dest] = self.nb_score[kept]
+
+        dest = indptr[items[row]] + rank
+        new_cand[dest] = cand
+        new_score[dest] = score
+        self.nb_indptr, self.nb_cand, self.nb_score = indptr, new_cand, new_score
+
+    # ---------------------------
+    # Export / persistence
+    # ---------------------------
+    def neighbor_table(self) -> pa.Table:
+        """t_item_neighbors rows (seed_item, cand_item, score, rnk), scores as 0.5^(age/half_life) sums"""
+        scale = 0.5 ** ((self.end_date - self.anchor).days / self.half_life)
+        lengths = np.diff(self.nb_indptr)
+        seeds = np.repeat(np.arange(len(lengths), dtype=np.int32), lengths)
+        return pa.table({
+            "seed_item": seeds,
+            "cand_item": self.nb_cand,
+            "score": self.nb_score * scale,
+            "rnk": (np.arange(len(seeds)) - self.nb_indptr[seeds] + 1).astype(np.int32),
+        })
+
+    def save(self, path: Path) -> None:
+        """Write the store to an .npz (tmp + replace)"""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        arrays = {
+            "meta": np.array([
+                self.window_days, self.half_life, self.top_n,
+                self.end_date.toordinal(), self.anchor.toordinal(),
+            ], dtype=np.int64),
+            "nb_indptr": self.nb_indptr,
+            "nb_cand": self.nb_cand,
+            "nb_score": self.nb_score,
+        }
+        for name in ("counts", "decay", "pairs"):
+            mat = getattr(self, name)
+            arrays[f"{name}_data"] = mat.data
+            arrays[f"{name}_indices"] = mat.indices
+            arrays[f"{name}_indptr"] = mat.indptr
+            arrays[f"{name}_shape"] = np.asarray(mat.shape, dtype=np.int64)
+        tmp = path.with_name(path.name + ".tmp.npz")
+        np.savez(tmp, **arrays)
+        tmp.replace(path)
+
+    @classmethod
+    def load(
+        cls, path: Path, window_days: int, half_life: int, top_n: int
+    ) -> Optional["CooccurrenceStore"]:
+        """Load a saved store; None if missing, unreadable or built with other parameters"""
+        path = Path(path)
+        if not path.exists():
+            return None
+        try:
+            with np.load(path) as f:
+                arrays = {name: f[name] for name in f.files}
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning("Could not load co-occurrence store %s: %s", path, e)
+            return None
+        window, hl, n, end, anchor = (int(v) for v in arrays["meta"])
+        store = cls(window_days, half_life, top_n)
+        if (window, hl, n) != (store.window_days, store.half_life, store.top_n):
+            return None
+        store.end_date = date.fromordinal(end)
+        store.anchor = date.fromordinal(anchor)
+        for name in ("counts", "decay", "pairs"):
+            setattr(store, name, sparse.csr_matrix(
+                (arrays[f"{name}_data"], arrays[f"{name}_indices"], arrays[f"{name}_indptr"]),
+                shape=tuple(int(v) for v in arrays[f"{name}_shape"]),
+            ))
+        store.nb_indptr = arrays["nb_indptr"]
+        store.nb_cand = arrays["nb_cand"]
+        store.nb_score = arrays["nb_score"]
+        logger.info("Co-occurrence store loaded from %s (window end %s)", path, store.end_date)
+        return store
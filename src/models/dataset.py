@@ -19,10 +19,18 @@ import polars as pl
 from typing import Tuple, List
 import logging
 
+from ..data.feature_snapshot import resolve_feature_path
+from ..data.transaction_store import TransactionStore
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+# Ranker 입력 Feature (Feature Parquet에서 이 컬럼만 읽음, serving.py와 공유)
+USER_FEATURE_COLUMNS = ["avg_purchase_hour", "purchase_count", "recency", "unique_items"]
+ITEM_FEATURE_COLUMNS = ["popularity_rank", "sales_count", "peak_hour"]
+
+
 def create_ranking_dataset(
     db_path: str = ":memory:",
     sample_users: int = 10000,
@@ -30,6 +38,7 @@ def create_ranking_dataset(
     window_days: int = 28,
     popularity_pool: int = 2000,
     seed: int = 42,
+    transactions_path: str = "data/processed/transactions",
 ) -> Tuple[pl.DataFrame, pl.DataFrame, List[int]]:
     """
     Args:
@@ -39,6 +48,7 @@ def create_ranking_dataset(
         window_days: 최근 거래 window
         popularity_pool: negative 후보 인기 pool 크기 (너무 작으면 충돌↑)
         seed: 재현성 seed
+        transactions_path: 주 단위 파티션 트랜잭션 저장소
 
     Returns:
         (features, labels, group)
@@ -55,25 +65,22 @@ def create_ranking_dataset(
     except Exception:
         pass
 
+    store = TransactionStore(transactions_path)
+
     query = f"""
     WITH
-    -- 1) 최근 window로 transaction 제한 (1회 스캔 + window 통일)
-    t_all AS (
-        SELECT
-            customer_id::VARCHAR AS customer_id,
-            article_id::VARCHAR  AS article_id,
-            CAST(t_dat AS DATE)  AS t_dat
-        FROM read_csv_auto('data/raw/transactions_train.csv', header=true)
-    ),
+    -- 1) 최근 window로 transaction 제한 (window 파티션만 스캔, MAX(t_dat)는 메타데이터)
     t_recent AS (
-        SELECT *
-        FROM t_all
-        WHERE t_dat >= (SELECT MAX(t_dat) - INTERVAL '{int(window_days)} days' FROM t_all)
+        SELECT
+            customer_idx,
+            article_idx,
+            t_dat
+        FROM {store.window_sql(int(window_days))}
     ),
 
     -- 2) 유저 샘플링: 최근 window에서 활동한 유저
     sampled_users AS (
-        SELECT DISTINCT customer_id
+        SELECT DISTINCT customer_idx
         FROM t_recent
         ORDER BY random()
         LIMIT {int(sample_users)}
@@ -81,55 +88,55 @@ def create_ranking_dataset(
 
     -- 3) 유저별 positive 1개: 가장 최근 구매 1개(타이브레이크 포함)
     user_pos AS (
-        SELECT customer_id, article_id, 1 AS label
+        SELECT customer_idx, article_idx, 1 AS label
         FROM (
             SELECT
-                tr.customer_id,
-                tr.article_id,
+                tr.customer_idx,
+                tr.article_idx,
                 tr.t_dat,
                 ROW_NUMBER() OVER (
-                    PARTITION BY tr.customer_id
-                    ORDER BY tr.t_dat DESC, tr.article_id ASC
+                    PARTITION BY tr.customer_idx
+                    ORDER BY tr.t_dat DESC, tr.article_idx ASC
                 ) AS rn
             FROM t_recent tr
             INNER JOIN sampled_users su
-                ON tr.customer_id = su.customer_id
+                ON tr.customer_idx = su.customer_idx
         )
         WHERE rn = 1
     ),
 
     -- 4) 유저 구매 이력(최근 window): negative에서 제외
     user_purchased AS (
-        SELECT DISTINCT customer_id, article_id
+        SELECT DISTINCT customer_idx, article_idx
         FROM t_recent
-        INNER JOIN sampled_users USING(customer_id)
+        INNER JOIN sampled_users USING(customer_idx)
     ),
 
     -- 5) 인기 pool(negative 후보 아이템 pool) 크게 잡기
     pop_pool AS (
-        SELECT article_id::VARCHAR AS article_id
-        FROM read_parquet('data/features/item_features.parquet')
-        ORDER BY popularity_rank ASC, article_id ASC
+        SELECT article_idx
+        FROM read_parquet('{resolve_feature_path("item_features.parquet")}')
+        ORDER BY popularity_rank ASC, article_idx ASC
         LIMIT {int(popularity_pool)}
     ),
 
     -- 6) 유저별 negative 샘플: pop_pool에서 구매이력 제외 후 유저당 N개
     user_neg AS (
-        SELECT customer_id, article_id, 0 AS label
+        SELECT customer_idx, article_idx, 0 AS label
         FROM (
             SELECT
-                su.customer_id,
-                pp.article_id,
+                su.customer_idx,
+                pp.article_idx,
                 ROW_NUMBER() OVER (
-                    PARTITION BY su.customer_id
+                    PARTITION BY su.customer_idx
                     ORDER BY random()
                 ) AS rn
             FROM sampled_users su
             CROSS JOIN pop_pool pp
             LEFT JOIN user_purchased up
-                ON up.customer_id = su.customer_id
-               AND up.article_id  = pp.article_id
-            WHERE up.article_id IS NULL
+                ON up.customer_idx = su.customer_idx
+               AND up.article_idx  = pp.article_idx
+            WHERE up.article_idx IS NULL
         )
         WHERE rn <= {int(negative_per_user)}
     ),
@@ -141,35 +148,35 @@ def create_ranking_dataset(
     )
 
     SELECT
-        s.customer_id,
-        s.article_id,
+        s.customer_idx,
+        s.article_idx,
         s.label,
 
         -- user features
-        uf.avg_purchase_hour,
-        uf.purchase_count,
-        uf.recency,
-        uf.unique_items,
+        {", ".join(f"uf.{c}" for c in USER_FEATURE_COLUMNS)},
 
         -- item features
-        it.popularity_rank,
-        it.sales_count,
-        it.peak_hour
+        {", ".join(f"it.{c}" for c in ITEM_FEATURE_COLUMNS)}
 
     FROM all_samples s
-    INNER JOIN read_parquet('data/features/user_features.parquet') uf
-        ON s.customer_id = uf.customer_id
-    INNER JOIN read_parquet('data/features/item_features.parquet') it
-        ON s.article_id = it.article_id
-    ORDER BY s.customer_id ASC, s.label DESC, s.article_id ASC
+    INNER JOIN (
+        SELECT customer_idx, {", ".join(USER_FEATURE_COLUMNS)}
+        FROM read_parquet('{resolve_feature_path("user_features.parquet")}')
+    ) uf
+        ON s.customer_idx = uf.customer_idx
+    INNER JOIN (
+        SELECT article_idx, {", ".join(ITEM_FEATURE_COLUMNS)}
+        FROM read_parquet('{resolve_feature_path("item_features.parquet")}')
+    ) it
+        ON s.article_idx = it.article_idx
+    ORDER BY s.customer_idx ASC, s.label DESC, s.article_idx ASC
     """
 
     logger.info("SQL 실행 중...")
-    pdf = con.execute(query).fetch_df()
+    # Arrow 결과를 Polars로 바로 받음 (pandas 변환 없음)
+    df = con.execute(query).pl()
     con.close()
 
-    df = pl.from_pandas(pdf)
-
     # 최소 sanity check
     pos = df.filter(pl.col("label") == 1).height
     neg = df.filter(pl.col("label") == 0).height
@@ -178,21 +185,18 @@ def create_ranking_dataset(
     # 유저당 정확히 1 pos인지 확인 (깨지면 데이터가 꼬인 것)
     per_user_pos = (
         df.filter(pl.col("label") == 1)
-          .group_by("customer_id")
+          .group_by("customer_idx")
           .len()
           .select(pl.col("len").min().alias("min_pos"), pl.col("len").max().alias("max_pos"))
     )
     logger.info(f"per-user pos count(min/max): {per_user_pos.row(0)}")
 
-    feature_cols = [
-        "avg_purchase_hour", "purchase_count", "recency", "unique_items",
-        "popularity_rank", "sales_count", "peak_hour"
-    ]
+    feature_cols = USER_FEATURE_COLUMNS + ITEM_FEATURE_COLUMNS
     features = df.select(feature_cols)
     labels = df.select("label")
 
-    # group 생성: customer_id별 row 수
-    group_df = df.group_by("customer_id").len().sort("customer_id")
+    # group 생성: customer_idx별 row 수
+    group_df = df.group_by("customer_idx").len().sort("customer_idx")
     group = group_df["len"].to_list()
 
     # group과 row수 일치 체크
@@ -6,19 +6,26 @@ Recommendation Serving Module (Improved)
 2) Feature 생성 벡터화: Python loop 제거
 3) 결측/타입 안전화: None/NaN 처리, dtype 정리
 4) fallback 정책 통일: 모델 없거나 오류 시 deterministic fallback
+5) 내부는 int32 surrogate key(customer_idx / article_idx)만 사용,
+   문자열 ID 변환은 recommend() 입구/출구(API 경계)에서만 수행
+6) recommend_batch: 후보 생성(merge_candidates_batch) / user feature 조회를 유저 묶음 단위로 1회 수행
 """
 
 from __future__ import annotations
 
 import polars as pl
 from pathlib import Path
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Sequence
 import logging
+import threading
 import numpy as np
 
 from .candidate_generation import CandidateGenerator
+from .dataset import USER_FEATURE_COLUMNS, ITEM_FEATURE_COLUMNS
 from .ranker import PurchaseRanker
+from ..data.feature_snapshot import resolve_feature_path
 from ..data.feature_store import FeatureStore
+from ..data.id_mapping import IdMapper
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -33,6 +40,9 @@ class RecommendationService:
         candidate_k: int = 300,   # 후보군 크기(성능에 직접 영향)
         top_k_default: int = 10,
         fallback_hour: int = 12,
+        resident_features: bool = True,  # Feature 테이블 메모리 상주 (요청 경로 DuckDB 미사용)
+        snapshot_poll_seconds: Optional[float] = None,  # 설정 시 백그라운드로 새 Feature 스냅샷 감지 / 교체
+        serving_db: bool = False,  # True면 서빙 DB(local_helix.db) key 테이블을 READ_ONLY로 사용
     ):
         self.model_path = model_path
         self.candidate_k = int(candidate_k)
@@ -40,10 +50,48 @@ class RecommendationService:
         self.fallback_hour = int(fallback_hour)
 
         self.ranker: Optional[PurchaseRanker] = None
-        self.candidate_gen = CandidateGenerator()
-        self.feature_store = FeatureStore()
+        self.serving_db = bool(serving_db)
+        self.candidate_gen = CandidateGenerator(use_serving_db=self.serving_db)
+        self.feature_store = FeatureStore(resident=resident_features, serving_db=self.serving_db)
+        self.id_mapper = IdMapper()
+
+        self._watcher: Optional[threading.Thread] = None
+        self._watcher_stop = threading.Event()
 
         self._load_model()
+        if snapshot_poll_seconds:
+            self.start_snapshot_watcher(snapshot_poll_seconds)
+
+    def start_snapshot_watcher(self, interval_seconds: float = 30.0) -> None:
+        """
+        백그라운드 스레드에서 CURRENT 포인터를 주기적으로 확인하고
+        새 Feature 스냅샷을 미리 연(적재한) 뒤 교체합니다.
+        교체는 참조 교체뿐이라 진행 중인 요청은 이전 스냅샷으로 끝까지 처리됩니다.
+        """
+        if self._watcher is not None:
+            return
+
+        def _watch() -> None:
+            while not self._watcher_stop.wait(interval_seconds):
+                try:
+                    self.feature_store.reload()
+                except Exception as e:
+                    logger.error(f"Feature 스냅샷 교체 실패: {e}")
+
+        self._watcher_stop.clear()
+        self._watcher = threading.Thread(target=_watch, name="feature-snapshot-watcher", daemon=True)
+        self._watcher.start()
+
+    def _sync_snapshot(self) -> None:
+        # 후보 생성의 item feature view를 FeatureStore와 같은 스냅샷으로 맞춤
+        # (DuckDB 연결은 요청 스레드에서만 사용)
+        if self.serving_db:
+            # 서빙 DB 파일이 교체되었으면 다시 ATTACH
+            self.candidate_gen.reload_features()
+            return
+        version = self.feature_store.snapshot_version
+        if version is not None and version != self.candidate_gen.snapshot_version:
+            self.candidate_gen.reload_features(version)
 
     def _load_model(self) -> None:
         if Path(self.model_path).exists():
@@ -66,11 +114,11 @@ class RecommendationService:
         except Exception:
             return self.fallback_hour
 
-    def _fallback(self, user_id: str, candidates: List[str], user_avg_hour: Any, top_k: int) -> Dict[str, Any]:
+    def _fallback(self, user_id: str, candidates: List[int], user_avg_hour: Any, top_k: int) -> Dict[str, Any]:
         # fallback은 항상 popularity/merge 순서 그대로
         return {
             "user_id": user_id,
-            "recommendations": candidates[:top_k],
+            "recommendations": self.id_mapper.articles.decode(candidates[:top_k]),
             "scores": None,
             "optimal_send_time": self._safe_int_hour(user_avg_hour),
             "fallback": True,
@@ -79,24 +127,82 @@ class RecommendationService:
     def recommend(self, user_id: str, top_k: int = 10) -> Dict[str, Any]:
         top_k = int(top_k) if top_k else self.top_k_default
 
-        # 1) 후보군 생성 (결정적 리스트)
-        candidates = self.candidate_gen.merge_candidates(user_id, total_k=self.candidate_k)
+        self._sync_snapshot()
+
+        # 0) API 경계: 문자열 customer_id → customer_idx (없는 유저는 None → popularity만)
+        user_idx = self.id_mapper.customers.encode_one(user_id)
+
+        # 1) 후보군 생성 (결정적 리스트, article_idx)
+        candidates = self.candidate_gen.merge_candidates(user_idx, total_k=self.candidate_k)
+
+        # 2) user features
+        uf = None
+        if candidates and user_idx is not None:
+            uf = self.feature_store.get_user_features([user_idx], columns=USER_FEATURE_COLUMNS)
+        return self._rank_candidates(user_id, user_idx, candidates, uf, top_k)
+
+    def recommend_batch(self, user_ids: Sequence[str], top_k: int = 10) -> List[Dict[str, Any]]:
+        """
+        여러 유저 추천 (결과는 유저별 recommend()와 동일, 입력 순서)
+
+        후보 생성은 merge_candidates_batch 1회, user feature는 FeatureStore 조회 1회로 처리하고
+        랭킹(item feature 조회 / 예측)만 유저별로 수행합니다.
+        """
+        top_k = int(top_k) if top_k else self.top_k_default
+
+        self._sync_snapshot()
+
+        encoded = self.id_mapper.customers.encode(list(user_ids))
+        user_idxs = [int(i) if i >= 0 else None for i in encoded]
+        candidates_batch = self.candidate_gen.merge_candidates_batch(user_idxs, total_k=self.candidate_k)
+
+        known = sorted({int(u) for u in user_idxs if u is not None})
+        uf_by_user: Dict[int, pl.DataFrame] = {}
+        if known:
+            uf_all = self.feature_store.get_user_features(known, columns=["customer_idx"] + USER_FEATURE_COLUMNS)
+            uf_by_user = {
+                int(key[0]): df.drop("customer_idx")
+                for key, df in uf_all.partition_by("customer_idx", as_dict=True).items()
+            }
+
+        empty_uf = pl.DataFrame(schema={c: pl.Float64 for c in USER_FEATURE_COLUMNS})
+        return [
+            self._rank_candidates(
+                user_id,
+                user_idx,
+                candidates,
+                uf_by_user.get(int(user_idx), empty_uf) if user_idx is not None else None,
+                top_k,
+            )
+            for user_id, user_idx, candidates in zip(user_ids, user_idxs, candidates_batch)
+        ]
+
+    def _rank_candidates(
+        self,
+        user_id: str,
+        user_idx: Optional[int],
+        candidates: List[int],
+        uf: Optional[pl.DataFrame],
+        top_k: int,
+    ) -> Dict[str, Any]:
+        """후보군 + user feature(USER_FEATURE_COLUMNS) → 랭킹 결과 (recommend / recommend_batch 공통)"""
         if not candidates:
             logger.warning(f"유저 {user_id}: 후보군이 없습니다.")
             return {"user_id": user_id, "recommendations": [], "scores": None, "optimal_send_time": None, "fallback": True}
 
-        # 2) user features
-        uf = self.feature_store.get_user_features([user_id])
-        if uf.height == 0:
+        if user_idx is None:
+            logger.warning(f"유저 {user_id}: ID 사전에 없는 유저")
+            return self._fallback(user_id, candidates, None, top_k)
+        if uf is None or uf.height == 0:
             logger.warning(f"유저 {user_id}: user feature 없음")
             return self._fallback(user_id, candidates, None, top_k)
 
         # 필요한 user feature만
-        uf1 = uf.select(["avg_purchase_hour", "purchase_count", "recency", "unique_items"]).head(1)
+        uf1 = uf.select(USER_FEATURE_COLUMNS).head(1)
         user_avg_hour = uf1["avg_purchase_hour"][0] if uf1.height else None
 
         # 3) item features (후보들)
-        it = self.feature_store.get_item_features(candidates)
+        it = self.feature_store.get_item_features(candidates, columns=["article_idx"] + ITEM_FEATURE_COLUMNS)
 
         if it.height == 0:
             logger.warning(f"유저 {user_id}: item feature 없음")
@@ -104,22 +210,23 @@ class RecommendationService:
 
         # 3-1) candidates 순서 보장: (candidate_idx join)
         cand_df = pl.DataFrame(
-            {"article_id": candidates, "candidate_idx": list(range(len(candidates)))}
+            {"article_idx": candidates, "candidate_idx": list(range(len(candidates)))},
+            schema={"article_idx": it.schema.get("article_idx", pl.Int32), "candidate_idx": pl.Int64},
         )
 
-        # item_features에 article_id 컬럼이 있어야 함 (없으면 FeatureStore 버그)
-        if "article_id" not in it.columns:
-            logger.error("item_features에 article_id 컬럼이 없습니다.")
+        # item_features에 article_idx 컬럼이 있어야 함 (없으면 FeatureStore 버그)
+        if "article_idx" not in it.columns:
+            logger.error("item_features에 article_idx 컬럼이 없습니다.")
             return self._fallback(user_id, candidates, user_avg_hour, top_k)
 
         # join 후 후보 순서대로 정렬
         it2 = (
-            cand_df.join(it, on="article_id", how="left")
+            cand_df.join(it, on="article_idx", how="left")
                   .sort("candidate_idx")
         )
 
         # feature 결측 제거(필요 시)
-        needed_item_cols = ["popularity_rank", "sales_count", "peak_hour"]
+        needed_item_cols = ITEM_FEATURE_COLUMNS
         missing_cols = [c for c in needed_item_cols if c not in it2.columns]
         if missing_cols:
             logger.error(f"item_features에 필요한 컬럼 누락: {missing_cols}")
@@ -149,9 +256,9 @@ class RecommendationService:
 
         # 5) 모델 없으면 fallback
         if self.ranker is None:
-            return self._fallback(user_id, it2["article_id"].to_list(), user_avg_hour, top_k)
+            return self._fallback(user_id, it2["article_idx"].to_list(), user_avg_hour, top_k)
 
-        # 6) 예측 + TopK (정합성: it2.article_id와 scores는 같은 순서)
+        # 6) 예측 + TopK (정합성: it2.article_idx와 scores는 같은 순서)
         try:
             scores = self.ranker.predict(features_df)
             scores = np.asarray(scores, dtype=float)
@@ -161,13 +268,14 @@ class RecommendationService:
             top_idx = np.argpartition(scores, -k)[-k:]
             top_idx = top_idx[np.argsort(scores[top_idx])[::-1]]
 
-            top_items = it2["article_id"].to_list()
-            recs = [top_items[int(i)] for i in top_idx]
+            top_items = it2["article_idx"].to_list()
+            # API 경계: article_idx → 문자열 article_id (최종 top_k만 변환)
+            recs = self.id_mapper.articles.decode([top_items[int(i)] for i in top_idx])
             rec_scores = [float(scores[int(i)]) for i in top_idx]
 
         except Exception as e:
             logger.error(f"예측 중 오류: {e}")
-            return self._fallback(user_id, it2["article_id"].to_list(), user_avg_hour, top_k)
+            return self._fallback(user_id, it2["article_idx"].to_list(), user_avg_hour, top_k)
 
         # 7) optimal send time (현재는 avg_purchase_hour 기반)
         optimal_hour = self._safe_int_hour(user_avg_hour)
@@ -181,6 +289,10 @@ class RecommendationService:
         }
 
     def close(self) -> None:
+        if self._watcher is not None:
+            self._watcher_stop.set()
+            self._watcher.join()
+            self._watcher = None
         self.candidate_gen.close()
         self.feature_store.close()
 
@@ -192,9 +304,11 @@ if __name__ == "__main__":
 
     try:
         con = duckdb.connect(":memory:")
-        sample_user = con.execute("""
-            SELECT customer_id
-            FROM read_parquet('data/features/user_features.parquet')
+        sample_user = con.execute(f"""
+            SELECT d.customer_id
+            FROM read_parquet('{resolve_feature_path("user_features.parquet")}') uf
+            JOIN read_parquet('data/processed/dictionaries/customer_ids.parquet') d
+              USING (customer_idx)
             LIMIT 1
         """).fetchone()[0]
         con.close()
@@ -0,0 +1,326 @@
+"""
+Sparse CF Module
+
+In-process item-to-item CF over the CF window as SciPy CSR matrices
+(CandidateGenerator(cf_backend="sparse")).
+
+- item x user: purchase counts (seed side of the co-purchase join)
+- user x item: time-decayed purchase weights 0.5^(age/half_life) (candidate side), one per half-life
+- per-user transaction rows sorted by (t_dat DESC, article_idx ASC) for seed selection (UserHistoryIndex)
+
+Both matrices are assembled from per-day partials (age, customer, article, row count) sorted by age:
+a window of the last L days is the prefix of partials with age <= L, so any window length up to the
+loaded CF window and any half-life are scored from the same in-memory partials
+(window_days / time_decay_half_life_days sweeps without re-materializing transactions).
+
+For a user's seeds S the co-purchase scores are one sparse product C[S] @ D,
+which is the same sum as the SQL self-join (seed row x candidate row of the same customer).
+Per-seed pruning, popularity penalty, purchased-item exclusion and ordering
+follow generate_cf_scored_item2item, so both backends return the same list.
+A batch of users shares one product over the union of their seeds
+(per-seed neighbors do not depend on the user).
+With max_buyers_per_seed the seed side keeps only each item's most recent buyers
+(same ranking as CandidateGenerator's t_seed_buyers).
+"""
+
+from __future__ import annotations
+
+import duckdb
+import numpy as np
+from scipy import sparse
+from typing import Dict, List, Optional, Sequence, Tuple
+import logging
+
+from .user_history import UserHistoryIndex
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+# per-seed neighbor lists are ranked by ROUND(score, NEIGHBOR_SCORE_DECIMALS), then cand ASC.
+# Many co-purchase scores are mathematically equal (same counts x same day weights) but differ
+# in the last bits depending on summation order (thread count, backend, incremental updates);
+# ranking the raw doubles made the per-seed cut pick different tied candidates run to run.
+NEIGHBOR_SCORE_DECIMALS = 9
+
+
+def top_k_desc(ids: np.ndarray, scores: np.ndarray, k: int, decimals: Optional[int] = None) -> np.ndarray:
+    """
+    Positions of the top-k entries ordered by (score DESC, id ASC).
+
+    argpartition finds the k-th score; every entry tied with it is kept before the
+    exact lexsort, so ties at the boundary resolve by id like ROW_NUMBER / ORDER BY in SQL.
+    With decimals, scores are compared after rounding (like ORDER BY ROUND(score, decimals)).
+    """
+    k = int(k)
+    if k <= 0 or len(scores) == 0:
+        return np.empty(0, dtype=np.int64)
+    if decimals is not None:
+        scores = np.round(scores, decimals)
+    if len(scores) > k:
+        kth = scores[np.argpartition(-scores, k - 1)[k - 1]]
+        pos = np.flatnonzero(scores >= kth)
+    else:
+        pos = np.arange(len(scores))
+    order = np.lexsort((ids[pos], -scores[pos]))
+    return pos[order[:k]]
+
+
+class SparseCFIndex:
+    """CF window as CSR matrices + per-user seed rows (built once per CandidateGenerator cache)"""
+
+    def __init__(self, history: UserHistoryIndex):
+        """
+        Args:
+            history: per-user CF window rows (shared with the SQL backend)
+        """
+        self.history = history
+        self.n_users = history.n_users
+        self.n_items = int(history.articles.max()) + 1 if len(history.articles) else 0
+
+        # per-day partials: row count per (age, customer, article), sorted by age;
+        # day_ptr[d] = first partial with age >= d, so age <= L is the prefix [0, day_ptr[L + 1])
+        ages = history.ages.astype(np.int64)
+        order = np.lexsort((history.articles, history.customers, ages))
+        ages, users, items = ages[order], history.customers[order], history.articles[order]
+        first = np.ones(len(ages), dtype=bool)
+        first[1:] = (ages[1:] != ages[:-1]) | (users[1:] != users[:-1]) | (items[1:] != items[:-1])
+        starts = np.flatnonzero(first)
+        self.part_age = ages[starts]
+        self.part_user = users[starts]
+        self.part_item = items[starts]
+        self.part_count = np.diff(np.append(starts, len(ages))).astype(np.float64)
+        self.max_age = int(self.part_age[-1]) if len(self.part_age) else -1
+        self.day_ptr = np.searchsorted(self.part_age, np.arange(self.max_age + 2))
+
+        self._item_user: Dict[Optional[int], sparse.csr_matrix] = {}
+        self._user_item_decay: Dict[Tuple[int, Optional[int]], sparse.csr_matrix] = {}
+        self._item_user_capped: Dict[Tuple[int, Optional[int]], sparse.csr_matrix] = {}
+        # item x user counts of the whole window (duplicates summed)
+        self.item_user = self.item_user_counts()
+
+    @classmethod
+    def from_connection(cls, con: duckdb.DuckDBPyConnection) -> "SparseCFIndex":
+        """Build from a prepared CandidateGenerator connection (loads the user history too)."""
+        return cls.from_history(UserHistoryIndex.from_connection(con))
+
+    @classmethod
+    def from_history(cls, history: UserHistoryIndex) -> "SparseCFIndex":
+        index = cls(history)
+        logger.info("Sparse CF index ready: %d users x %d items", index.n_users, index.n_items)
+        return index
+
+    def window_key(self, window_days: Optional[int]) -> Optional[int]:
+        """Cache key of a window: None for the whole loaded window, else the max age kept"""
+        if window_days is None:
+            return None
+        if int(window_days) < 0:
+            raise ValueError(f"window_days must be >= 0: {window_days}")
+        return int(window_days) if int(window_days) < self.max_age else None
+
+    def _partials(self, window: Optional[int]) -> slice:
+        """Partials of a window (window_key): the prefix with age <= window"""
+        return slice(0, len(self.part_age) if window is None else int(self.day_ptr[window + 1]))
+
+    def item_user_counts(self, window_days: Optional[int] = None) -> sparse.csr_matrix:
+        """item x user row counts over the window (cached per window)"""
+        window = self.window_key(window_days)
+        mat = self._item_user.get(window)
+        if mat is None:
+            part = self._partials(window)
+            mat = sparse.csr_matrix(
+                (self.part_count[part], (self.part_item[part], self.part_user[part])),
+                shape=(self.n_items, self.n_users),
+            )
+            self._item_user[window] = mat
+        return mat
+
+    def user_item_decay(self, half_life: int, window_days: Optional[int] = None) -> sparse.csr_matrix:
+        """user x item matrix of summed 0.5^(age/half_life) over the window (cached per half-life, window)"""
+        half_life = max(int(half_life), 1)
+        window = self.window_key(window_days)
+        mat = self._user_item_decay.get((half_life, window))
+        if mat is None:
+            part = self._partials(window)
+            weights = self.part_count[part] * np.power(0.5, self.part_age[part] / half_life)
+            mat = sparse.csr_matrix(
+                (weights, (self.part_user[part], self.part_item[part])),
+                shape=(self.n_users, self.n_items),
+            )
+            self._user_item_decay[(half_life, window)] = mat
+        return mat
+
+    def item_user_capped(
+        self, max_buyers: Optional[int], window_days: Optional[int] = None
+    ) -> sparse.csr_matrix:
+        """
+        item x user counts keeping, per item, the max_buyers most recent buyers
+        (last purchase age ASC, customer_idx ASC); cached per cap and window
+        """
+        if max_buyers is None:
+            return self.item_user_counts(window_days)
+        max_buyers = int(max_buyers)
+        window = self.window_key(window_days)
+        mat = self._item_user_capped.get((max_buyers, window))
+        if mat is None:
+            part = self._partials(window)
+            # distinct (item, user) pairs: row count + most recent purchase (min age)
+            order = np.lexsort((self.part_age[part], self.part_user[part], self.part_item[part]))
+            items = self.part_item[part][order]
+            users = self.part_user[part][order]
+            ages = self.part_age[part][order]
+            first = np.ones(len(items), dtype=bool)
+            first[1:] = (items[1:] != items[:-1]) | (users[1:] != users[:-1])
+            starts = np.flatnonzero(first)
+            counts = np.add.reduceat(self.part_count[part][order], starts) if len(starts) else starts
+            items, users, last_age = items[starts], users[starts], ages[starts]
+
+            # buyer rank within each item
+            order = np.lexsort((users, last_age, items))
+            items, users, counts = items[order], users[order], counts[order]
+            item_start = np.flatnonzero(np.r_[True, items[1:] != items[:-1]])
+            group_start = np.repeat(item_start, np.diff(np.append(item_start, len(items))))
+            keep = (np.arange(len(items)) - group_start) < max_buyers
+
+            mat = sparse.csr_matrix(
+                (counts[keep].astype(np.float64), (items[keep], users[keep])),
+                shape=(self.n_items, self.n_users),
+            )
+            self._item_user_capped[(max_buyers, window)] = mat
+        return mat
+
+    def seed_neighbors(
+        self,
+        seeds: np.ndarray,
+        half_life: int,
+        cooc_top_per_seed: int,
+        max_buyers_per_seed: Optional[int] = None,
+        window_days: Optional[int] = None,
+    ) -> Dict[int, Tuple[np.ndarray, np.ndarray]]:
+        """Pruned co-purchase neighbors {seed: (cand_items, scores)} with one product for all seeds"""
+        seeds = np.unique(np.asarray(seeds, dtype=np.int32))
+        if len(seeds) == 0:
+            return {}
+        seed_side = self.item_user_capped(max_buyers_per_seed, window_days)
+        cooc = (seed_side[seeds] @ self.user_item_decay(half_life, window_days)).tocsr()
+
+        out = {}
+        for i, seed in enumerate(seeds):
+            lo, hi = cooc.indptr[i], cooc.indptr[i + 1]
+            cols = cooc.indices[lo:hi]
+            vals = cooc.data[lo:hi]
+            keep = cols != seed
+            cols, vals = cols[keep], vals[keep]
+            top = top_k_desc(cols, vals, cooc_top_per_seed, NEIGHBOR_SCORE_DECIMALS)
+            out[int(seed)] = (cols[top], vals[top])
+        return out
+
+    def _user_seeds(self, user_idx: int, recent_items: int, half_life: int, window_days: Optional[int]):
+        """(window articles, seed items, summed seed weights)"""
+        window = self.window_key(window_days)
+        seeds, weights = self.history.seeds(user_idx, recent_items, half_life, window)
+        return self.history.rows(int(user_idx), window)[0], seeds, weights
+
+    def score(
+        self,
+        user_idx: int,
+        popularity_rank: Optional[np.ndarray],
+        top_k: int = 50,
+        recent_items: int = 10,
+        cooc_top_per_seed: int = 200,
+        time_decay_half_life_days: int = 14,
+        popularity_penalty_alpha: float = 0.20,
+        exclude_already_purchased: bool = True,
+        max_buyers_per_seed: Optional[int] = None,
+        window_days: Optional[int] = None,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Same scoring as CandidateGenerator.generate_cf_scored_item2item.
+
+        Args:
+            popularity_rank: dense array indexed by article_idx, NaN where unknown
+                (no penalty, like the LEFT JOIN miss in SQL)
+            window_days: score over the rows with age <= window_days only
+                (same result as loading a CF window of that length; None: whole window)
+
+        Returns:
+            (article_idx, score) ordered by (score DESC, article_idx ASC)
+        """
+        return self.score_batch(
+            [user_idx], popularity_rank, top_k, recent_items, cooc_top_per_seed,
+            time_decay_half_life_days, popularity_penalty_alpha, exclude_already_purchased,
+            max_buyers_per_seed, window_days,
+        )[0]
+
+    def score_batch(
+        self,
+        user_idxs: Sequence[int],
+        popularity_rank: Optional[np.ndarray],
+        top_k: int = 50,
+        recent_items: int = 10,
+        cooc_top_per_seed: int = 200,
+        time_decay_half_life_days: int = 14,
+        popularity_penalty_alpha: float = 0.20,
+        exclude_already_purchased: bool = True,
+        max_buyers_per_seed: Optional[int] = None,
+        window_days: Optional[int] = None,
+    ) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """score() for many users: seed neighbors are computed once for the union of seeds"""
+        half_life = max(int(time_decay_half_life_days), 1)
+        users = [self._user_seeds(int(u), recent_items, half_life, window_days) for u in user_idxs]
+        all_seeds = [seeds for _, seeds, _ in users if len(seeds)]
+        neighbors = self.seed_neighbors(
+            np.concatenate(all_seeds) if all_seeds else np.empty(0, dtype=np.int32),
+            half_life,
+            cooc_top_per_seed,
+            max_buyers_per_seed,
+            window_days,
+        )
+        return [
+            self._score_user(
+                articles, seeds, seed_weight, neighbors, popularity_rank,
+                top_k, popularity_penalty_alpha, exclude_already_purchased,
+            )
+            for articles, seeds, seed_weight in users
+        ]
+
+    @staticmethod
+    def _score_user(
+        articles: np.ndarray,
+        seeds: np.ndarray,
+        seed_weight: np.ndarray,
+        neighbors: Dict[int, Tuple[np.ndarray, np.ndarray]],
+        popularity_rank: Optional[np.ndarray],
+        top_k: int,
+        popularity_penalty_alpha: float,
+        exclude_already_purchased: bool,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        if len(seeds) == 0:
+            return np.empty(0, dtype=np.int32), np.empty(0)
+
+        cand_parts = []
+        score_parts = []
+        for seed, w in zip(seeds, seed_weight):
+            cols, vals = neighbors[int(seed)]
+            cand_parts.append(cols)
+            score_parts.append(w * vals)
+
+        all_cands = np.concatenate(cand_parts)
+        cands, inverse = np.unique(all_cands, return_inverse=True)
+        scores = np.bincount(inverse, weights=np.concatenate(score_parts))
+
+        if popularity_rank is not None:
+            rank = np.full(len(cands), np.nan)
+            known = cands < len(popularity_rank)
+            rank[known] = popularity_rank[cands[known]]
+            penalized = ~np.isnan(rank)
+            scores[penalized] = scores[penalized] / (
+                1.0 + float(popularity_penalty_alpha) * np.log(1.0 + rank[penalized])
+            )
+
+        if exclude_already_purchased:
+            keep = ~np.isin(cands, articles)
+            cands, scores = cands[keep], scores[keep]
+
+        top = top_k_desc(cands, scores, top_k)
+        return cands[top].astype(np.int32), scores[top]
@@ -0,0 +1,90 @@
+"""
+User History Module
+
+Per-user CF window history as a CSR layout: user -> (article_idx, age) rows, most recent first.
+
+t_cf_transactions is sorted by article_idx for the co-purchase join, so a
+`WHERE customer_idx = ?` filter on it scans the whole window. Seed selection and
+purchased-item exclusion read the user's slice here instead (O(history length)).
+Rows are most recent first, so a shorter window (age <= window_days) is a prefix of the slice.
+"""
+
+from __future__ import annotations
+
+import duckdb
+import numpy as np
+from typing import Optional, Tuple
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class UserHistoryIndex:
+    """CF window rows grouped by customer_idx (indptr offsets), ordered by (t_dat DESC, article_idx ASC)"""
+
+    def __init__(self, customers: np.ndarray, articles: np.ndarray, ages: np.ndarray):
+        """
+        Args:
+            customers / articles / ages: CF window rows sorted by
+                (customer_idx, age ASC, article_idx ASC); age = days before dmax
+        """
+        self.n_users = int(customers.max()) + 1 if len(customers) else 0
+        self.indptr = np.zeros(self.n_users + 1, dtype=np.int64)
+        np.cumsum(np.bincount(customers, minlength=self.n_users), out=self.indptr[1:])
+        self.customers = customers.astype(np.int32, copy=False)
+        self.articles = articles.astype(np.int32, copy=False)
+        self.ages = ages.astype(np.float64, copy=False)
+
+    @classmethod
+    def from_connection(cls, con: duckdb.DuckDBPyConnection) -> "UserHistoryIndex":
+        """Load v_cf_transactions (age = day_offset) from a prepared CandidateGenerator connection."""
+        cols = con.execute(
+            """
+            SELECT
+                customer_idx,
+                article_idx,
+                day_offset AS age
+            FROM v_cf_transactions
+            ORDER BY customer_idx, t_dat DESC, article_idx ASC
+            """
+        ).fetchnumpy()
+        index = cls(
+            np.asarray(cols["customer_idx"], dtype=np.int32),
+            np.asarray(cols["article_idx"], dtype=np.int32),
+            np.asarray(cols["age"], dtype=np.int64),
+        )
+        logger.info("User history index ready: %d rows, %d users", len(index.articles), index.n_users)
+        return index
+
+    def rows(self, user_idx: int, window_days: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """(articles, ages) of a user's window rows, most recent first (age <= window_days if given)"""
+        if user_idx < 0 or user_idx >= self.n_users:
+            empty = np.empty(0)
+            return empty.astype(np.int32), empty
+        lo, hi = self.indptr[user_idx], self.indptr[user_idx + 1]
+        articles, ages = self.articles[lo:hi], self.ages[lo:hi]
+        if window_days is not None:
+            n = int(np.searchsorted(ages, int(window_days), side="right"))
+            articles, ages = articles[:n], ages[:n]
+        return articles, ages
+
+    def seeds(
+        self, user_idx: int, recent_items: int, half_life: int, window_days: Optional[int] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Seed items of a user: the most recent recent_items rows, weighted 0.5^(age/half_life);
+        a seed item bought more than once in those rows adds up its weights.
+
+        Returns:
+            (unique seed items, summed seed weights)
+        """
+        articles, ages = self.rows(int(user_idx), window_days)
+        seed_rows = articles[: int(recent_items)]
+        seed_w = np.power(0.5, ages[: int(recent_items)] / max(int(half_life), 1))
+        seeds, inverse = np.unique(seed_rows, return_inverse=True)
+        return seeds, np.bincount(inverse, weights=seed_w, minlength=len(seeds))
+
+    def purchased(self, user_idx: int, window_days: Optional[int] = None) -> np.ndarray:
+        """Distinct items the user bought in the window"""
+        return np.unique(self.rows(int(user_idx), window_days)[0])
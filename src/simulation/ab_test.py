@@ -48,8 +48,10 @@ class ABTestSimulator:
         Returns:
             시뮬레이션 결과 딕셔너리
         """
-        # 1. 인기 상품 Top 5 추출
-        popular_items = self.candidate_gen.generate_popularity_candidates(top_k=5)
+        # 1. 인기 상품 Top 5 추출 (article_idx → 문자열 article_id)
+        popular_items = self.rec_service.id_mapper.articles.decode(
+            self.candidate_gen.generate_popularity_candidates(top_k=5)
+        )
         
         # 2. 랜덤 발송 시간 (9시~21시)
         send_time = random.randint(9, 21)
@@ -130,6 +132,7 @@ if __name__ == "__main__":
     from src.simulation.ab_test import ABTestSimulator
     from src.simulation.virtual_user import VirtualUser
     from src.models.serving import RecommendationService
+    from src.data.feature_snapshot import resolve_feature_path
     
     # LLM 없이 테스트
     simulator = ABTestSimulator(
@@ -142,9 +145,11 @@ if __name__ == "__main__":
     # 샘플 유저로 테스트
     import duckdb
     con = duckdb.connect(':memory:')
-    sample_user = con.execute("""
-        SELECT customer_id 
-        FROM read_parquet('data/features/user_features.parquet')
+    sample_user = con.execute(f"""
+        SELECT d.customer_id
+        FROM read_parquet('{resolve_feature_path("user_features.parquet")}') uf
+        JOIN read_parquet('data/processed/dictionaries/customer_ids.parquet') d
+          USING (customer_idx)
         LIMIT 1
     """).fetchone()[0]
     con.close()
@@ -1,5 +1,5 @@
 """Utility functions for Local-Helix project"""
 
-from .db_init import DuckDBManager, create_database_schema, test_connection
+from .db_init import DuckDBManager, create_database_schema, build_serving_database, test_connection
 
-__all__ = ['DuckDBManager', 'create_database_schema', 'test_connection']
+__all__ = ['DuckDBManager', 'create_database_schema', 'build_serving_database', 'test_connection']
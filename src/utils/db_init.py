@@ -5,8 +5,10 @@ DuckDB 초기화 및 유틸리티 모듈
 """
 
 import duckdb
+import os
+from datetime import datetime
 from pathlib import Path
-from typing import Optional
+from typing import Optional, Tuple
 
 
 class DuckDBManager:
@@ -82,39 +84,154 @@ class DuckDBManager:
         self.close()
 
 
-def create_database_schema(con: duckdb.DuckDBPyConnection):
+# 서빙 DB의 key 기반 Feature 테이블 (테이블명 → PRIMARY KEY 컬럼)
+SERVING_FEATURE_TABLES = {
+    'user_features': 'customer_idx',
+    'item_features': 'article_idx',
+}
+
+# Parquet 스키마를 알 수 없을 때 사용하는 기본 컬럼 (feature_builder.py 출력과 동일)
+DEFAULT_FEATURE_COLUMNS = {
+    'user_features': [
+        ('customer_idx', 'INTEGER'),
+        ('avg_purchase_hour', 'DOUBLE'),
+        ('purchase_count', 'BIGINT'),
+        ('unique_items', 'BIGINT'),
+        ('avg_price', 'DOUBLE'),
+        ('recency', 'BIGINT'),
+        ('purchase_frequency', 'VARCHAR'),
+        ('last_purchase_date', 'DATE'),
+        ('first_purchase_date', 'DATE'),
+    ],
+    'item_features': [
+        ('article_idx', 'INTEGER'),
+        ('popularity_rank', 'BIGINT'),
+        ('sales_count', 'BIGINT'),
+        ('unique_customers', 'BIGINT'),
+        ('avg_price', 'DOUBLE'),
+        ('peak_hour', 'BIGINT'),
+        ('last_sold_date', 'DATE'),
+    ],
+}
+
+
+def create_database_schema(con: duckdb.DuckDBPyConnection, features_dir: Optional[str] = None):
     """
     초기 데이터베이스 스키마 생성
     
+    Feature 테이블은 int32 surrogate key(customer_idx / article_idx)를 PRIMARY KEY로 가지며
+    (DuckDB ART 인덱스), features_dir가 주어지면 현재 Feature 스냅샷의 Parquet 스키마
+    (추가 window 컬럼 포함)를 그대로 사용합니다.
+    
     Args:
         con: DuckDB 연결 객체
+        features_dir: Feature 루트 디렉토리 (None이면 기본 컬럼)
     """
-    # User Features 테이블
-    con.execute("""
-        CREATE TABLE IF NOT EXISTS user_features (
-            customer_id VARCHAR PRIMARY KEY,
-            avg_purchase_hour DOUBLE,
-            preferred_category VARCHAR,
-            recency INTEGER,
-            purchase_count INTEGER,
-            purchase_frequency VARCHAR
-        )
-    """)
+    for table, key in SERVING_FEATURE_TABLES.items():
+        columns = DEFAULT_FEATURE_COLUMNS[table]
+        if features_dir is not None:
+            from ..data.feature_snapshot import resolve_feature_path
+
+            path = resolve_feature_path(f'{table}.parquet', features_dir)
+            columns = [
+                (row[0], row[1])
+                for row in con.execute(f"DESCRIBE SELECT * FROM read_parquet('{path}')").fetchall()
+            ]
+        column_sql = ",\n            ".join(f'"{name}" {dtype}' for name, dtype in columns)
+        con.execute(f"""
+            CREATE TABLE IF NOT EXISTS {table} (
+                {column_sql},
+                PRIMARY KEY ("{key}")
+            )
+        """)
     
-    # Item Features 테이블
+    # 서빙 DB 메타데이터 (Feature 스냅샷 버전 등)
     con.execute("""
-        CREATE TABLE IF NOT EXISTS item_features (
-            article_id VARCHAR PRIMARY KEY,
-            popularity_rank INTEGER,
-            peak_hour INTEGER,
-            sales_count INTEGER,
-            category VARCHAR
+        CREATE TABLE IF NOT EXISTS serving_meta (
+            key VARCHAR PRIMARY KEY,
+            value VARCHAR
         )
     """)
     
     print("✓ 데이터베이스 스키마 생성 완료")
 
 
+def build_serving_database(db_path: str = 'local_helix.db',
+                           features_dir: str = 'data/features') -> str:
+    """
+    현재 Feature 스냅샷을 key 테이블로 적재한 서빙 DB 생성
+    
+    임시 파일(db_path.tmp)에 스키마 생성 → bulk load → CHECKPOINT 후 os.replace로 교체합니다.
+    이미 db_path를 READ_ONLY로 연 프로세스는 이전 파일을 계속 읽고,
+    다시 ATTACH하면 새 파일을 봅니다 (attach_serving_db 참조).
+    
+    Args:
+        db_path: 서빙 DB 경로
+        features_dir: Feature 루트 디렉토리
+    
+    Returns:
+        서빙 DB 경로
+    """
+    from ..data.feature_snapshot import current_version, resolve_feature_path
+
+    tmp_path = f'{db_path}.tmp'
+    for path in (tmp_path, f'{tmp_path}.wal'):
+        if os.path.exists(path):
+            os.remove(path)
+
+    manager = DuckDBManager(tmp_path)
+    con = manager.connect()
+    try:
+        create_database_schema(con, features_dir)
+        for table, key in SERVING_FEATURE_TABLES.items():
+            path = resolve_feature_path(f'{table}.parquet', features_dir)
+            # key 순으로 적재 (row group zone map으로 key 조회 시 해당 구간만 스캔)
+            con.execute(f"INSERT INTO {table} SELECT * FROM read_parquet('{path}') ORDER BY \"{key}\"")
+        con.execute(
+            "INSERT INTO serving_meta VALUES ('feature_snapshot', ?), ('built_at', ?)",
+            [current_version(features_dir) or '', datetime.now().isoformat(timespec='seconds')],
+        )
+        con.execute("CHECKPOINT")
+    finally:
+        manager.close()
+
+    # 이전 DB의 WAL이 새 파일에 재생되지 않도록 제거 후 교체
+    if os.path.exists(f'{db_path}.wal'):
+        os.remove(f'{db_path}.wal')
+    os.replace(tmp_path, db_path)
+    return db_path
+
+
+def serving_db_signature(db_path: str) -> Optional[Tuple[int, int]]:
+    """서빙 DB 파일 식별값 (inode, mtime) - 교체 여부 확인용, 파일이 없으면 None"""
+    try:
+        st = os.stat(db_path)
+    except FileNotFoundError:
+        return None
+    return st.st_ino, st.st_mtime_ns
+
+
+def attach_serving_db(con: duckdb.DuckDBPyConnection, db_path: str) -> Optional[Tuple[int, int]]:
+    """
+    서빙 DB를 READ_ONLY로 filedb에 (다시) ATTACH
+    
+    Returns:
+        ATTACH한 파일의 serving_db_signature (실패 / 파일 없음이면 None)
+    """
+    if db_path == ':memory:':
+        return None
+    signature = serving_db_signature(db_path)
+    if signature is None:
+        return None
+    try:
+        con.execute("DETACH DATABASE IF EXISTS filedb")
+        con.execute(f"ATTACH '{db_path}' AS filedb (READ_ONLY)")
+    except Exception:
+        # If attach fails, continue with in-memory only
+        return None
+    return signature
+
+
 def test_connection():
     """DuckDB 연결 테스트"""
     try: